@@ -0,0 +1,122 @@
+"""
+Benchmark the latency of concurrent MCP tool calls.
+
+Simulated clients call the tools' manager operations at random (Poisson) intervals, mostly
+reading pipelines and sometimes updating their context. Latency runs from a call's arrival to its
+result, so time spent waiting for the event loop counts. Two setups are compared:
+
+- direct: the tools call WorkflowManager on the event loop, as they used to
+- async: the tools await AsyncWorkflowManager, which runs the calls on database threads
+
+Each commit sleeps for a simulated fsync delay, since temporary files are rarely on a disk with
+a real one. Set it to 0 to measure without.
+
+Usage: python benchmarks/bench_async_tools.py [calls] [calls per second] [fsync ms] [read threads] [write threads]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import contextlib
+import io
+import random
+import statistics
+import tempfile
+import time
+
+from pipelineMGMT.asyncManager import AsyncWorkflowManager, DEFAULT_DB_WORKERS, DEFAULT_DB_WRITERS
+from pipelineMGMT.manager import WorkflowManager
+
+CONFIG = {
+    "name": "bench-config",
+    "description": "Benchmark config",
+    "context": {"ticket_number": "", "customer_id": ""},
+    "steps": [{"id": f"step-{i}", "instructions": f"Do part {i} for {{ticket_number}}"} for i in range(10)]
+}
+
+PIPELINES = 200
+# Share of calls that update a pipeline; the others read one
+WRITE_SHARE = 0.2
+
+def slow_commits(db, delay):
+    """Make every commit of a Database take `delay` seconds longer, like an fsync on a slow disk."""
+    commit = db.commit
+
+    def delayed_commit():
+        time.sleep(delay)
+        commit()
+
+    db.commit = delayed_commit
+
+def direct_calls(manager):
+    async def call(write, pipeline_id, value):
+        if write:
+            manager.update_workflow(pipeline_id, {"customer_id": value})
+        else:
+            manager.get_workflow(pipeline_id)
+    return call
+
+def async_calls(async_manager):
+    async def call(write, pipeline_id, value):
+        if write:
+            await async_manager.update_workflow(pipeline_id, {"customer_id": value})
+        else:
+            await async_manager.get_workflow(pipeline_id)
+    return call
+
+async def run(call, ids, calls, rate):
+    """Issue calls at random intervals averaging `rate` per second. Returns the latencies by kind of call and the elapsed time."""
+    rng = random.Random(0)
+    latencies = {"read": [], "update": []}
+
+    async def timed(arrival, write, pipeline_id, value):
+        await call(write, pipeline_id, value)
+        latencies["update" if write else "read"].append(time.perf_counter() - arrival)
+
+    tasks = []
+    start = time.perf_counter()
+    arrival = start
+    for index in range(calls):
+        arrival += rng.expovariate(rate)
+        delay = arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        write = rng.random() < WRITE_SHARE
+        tasks.append(asyncio.create_task(timed(arrival, write, rng.choice(ids), str(index))))
+    await asyncio.gather(*tasks)
+    return latencies, time.perf_counter() - start
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 400.0
+    fsync_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_DB_WORKERS
+    writers = int(sys.argv[5]) if len(sys.argv) > 5 else DEFAULT_DB_WRITERS
+
+    print(f"{calls} calls at {rate:.0f}/s, {WRITE_SHARE:.0%} updates, {fsync_ms:g} ms per commit, {workers}+{writers} db threads")
+    print(f"{'setup':>7} {'calls':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'mean ms':>8} {'calls/s':>8}")
+    for setup in ("direct", "async"):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = WorkflowManager(os.path.join(directory, "bench.db"))
+            with contextlib.redirect_stdout(io.StringIO()):
+                ids = [manager.db_manager.create_workflow_entity(CONFIG, name=f"pipeline-{i}").id for i in range(PIPELINES)]
+            slow_commits(manager.db_manager.db, fsync_ms / 1000)
+
+            async_manager = AsyncWorkflowManager(manager, max_workers=workers, max_writers=writers)
+            call = direct_calls(manager) if setup == "direct" else async_calls(async_manager)
+            latencies, elapsed = asyncio.run(run(call, ids, calls, rate))
+            async_manager.close()
+
+        latencies["all"] = latencies["read"] + latencies["update"]
+        for kind in ("all", "read", "update"):
+            values = latencies[kind]
+            print(
+                f"{setup:>7} {kind:>7} {percentile(values, 0.5) * 1000:>8.2f} {percentile(values, 0.99) * 1000:>8.2f} "
+                f"{max(values) * 1000:>8.2f} {statistics.mean(values) * 1000:>8.2f} {len(values) / elapsed:>8.0f}"
+            )
@@ -0,0 +1,70 @@
+"""
+Benchmark bulk pipeline operations against one call per pipeline.
+
+Creates, advances and cancels pipelines from the workflow configurations in the workflows
+directory, once with the per-pipeline manager calls and once with the bulk calls that save
+everything in one transaction.
+
+Usage: python benchmarks/bench_bulk.py [pipelines] [config name]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import contextlib
+import io
+import tempfile
+import time
+
+from pipelineMGMT.manager import WorkflowManager
+
+WORKFLOWS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'workflows'))
+
+def timed(function):
+    start = time.perf_counter()
+    # The per-pipeline calls print progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function()
+    return time.perf_counter() - start, result
+
+def one_by_one(manager, config_name, count):
+    def create():
+        return [manager.create_workflow(config_name, f"single-{i}", {"ticket_number": f"T-{i}"})["id"] for i in range(count)]
+
+    create_time, ids = timed(create)
+    launch_time, _ = timed(lambda: [manager.launch_workflow(pipeline_id) for pipeline_id in ids])
+    complete_time, _ = timed(lambda: [manager.complete_workflow_current_step(pipeline_id) for pipeline_id in ids])
+    cancel_time, _ = timed(lambda: [manager.cancel_workflow(pipeline_id, "benchmark") for pipeline_id in ids])
+    return create_time, launch_time, complete_time, cancel_time
+
+def bulk(manager, config_name, count):
+    pipelines = [{"name": f"bulk-{i}", "context": {"ticket_number": f"T-{i}"}} for i in range(count)]
+    create_time, result = timed(lambda: manager.create_workflows_bulk(config_name, pipelines))
+    ids = [pipeline["id"] for pipeline in result["pipelines"]]
+
+    def launch():
+        # There is no bulk launch: start the first steps in one unit of work
+        with manager.unit_of_work():
+            for entity in manager.db_manager.get_workflow_entities(ids).values():
+                entity.start_step(entity.get_first_step())
+
+    launch_time, _ = timed(launch)
+    complete_time, _ = timed(lambda: manager.complete_workflow_steps_bulk(ids))
+    cancel_time, _ = timed(lambda: manager.cancel_workflows_bulk(ids, "benchmark"))
+    return create_time, launch_time, complete_time, cancel_time
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    config_name = sys.argv[2] if len(sys.argv) > 2 else "01 Test workflow config"
+
+    print(f"{count} pipelines of '{config_name}'")
+    print(f"{'calls':>12} {'create s':>9} {'launch s':>9} {'complete s':>11} {'cancel s':>9} {'commits':>8}")
+    for name, run in (("one by one", one_by_one), ("bulk", bulk)):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = WorkflowManager(os.path.join(directory, "bench.db"), workflows_dir=WORKFLOWS_DIR)
+            create_time, launch_time, complete_time, cancel_time = run(manager, config_name, count)
+            commits = manager.get_cache_stats()["writes"]["commits"]
+            manager.close()
+        print(f"{name:>12} {create_time:>9.2f} {launch_time:>9.2f} {complete_time:>11.2f} {cancel_time:>9.2f} {commits:>8}")
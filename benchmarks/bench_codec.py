@@ -0,0 +1,91 @@
+"""
+Benchmark compression of large contexts and log messages.
+
+For small and large pipelines, reports the database size and the mean latency of a context
+save and of a full load, without a codec and with each available algorithm.
+
+Usage: python benchmarks/bench_codec.py [pipelines]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import contextlib
+import io
+import tempfile
+import time
+
+from db import codec
+from db.codec import BlobCodec
+from db.manager import DatabaseManager
+from db.models import WorkflowEntity
+
+STEPS = [{"id": f"step-{i}", "instructions": f"Do part {i} for {{ticket_number}}"} for i in range(10)]
+
+SMALL = {
+    "context": {"ticket_number": "T-1", "customer_id": "C-1"},
+    "log_lines": 20,
+    "log_message": "Step completed: step-1",
+}
+
+LARGE = {
+    "context": {
+        "ticket_number": "T-1",
+        "task_details": "As a customer I want the export to include archived invoices. " * 200,
+        "manifest": [{"path": f"dist/module-{i}/bundle.js", "size": 1000 + i, "sha256": f"{i:064x}"} for i in range(1000)],
+    },
+    "log_lines": 500,
+    "log_message": "compiler output: warning: unused variable in module\n" * 40,
+}
+
+def make_config(shape):
+    return {"name": "bench-config", "description": "Benchmark config", "context": shape["context"], "steps": STEPS}
+
+def run(shape, count, blob_codec):
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        manager = DatabaseManager(db_path, codec=blob_codec)
+        config = make_config(shape)
+        ids = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(count):
+                entity = manager.create_workflow_entity(config, name=f"pipeline-{i}")
+                for line in range(shape["log_lines"]):
+                    entity.add_log(shape["log_message"])
+                entity.save()
+                ids.append(entity.id)
+
+        start = time.perf_counter()
+        for entity_id in ids:
+            WorkflowEntity.get_by_id(manager.db, entity_id)
+        load = (time.perf_counter() - start) / count
+
+        save = 0.0
+        for i, entity_id in enumerate(ids):
+            entity = WorkflowEntity.get_by_id(manager.db, entity_id)
+            entity.context["ticket_number"] = f"T-{i}"
+            entity.mark_dirty("context")
+            start = time.perf_counter()
+            entity.save()
+            save += time.perf_counter() - start
+        save /= count
+
+        manager.db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size = os.path.getsize(db_path)
+        manager.close()
+    return size, save, load
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    codecs = [("none", None), ("zlib", BlobCodec(algorithm="zlib"))]
+    if codec.zstandard is not None:
+        codecs.append(("zstd", BlobCodec(algorithm="zstd")))
+
+    print(f"{count} pipelines per run, threshold 1024 bytes")
+    print(f"{'pipeline':>9} {'codec':>6} {'db MB':>8} {'save ms':>9} {'load ms':>9}")
+    for label, shape in (("small", SMALL), ("large", LARGE)):
+        for name, blob_codec in codecs:
+            size, save, load = run(shape, count, blob_codec)
+            print(f"{label:>9} {name:>6} {size / 1e6:>8.2f} {save * 1000:>9.3f} {load * 1000:>9.3f}")
@@ -0,0 +1,109 @@
+"""
+Benchmark loading of large workflow template directories.
+
+Compares the old sequential os.listdir loader with the parallel loader, the cached
+registry and the compiled snapshot at 1k and 10k templates. When run as root on Linux
+the page cache is dropped before the "cold" rows, which is where concurrent reads pay off;
+with a warm page cache parsing is CPU bound and threads only help on free-threaded builds.
+
+Usage: python benchmarks/bench_config_loading.py [count ...]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import tempfile
+import time
+
+from pipelineMGMT.parser import WorkflowParser
+from pipelineMGMT.configRegistry import ConfigRegistry
+from pipelineMGMT.configCompiler import compile_workflow_configs
+
+def generate_templates(directory, count, steps_per_template=8):
+    """Write `count` templates spread over nested team directories."""
+    for i in range(count):
+        team_dir = os.path.join(directory, f"team-{i % 20:02d}")
+        os.makedirs(team_dir, exist_ok=True)
+        config = {
+            "name": f"workflow-{i}",
+            "description": f"Generated workflow number {i}",
+            "context": {"ticket_number": "", "customer_id": "", "owner": ""},
+            "steps": [
+                {
+                    "id": f"step-{j}",
+                    "name": f"Step {j}",
+                    "instructions": f"Do part {j} of the work for ticket {{ticket_number}} and customer {{customer_id}}.",
+                    "completion": "User has to confirm that the step is done."
+                }
+                for j in range(steps_per_template)
+            ]
+        }
+        with open(os.path.join(team_dir, f"workflow-{i}.json"), "w", encoding="utf-8") as f:
+            json.dump(config, f)
+
+def sequential_load(directory):
+    """The previous loader: one file at a time, parse then validate."""
+    configs = []
+    for file_path in WorkflowParser.find_workflow_files(directory):
+        config = WorkflowParser.parse_json_file(file_path)
+        if WorkflowParser.validate_workflow_config(config):
+            configs.append(config)
+    return configs
+
+def drop_page_cache():
+    """Drop the OS page cache so the next run reads from disk. Returns False when not permitted."""
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+def run(count):
+    with tempfile.TemporaryDirectory() as directory:
+        generate_templates(directory, count)
+
+        sequential_time, configs = timed(lambda: sequential_load(directory))
+        assert len(configs) == count
+
+        rows = [("sequential", sequential_time)]
+        for workers in (4, 8, 16):
+            parallel_time, report = timed(lambda: WorkflowParser.load_workflow_configs_report(directory, max_workers=workers))
+            assert len(report.configs) == count
+            rows.append((f"parallel x{workers}", parallel_time))
+
+        if drop_page_cache():
+            drop_page_cache()
+            cold_sequential_time, _ = timed(lambda: sequential_load(directory))
+            rows.append(("sequential (cold cache)", cold_sequential_time))
+            drop_page_cache()
+            cold_parallel_time, _ = timed(lambda: WorkflowParser.load_workflow_configs_report(directory, max_workers=16))
+            rows.append(("parallel x16 (cold cache)", cold_parallel_time))
+
+        registry = ConfigRegistry(directory)
+        cold_time, _ = timed(registry.refresh)
+        warm_time, _ = timed(registry.refresh)
+        rows.append(("registry first refresh", cold_time))
+        rows.append(("registry warm (stat only)", warm_time))
+
+        compile_workflow_configs(directory)
+        compiled_time, _ = timed(ConfigRegistry(directory).refresh)
+        rows.append(("registry from snapshot", compiled_time))
+
+    print(f"\n{count} templates ({os.cpu_count()} CPUs)")
+    for label, seconds in rows:
+        print(f"  {label:<28} {seconds * 1000:9.1f} ms  x{sequential_time / seconds:5.2f}")
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    for count in counts:
+        run(count)
@@ -0,0 +1,68 @@
+"""
+Benchmark concurrent tool calls updating the same pipeline.
+
+Several threads call WorkflowManager.update_workflow on one pipeline, each adding its own context
+keys. Every key should survive: a call that loses the race for a pipeline's version is run again
+on the freshly saved pipeline. Reported per storage backend: calls per second, context keys kept
+out of the keys written, and calls that had to be run again.
+
+Usage: python benchmarks/bench_conflicts.py [threads] [calls per thread]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import threading
+import time
+
+from db.manager import STORAGE_BACKENDS
+from db.models import WorkflowEntity
+from pipelineMGMT.manager import WorkflowManager
+
+CONFIG = {
+    "name": "bench-config",
+    "description": "Benchmark config",
+    "context": {},
+    "steps": [{"id": f"step-{i}", "instructions": f"Do part {i}"} for i in range(5)]
+}
+
+def run(manager, entity_id, threads, calls):
+    loads = [0]
+    original = manager.db_manager.get_workflow_entity
+
+    def counting_get_workflow_entity(identifier):
+        loads[0] += 1
+        return original(identifier)
+
+    manager.db_manager.get_workflow_entity = counting_get_workflow_entity
+
+    def caller(index):
+        for call in range(calls):
+            manager.update_workflow(entity_id, {f"thread-{index}-{call}": call})
+
+    workers = [threading.Thread(target=caller, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, loads[0] - threads * calls
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print(f"{threads} threads x {calls} calls on one pipeline")
+    print(f"{'backend':>8} {'calls/s':>8} {'keys kept':>10} {'re-runs':>8}")
+    for name in STORAGE_BACKENDS:
+        with tempfile.TemporaryDirectory() as directory:
+            manager = WorkflowManager(os.path.join(directory, "bench.db"), storage=name)
+            entity = manager.db_manager.create_workflow_entity(CONFIG, name="pipeline")
+            elapsed, reruns = run(manager, entity.id, threads, calls)
+            kept = len(WorkflowEntity.get_by_id(manager.db_manager.db, entity.id).context)
+            manager.close()
+        print(f"{name:>8} {threads * calls / elapsed:>8.0f} {f'{kept}/{threads * calls}':>10} {reruns:>8}")
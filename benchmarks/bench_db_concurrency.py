@@ -0,0 +1,87 @@
+"""
+Benchmark concurrent reads while a writer is busy.
+
+A writer thread keeps saving step transitions while 1..N reader threads load pipelines by id.
+Reads per second are reported for the WAL reader pool and for the previous setup: rollback
+journal, full fsync and every read waiting for the shared lock held by the writer.
+
+Usage: python benchmarks/bench_db_concurrency.py [pipelines] [seconds]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+import tempfile
+import threading
+import time
+
+from db.manager import DatabaseManager
+from db.database import Database
+from db.models import WorkflowEntity
+
+CONFIG = {
+    "name": "bench-config",
+    "description": "Benchmark config",
+    "context": {"ticket_number": "", "customer_id": ""},
+    "steps": [{"id": f"step-{i}", "instructions": f"Do part {i} for {{ticket_number}}"} for i in range(10)]
+}
+
+def populate(db_path, count):
+    manager = DatabaseManager(db_path)
+    ids = [manager.create_workflow_entity(CONFIG, name=f"pipeline-{i}").id for i in range(count)]
+    manager.close()
+    return ids
+
+def run(db_path, ids, readers, seconds, read_pool):
+    db = Database(db_path, read_pool=read_pool)
+    if not read_pool:
+        db.conn.execute("PRAGMA journal_mode = DELETE")
+        db.conn.execute("PRAGMA synchronous = FULL")
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def writer():
+        rng = random.Random(1)
+        while not stop.is_set():
+            entity = WorkflowEntity.get_by_id(db, rng.choice(ids))
+            entity.update_context({"customer_id": str(rng.random())})
+            entity.start_step(f"step-{rng.randrange(10)}")
+            writes[0] += 1
+
+    def reader(index):
+        rng = random.Random(index + 2)
+        while not stop.is_set():
+            WorkflowEntity.get_by_id(db, rng.choice(ids))
+            reads[index] += 1
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+
+    return sum(reads) / seconds, writes[0] / seconds
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        ids = populate(db_path, count)
+
+        print(f"{count} pipelines, {seconds:.0f}s per run, {os.cpu_count()} CPUs, one busy writer")
+        print(f"{'readers':>8} {'locked reads/s':>15} {'pooled reads/s':>15} {'locked writes/s':>16} {'pooled writes/s':>16}")
+        for readers in (1, 2, 4, 8):
+            locked_reads, locked_writes = run(db_path, ids, readers, seconds, read_pool=False)
+            Database(db_path).close()  # switch the file back to WAL
+            pooled_reads, pooled_writes = run(db_path, ids, readers, seconds, read_pool=True)
+            print(f"{readers:>8} {locked_reads:>15.0f} {pooled_reads:>15.0f} {locked_writes:>16.0f} {pooled_writes:>16.0f}")
@@ -0,0 +1,67 @@
+"""
+Benchmark listing pipelines.
+
+Compares loading full entities (context, steps and logs) with reading the stored summary
+columns only. Reports wall time and peak traced memory for each.
+
+Usage: python benchmarks/bench_listing.py [pipelines]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import contextlib
+import io
+import tempfile
+import time
+import tracemalloc
+
+from db.manager import DatabaseManager
+from db.models import WorkflowEntity
+
+CONFIG = {
+    "name": "bench-config",
+    "description": "Benchmark config",
+    "context": {"ticket_number": "T-1", "customer_id": "C-1"},
+    "steps": [{"id": f"step-{i}", "instructions": f"Do part {i} for {{ticket_number}}"} for i in range(10)]
+}
+
+def populate(manager, count, batch_size=1000):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset in range(0, count, batch_size):
+            with manager.db.unit_of_work():
+                for i in range(offset, min(offset + batch_size, count)):
+                    entity = manager.create_workflow_entity(CONFIG, name=f"pipeline-{i}")
+                    entity.start_step(f"step-{i % 10}")
+
+def measure(function):
+    # Timed without tracing, which slows allocations down
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    rows = len(function())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = DatabaseManager(os.path.join(directory, "bench.db"))
+        populate(manager, count)
+
+        print(f"{count} pipelines with 10 steps")
+        print(f"{'listing':>10} {'rows':>8} {'ms':>10} {'peak MB':>10}")
+        for label, function in (
+            ("summaries", lambda: WorkflowEntity.list_summaries(manager.db)),
+            ("entities", lambda: WorkflowEntity.list_all(manager.db)),
+        ):
+            rows, elapsed, peak = measure(function)
+            print(f"{label:>10} {rows:>8} {elapsed * 1000:>10.1f} {peak / 1e6:>10.1f}")
+        manager.close()
@@ -0,0 +1,56 @@
+"""
+Benchmark automated step tool calls with a new MCP session per call against the client pool.
+
+Calls the echo tool of the stub MCP server used by the tests, started over stdio: once opening a
+session (and starting the server) for every call, as a client without a pool would, and once
+through MCPClientPool, which keeps the session alive and runs calls on it concurrently.
+
+Usage: python benchmarks/bench_mcp_clients.py [calls] [calls per server]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from pipelineMGMT.mcpClientPool import MCPClientPool, DEFAULT_CALLS_PER_SERVER
+
+STUB_SERVER = {"command": sys.executable, "args": [os.path.join(os.path.dirname(__file__), '..', 'tests', 'mcpStubServer.py')]}
+
+async def session_per_call(calls):
+    parameters = StdioServerParameters(command=STUB_SERVER["command"], args=STUB_SERVER["args"])
+    for index in range(calls):
+        async with stdio_client(parameters) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await session.call_tool("echo", {"text": str(index)})
+
+def pooled(calls, calls_per_server):
+    with MCPClientPool(max_calls_per_server=calls_per_server) as pool:
+        futures = [pool.submit(STUB_SERVER, "echo", {"text": str(index)}) for index in range(calls)]
+        for future in futures:
+            future.result()
+        return pool.get_stats()["sessions_opened"]
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    calls_per_server = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CALLS_PER_SERVER
+
+    print(f"{calls} echo calls, {calls_per_server} calls per server at once")
+    print(f"{'clients':>16} {'total s':>8} {'ms/call':>8} {'sessions':>9}")
+    # A new server process per call is slow: measure a tenth of the calls
+    sample = max(1, calls // 10)
+    start = time.perf_counter()
+    asyncio.run(session_per_call(sample))
+    elapsed = (time.perf_counter() - start) * calls / sample
+    print(f"{'session per call':>16} {elapsed:>8.2f} {elapsed / calls * 1000:>8.2f} {calls:>9}")
+
+    start = time.perf_counter()
+    sessions = pooled(calls, calls_per_server)
+    elapsed = time.perf_counter() - start
+    print(f"{'pool':>16} {elapsed:>8.2f} {elapsed / calls * 1000:>8.2f} {sessions:>9}")
@@ -0,0 +1,78 @@
+"""
+Benchmark the memory held by loaded pipelines, as kept by the entity cache or a listing.
+
+Each pipeline is built from rows the way the database loads it: 20 finished steps, two logs per
+step and a small context. Memory is measured with tracemalloc.
+
+Usage: python benchmarks/bench_memory.py [pipeline counts, comma-separated] [steps]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gc
+import time
+import tracemalloc
+
+from db.serializer import dumps
+from db.models import WorkflowEntity
+
+def timestamp(n, second):
+    return f"2025-01-{n % 28 + 1:02d}T{second // 3600 % 24:02d}:{second // 60 % 60:02d}:{second % 60:02d}.{n % 1000000:06d}"
+
+def make_rows(n, step_count):
+    created_at = timestamp(n, 0)
+    updated_at = timestamp(n, 2 * step_count)
+    row = {
+        "id": f"{n:08d}-0000-4000-8000-000000000000", "name": f"pipeline-{n}", "config_name": "release",
+        "description": f"Release pipeline {n}", "status": "completed", "created_at": created_at,
+        "updated_at": updated_at, "context": dumps({"ticket_number": f"T-{n}", "branch": "main"}),
+        "is_cancelled": 0, "cancelled_at": None, "current_step": None, "steps_total": step_count,
+        "steps_completed": step_count, "last_activity_at": updated_at, "version": 1
+    }
+    steps_rows = []
+    log_rows = []
+    for i in range(step_count):
+        started_at, completed_at = timestamp(n, 2 * i), timestamp(n, 2 * i + 1)
+        steps_rows.append({
+            "name": f"step-{i}", "instructions": f"Run the checks of part {i} and report the result",
+            "mcp_server_config": None, "status": "completed", "result": "ok", "error": None,
+            "started_at": started_at, "completed_at": completed_at, "depends_on": None
+        })
+        log_rows.append({"timestamp": started_at, "level": "INFO", "message": f"Step started: step-{i}"})
+        log_rows.append({"timestamp": completed_at, "level": "INFO", "message": f"Step completed: step-{i}"})
+    return row, steps_rows, log_rows
+
+def load_pipelines(count, step_count):
+    entities = []
+    for n in range(count):
+        row, steps_rows, log_rows = make_rows(n, step_count)
+        entity = WorkflowEntity.from_row(None, row, steps_rows, log_rows)
+        entity.context  # decoded, as after the first read
+        entities.append(entity)
+    return entities
+
+def measure(count, step_count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    entities = load_pipelines(count, step_count)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del entities
+    return held / count, elapsed
+
+if __name__ == "__main__":
+    counts = [int(count) for count in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000").split(",")]
+    step_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"{step_count} steps and {2 * step_count} logs per pipeline")
+    print(f"{'pipelines':>10} {'bytes/pipeline':>15} {'total MB':>10} {'load s':>8}")
+    for count in counts:
+        per_pipeline, elapsed = measure(count, step_count)
+        print(f"{count:>10} {per_pipeline:>15.0f} {per_pipeline * count / 1e6:>10.1f} {elapsed:>8.2f}")
@@ -0,0 +1,66 @@
+"""
+Benchmark encoding and decoding pipelines with each installed serializer backend.
+
+Encoding covers what a save and an MCP response do: the context JSON, the workflow_steps rows
+and to_dict(). Decoding builds the entity from its rows.
+
+Usage: python benchmarks/bench_serialization.py [steps] [iterations]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+from db import serializer
+from db.models import WorkflowEntity
+from db.workflowStep import WorkflowStep, StepStatus, STEP_COLUMNS
+
+def make_entity(step_count):
+    steps = [
+        WorkflowStep(
+            name=f"step-{i}",
+            instructions=f"Run the checks of part {i} for {{ticket_number}} and report the result",
+            mcp_server_config={"server": "ci", "tool": "run", "args": {"part": i, "flags": ["--fast", "--json"]}},
+            status=StepStatus.COMPLETED if i % 2 else StepStatus.PENDING,
+            result="ok" if i % 2 else None,
+            started_at="2025-01-01T00:00:00"
+        )
+        for i in range(step_count)
+    ]
+    context = {"ticket_number": "T-1", "manifest": [{"path": f"dist/{i}.js", "size": i} for i in range(200)]}
+    return WorkflowEntity(db=None, name="bench", config_name="bench", description="bench", context=context, steps=steps)
+
+def encode(entity):
+    context = serializer.dumps(entity.context)
+    rows = [entity._step_row(step, position) for position, step in enumerate(entity.steps)]
+    return context, rows, entity.to_dict()
+
+def decode(context, rows):
+    steps = [WorkflowStep.from_row(dict(zip(STEP_COLUMNS, row[2:]))) for row in rows]
+    return serializer.loads(context), steps
+
+def measure(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations
+
+if __name__ == "__main__":
+    step_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    entity = make_entity(step_count)
+
+    print(f"{step_count} steps, {iterations} iterations")
+    print(f"{'backend':>8} {'encode ms':>10} {'decode ms':>10}")
+    for name, (available, _) in serializer.BACKENDS.items():
+        if not available():
+            print(f"{name:>8} {'not installed':>21}")
+            continue
+        serializer.use_serializer(name)
+        context, rows, _ = encode(entity)
+        encode_time = measure(lambda: encode(entity), iterations)
+        decode_time = measure(lambda: decode(context, rows), iterations)
+        print(f"{name:>8} {encode_time * 1000:>10.3f} {decode_time * 1000:>10.3f}")
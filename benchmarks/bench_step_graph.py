@@ -0,0 +1,60 @@
+"""
+Benchmark finding the ready steps of a pipeline as its steps complete.
+
+Builds a pipeline of layered steps, each depending on a few steps of the layer before, and
+completes them in order: once rebuilding the dependency counts from all the steps after every
+completion, as a rescan would, and once with the counts the entity updates incrementally.
+
+Usage: python benchmarks/bench_step_graph.py [steps] [steps per layer]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+from db.models import WorkflowEntity
+from db.stepGraph import StepSchedule, step_dependencies, topological_order
+from db.workflowStep import StepStatus, WorkflowStep
+
+def layered_steps(count, width):
+    steps = []
+    for index in range(count):
+        layer_start = (index // width - 1) * width
+        depends_on = [f"step-{layer_start + offset}" for offset in (0, width // 2, width - 1)] if layer_start >= 0 else []
+        steps.append({"id": f"step-{index}", "instructions": f"Do part {index}", "depends_on": depends_on})
+    return steps
+
+def new_entity(step_configs):
+    dependencies = step_dependencies(step_configs)
+    by_id = {step["id"]: step for step in step_configs}
+    steps = [WorkflowStep.from_config(by_id[step_id], dependencies[step_id]) for step_id in topological_order(dependencies)]
+    return WorkflowEntity(db=None, name="bench", config_name="bench", steps=steps)
+
+def run(entity, rescan):
+    """Complete every step, starting the ready ones after each completion. Returns the elapsed time."""
+    start = time.perf_counter()
+    for step in entity.get_ready_steps():
+        step.status = StepStatus.RUNNING
+    for step in entity.steps:
+        entity._step_status_changing(step, StepStatus.COMPLETED)
+        step.status = StepStatus.COMPLETED
+        if rescan:
+            entity._schedule = StepSchedule(entity.steps)
+        for ready in entity.get_ready_steps():
+            entity._step_status_changing(ready, StepStatus.RUNNING)
+            ready.status = StepStatus.RUNNING
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    step_configs = layered_steps(count, width)
+    print(f"{count} steps, {width} per layer")
+    print(f"{'ready steps':>12} {'total ms':>9} {'us/step':>8}")
+    for name, rescan in (("rescan", True), ("incremental", False)):
+        elapsed = run(new_entity(step_configs), rescan)
+        print(f"{name:>12} {elapsed * 1000:>9.1f} {elapsed / count * 1e6:>8.1f}")
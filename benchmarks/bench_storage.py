@@ -0,0 +1,85 @@
+"""
+Benchmark the storage backends: SQLite, in-memory and sharded SQLite.
+
+For each backend: creating pipelines, saving step transitions from several writer threads at
+once, loading pipelines by ID and reading a page of summaries.
+
+Usage: python benchmarks/bench_storage.py [pipelines] [writer threads] [seconds] [shards]
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+import tempfile
+import threading
+import time
+
+from db.manager import STORAGE_BACKENDS, open_storage
+from db.models import WorkflowEntity
+from db.workflowStep import WorkflowStep
+
+STEPS = [{"id": f"step-{i}", "instructions": f"Do part {i} for {{ticket_number}}"} for i in range(10)]
+
+def create(db, count):
+    ids = []
+    for i in range(count):
+        entity = WorkflowEntity(
+            db=db, name=f"pipeline-{i}", config_name="bench-config", description=f"Benchmark pipeline {i}",
+            context={"ticket_number": f"T-{i}"}, steps=[WorkflowStep.from_config(step) for step in STEPS]
+        )
+        entity.add_log("created").save()
+        ids.append(entity.id)
+    return ids
+
+def concurrent_writes(db, ids, writers, seconds):
+    stop = threading.Event()
+    writes = [0] * writers
+
+    def writer(index):
+        rng = random.Random(index)
+        # Each writer owns a slice of the pipelines, as separate MCP requests would
+        owned = ids[index::writers]
+        while not stop.is_set():
+            entity = WorkflowEntity.get_by_id(db, rng.choice(owned))
+            entity.start_step(f"step-{rng.randrange(len(STEPS))}")
+            writes[index] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(writes) / seconds
+
+def measure(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 2.0
+    shards = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+
+    print(f"{count} pipelines, {writers} writer threads for {seconds:.0f} s, {shards} shards")
+    print(f"{'backend':>8} {'create ms':>10} {'writes/s':>10} {'get ms':>8} {'page ms':>8}")
+    for name in STORAGE_BACKENDS:
+        with tempfile.TemporaryDirectory() as directory:
+            db = open_storage(os.path.join(directory, "bench.db"), name, shards)
+            start = time.perf_counter()
+            ids = create(db, count)
+            create_time = (time.perf_counter() - start) / count
+
+            write_rate = concurrent_writes(db, ids, writers, seconds)
+            rng = random.Random(0)
+            get_time = measure(lambda: WorkflowEntity.get_by_id(db, rng.choice(ids)), 2000)
+            page_time = measure(lambda: list(WorkflowEntity.summary_page(db, limit=50)), 200)
+            db.close()
+        print(f"{name:>8} {create_time * 1000:>10.3f} {write_rate:>10.0f} {get_time * 1000:>8.3f} {page_time * 1000:>8.3f}")
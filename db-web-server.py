@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-import sqlite3
-from typing import List, Dict
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from db.database import Database
+from db.codec import decode as decode_blob
+from db.serializer import dumps
+from db.models import parse_status_filter
+from db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KeysetPage, page_query
 
 app = FastAPI()
 
@@ -15,28 +20,68 @@ app.add_middleware(
 )
 
 DB_PATH = "workflows.db"
+db = Database(DB_PATH)
 
-@app.get("/workflows", response_model=List[Dict])
-def get_workflows():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, description, context, steps, created_at, updated_at, status FROM workflow_entities")
-    # cursor.execute("SELECT * FROM workflow_entities")
-    rows = cursor.fetchall()
-
-    conn.close()
-    
-    workflows = [
-        {
-            "name": row[1],
-            "description": row[2], 
-            "context": row[3], 
-            "steps": row[4], 
-            "creation_date": row[5], 
-            "update_date": row[6], 
-            "status": row[7]
-         } for row in rows
-    ]
-    return workflows
+WORKFLOWS_SELECT_SQL = """
+    SELECT e.id, e.name, e.description, e.context,
+        (
+            SELECT json_group_array(json_object(
+                'name', s.name,
+                'instructions', s.instructions,
+                'mcp_server_config', json(s.mcp_server_config),
+                'status', s.status,
+                'result', s.result,
+                'error', s.error,
+                'started_at', s.started_at,
+                'completed_at', s.completed_at,
+                'depends_on', json(s.depends_on)
+            ))
+            FROM (SELECT * FROM workflow_steps WHERE entity_id = e.id ORDER BY position) s
+        ) AS steps,
+        e.created_at, e.updated_at, e.status
+    FROM workflow_entities e"""
+
+def stream_workflows(query, params, limit):
+    """Write the page as JSON while rows are read from the database cursor."""
+    with db.snapshot() as conn:
+        rows = conn.execute(query, params)
+        page = KeysetPage(rows, limit, key=lambda row: (row[6], row[0]))
+        yield '{"items": ['
+        for index, row in enumerate(page):
+            workflow = {
+                "id": row[0],
+                "name": row[1],
+                "description": row[2],
+                "context": decode_blob(row[3]),
+                "steps": row[4],
+                "creation_date": row[5],
+                "update_date": row[6],
+                "status": row[7]
+            }
+            yield ("," if index else "") + dumps(workflow)
+        yield '], "next_cursor": ' + dumps(page.next_cursor) + '}'
+
+@app.get("/workflows")
+def get_workflows(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: str = "all",
+    config_name: Optional[str] = None,
+    updated_after: Optional[str] = None,
+    updated_before: Optional[str] = None
+):
+    """List one page of workflows, most recently updated first. Pass next_cursor back as cursor for the next page."""
+    filters = {"config_name": config_name, "updated_after": updated_after, "updated_before": updated_before}
+    filters = {key: value for key, value in filters.items() if value}
+    try:
+        statuses = parse_status_filter(status)
+        if statuses is not None:
+            filters["status"] = statuses
+        where, params = db.filter_conditions(filters)
+        query, params = page_query(WORKFLOWS_SELECT_SQL, where, params, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(stream_workflows(query, params, limit), media_type="application/json")
 
 # To run: uvicorn db-web-server:app --reload --port 8000
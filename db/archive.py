@@ -0,0 +1,251 @@
+"""
+Retention and archival of finished pipelines.
+
+Completed and cancelled pipelines that haven't been updated for a number of days are moved from
+the workflow database into a separate archive database. Each archived pipeline is one row with a
+few lookup columns and a compressed JSON payload (see db.codec) holding its context, steps and logs.
+
+Usage: python -m db.archive --days 30 [--db workflows.db] [--archive workflows.archive.db]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from db.database import Database
+from db.codec import BlobCodec, decode as decode_blob
+from db.serializer import dumps, loads
+from db.models import AmbiguousIdentifierError, WorkflowEntity, WorkflowStatus, AMBIGUOUS_MATCH_LIMIT
+from db.workflowStep import WorkflowStep, StepStatus
+
+# Archived payloads are always compressed
+PAYLOAD_CODEC = BlobCodec(threshold=0)
+
+# Statuses of pipelines that can be archived
+FINISHED_STATUSES = (WorkflowStatus.COMPLETED, WorkflowStatus.CANCELLED)
+
+ARCHIVE_TABLE_SQL = '''
+        CREATE TABLE IF NOT EXISTS archived_pipelines (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            config_name TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            archived_at TEXT NOT NULL,
+            payload BLOB NOT NULL
+        )
+        '''
+
+def utc_now():
+    """The current UTC time, naive like the timestamps stored with pipelines."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def default_archive_path(db_path):
+    """Archive database next to a workflow database, or None for an in-memory database."""
+    if db_path == ":memory:":
+        return None
+    base, _ = os.path.splitext(db_path)
+    return base + ".archive.db"
+
+def encode_payload(entity):
+    """Compress the context, steps and logs of an entity."""
+    record = {
+        "context": entity.context,
+        "steps": [step.to_dict() for step in entity.steps],
+        "logs": list(entity.logs),
+        "is_cancelled": entity.is_cancelled,
+        "cancelled_at": entity.cancelled_at
+    }
+    return PAYLOAD_CODEC.encode(dumps(record))
+
+def decode_payload(payload):
+    """Decompress an archived payload."""
+    return loads(decode_blob(payload))
+
+class PipelineArchive:
+    """Archive database of finished pipelines."""
+
+    def __init__(self, path):
+        """Initialize the archive, creating the database file if needed."""
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+        with self.conn:
+            self.conn.execute(ARCHIVE_TABLE_SQL)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_archived_pipelines_name ON archived_pipelines (name, updated_at)")
+
+    def store(self, entities):
+        """Write entities to the archive in one transaction. Archiving an entity again replaces it."""
+        archived_at = utc_now().isoformat()
+        rows = [
+            (
+                entity.id, entity.name, entity.config_name, entity.description, entity.status.value,
+                entity.created_at, entity.updated_at, archived_at, encode_payload(entity)
+            )
+            for entity in entities
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany('''
+            INSERT OR REPLACE INTO archived_pipelines (
+                id, name, config_name, description, status, created_at, updated_at, archived_at, payload
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+    def remove(self, ids):
+        """Delete pipelines from the archive by ID."""
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM archived_pipelines WHERE id = ?", [(entity_id,) for entity_id in ids])
+
+    def find(self, db, identifier):
+        """Get an archived pipeline by ID, name, or part of its description, as a read-only entity.
+
+        Raises AmbiguousIdentifierError if the identifier only matches descriptions and more than one of them.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM archived_pipelines WHERE id = ?", (identifier,)).fetchone()
+            if row is None:
+                # Pipelines with the same name replace each other, so the latest one is meant
+                row = self.conn.execute(
+                    "SELECT * FROM archived_pipelines WHERE name = ? ORDER BY updated_at DESC LIMIT 1", (identifier,)
+                ).fetchone()
+            if row is None:
+                rows = self.conn.execute(
+                    f"SELECT * FROM archived_pipelines WHERE description LIKE ? ORDER BY name LIMIT {AMBIGUOUS_MATCH_LIMIT}",
+                    (f"%{identifier}%",)
+                ).fetchall()
+                if len(rows) > 1:
+                    raise AmbiguousIdentifierError(identifier, [row["name"] for row in rows])
+                row = rows[0] if rows else None
+        return self._entity_from_row(db, row) if row else None
+
+    def count(self):
+        """Number of archived pipelines."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM archived_pipelines").fetchone()[0]
+
+    @staticmethod
+    def _entity_from_row(db, row):
+        """Rebuild a read-only workflow entity from an archive row."""
+        record = decode_payload(row["payload"])
+        steps = [
+            WorkflowStep(**{**step, "status": StepStatus(step["status"])})
+            for step in record["steps"]
+        ]
+        completed = sum(1 for step in steps if step.status == StepStatus.COMPLETED)
+        entity = WorkflowEntity(
+            db=db,
+            id=row["id"],
+            name=row["name"],
+            config_name=row["config_name"],
+            description=row["description"],
+            status=WorkflowStatus(row["status"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            context=record["context"],
+            steps=steps,
+            is_cancelled=record["is_cancelled"],
+            cancelled_at=record["cancelled_at"],
+            logs=record["logs"],
+            steps_total=len(steps),
+            steps_completed=completed,
+            last_activity_at=row["updated_at"]
+        )
+        entity.archived = True
+        return entity
+
+    def close(self):
+        """Close the archive database."""
+        self.conn.close()
+
+def archive_finished_pipelines(db, archive, older_than_days, batch_size=500, now=None):
+    """Move finished pipelines not updated for `older_than_days` days from the database to the archive.
+
+    Each batch is written to the archive before it is deleted from the database, so an interrupted
+    run leaves pipelines in both places at worst and the next run completes it.
+    Returns the IDs of the archived pipelines.
+    """
+    cutoff = ((now or utc_now()) - timedelta(days=older_than_days)).isoformat()
+    archived = []
+
+    while True:
+        with db.reading():
+            rows = db.select_rows(
+                {"status": FINISHED_STATUSES, "updated_before": cutoff}, order_by="updated_at", limit=batch_size
+            )
+            entities = WorkflowEntity._load_rows(db, rows, eager=True)
+        if not entities:
+            break
+
+        archive.store(entities)
+        # Pipelines changed since they were read stay in the database only
+        deleted = db.delete_entities([(entity.id, entity.updated_at) for entity in entities])
+        archived.extend(deleted)
+        if len(deleted) < len(entities):
+            deleted = set(deleted)
+            archive.remove([entity.id for entity in entities if entity.id not in deleted])
+
+        if len(entities) < batch_size:
+            break
+
+    return archived
+
+class ArchiveJob(threading.Thread):
+    """Archives finished pipelines periodically in the background."""
+
+    def __init__(self, db_manager, older_than_days, interval=3600.0):
+        """Initialize the job for a database manager with an archive."""
+        super().__init__(name="pipeline-archiver", daemon=True)
+        self.db_manager = db_manager
+        self.older_than_days = older_than_days
+        self.interval = interval
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def stop(self, timeout=None):
+        """Stop the job and wait for the thread to exit."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        """Archive finished pipelines every interval until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                self.db_manager.archive_finished_pipelines(self.older_than_days)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._stop_event.wait(self.interval)
+
+def main(argv=None):
+    """Command line entry point."""
+    arg_parser = argparse.ArgumentParser(description="Move finished pipelines older than a number of days into the archive database.")
+    arg_parser.add_argument("--days", type=float, required=True, help="Archive completed and cancelled pipelines not updated for this many days")
+    arg_parser.add_argument("--db", default="workflows.db", help="Workflow database (default: workflows.db)")
+    arg_parser.add_argument("--archive", help="Archive database (default: <db name>.archive.db)")
+    arg_parser.add_argument("--batch-size", type=int, default=500, help="Pipelines moved per transaction")
+    args = arg_parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Workflow database not found: {args.db}", file=sys.stderr)
+        return 2
+
+    archive_path = args.archive or default_archive_path(args.db)
+    db = Database(args.db)
+    archive = PipelineArchive(archive_path)
+    try:
+        archived = archive_finished_pipelines(db, archive, args.days, args.batch_size)
+    finally:
+        archive.close()
+        db.close()
+    print(f"Archived {len(archived)} pipelines into {archive_path}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Compression of large text columns.
+
+Values below the threshold are stored as plain TEXT, exactly as before. Larger values are stored as
+a BLOB whose first byte names the format, so rows written with or without compression, and with
+either algorithm, can always be read back.
+"""
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is used without it
+    zstandard = None
+
+# Header bytes of stored BLOBs
+RAW = 0
+ZLIB = 1
+ZSTD = 2
+
+# zstd decompressors are reused, one per thread
+_local = threading.local()
+
+class BlobCodec:
+    """Compresses text values above a size threshold."""
+
+    def __init__(self, threshold=1024, algorithm=None, level=None):
+        """Initialize the codec. The algorithm is "zstd" or "zlib"; by default zstd is used when installed."""
+        if algorithm is None:
+            algorithm = "zstd" if zstandard is not None else "zlib"
+        if algorithm not in ("zlib", "zstd"):
+            raise ValueError(f"Unknown compression algorithm '{algorithm}'")
+        if algorithm == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+
+        self.threshold = threshold
+        self.algorithm = algorithm
+        self.level = level or (3 if algorithm == "zstd" else 6)
+        self._header = bytes([ZSTD if algorithm == "zstd" else ZLIB])
+        # zstd compressors can't be shared between threads
+        self._local = threading.local()
+
+    def encode(self, text):
+        """Get the stored value of a text: the text itself if small, otherwise a compressed BLOB."""
+        if text is None:
+            return None
+        data = text.encode("utf-8")
+        if len(data) < self.threshold:
+            return text
+
+        if self.algorithm == "zstd":
+            compressor = getattr(self._local, "compressor", None)
+            if compressor is None:
+                compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+            compressed = compressor.compress(data)
+        else:
+            compressed = zlib.compress(data, self.level)
+        # Incompressible data is kept as text
+        if len(compressed) + 1 >= len(data):
+            return text
+        return self._header + compressed
+
+def decode(value):
+    """Get the text of a stored value written with or without a codec."""
+    if value is None or isinstance(value, str):
+        return value
+
+    header, payload = value[0], bytes(value[1:])
+    if header == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if header == ZSTD:
+        if zstandard is None:
+            raise ValueError("Stored value is zstd-compressed but the zstandard package is not installed")
+        decompressor = getattr(_local, "zstd", None)
+        if decompressor is None:
+            decompressor = _local.zstd = zstandard.ZstdDecompressor()
+        return decompressor.decompress(payload).decode("utf-8")
+    if header == RAW:
+        return payload.decode("utf-8")
+    raise ValueError(f"Unknown stored value format {header}")
+
+def encode(codec, text):
+    """Encode a text with a codec, or store it as is when there is no codec."""
+    return codec.encode(text) if codec is not None else text
@@ -1,25 +1,129 @@
 """
-Database class.
+Database class: the SQLite storage backend.
 """
 import sqlite3
 # import json
 # import uuid
 # from datetime import datetime
 import os
+import pathlib
 import threading
+from contextlib import contextmanager
+from db.migrations import ENTITY_COLUMNS, migrate_to_normalized_layout, migrate_summary_columns, migrate_version_column, migrate_step_dependencies_column
+from db.pagination import page_query
+from db.storage import StorageBackend, ConcurrentUpdateError, check_new_names, DATE_FILTERS, FILTER_COLUMNS, stored_value
 # from enum import Enum
 # from dataclasses import dataclass
 # from typing import Dict, Any, Optional, List
 # from db.workflowStep import WorkflowStep, StepType, StepStatus
 
-class Database:
-    """SQLite database manager for workflow entities."""
+ENTITIES_TABLE_SQL = '''
+        CREATE TABLE IF NOT EXISTS workflow_entities (
+            id TEXT PRIMARY KEY,
+            name TEXT UNIQUE,
+            config_name TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL DEFAULT 'created',
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            context TEXT NOT NULL,
+            is_cancelled INTEGER NOT NULL DEFAULT 0,
+            cancelled_at TEXT,
+            current_step TEXT,
+            steps_total INTEGER NOT NULL DEFAULT 0,
+            steps_completed INTEGER NOT NULL DEFAULT 0,
+            last_activity_at TEXT,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        '''
+
+# Lookups by name are served by the index of the UNIQUE constraint
+ENTITY_INDEXES_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_workflow_entities_config_name ON workflow_entities (config_name, is_cancelled)",
+    "DROP INDEX IF EXISTS idx_workflow_entities_status",
+    "CREATE INDEX IF NOT EXISTS idx_workflow_entities_status_updated_at ON workflow_entities (status, updated_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_workflow_entities_updated_at ON workflow_entities (updated_at, id)",
+]
 
-    def __init__(self, db_path="workflows.db"):
-        """Initialize the database connection."""
+# Full-text index over name and description. The trigram tokenizer matches any substring of three
+# or more characters, the same rows as LIKE '%x%' without scanning the table.
+SEARCH_TABLE_SQL = '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS workflow_entities_fts USING fts5(
+            name, description, content='workflow_entities', content_rowid='rowid', tokenize='trigram'
+        )
+        '''
+
+SEARCH_TRIGGERS_SQL = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS workflow_entities_fts_insert AFTER INSERT ON workflow_entities BEGIN
+        INSERT INTO workflow_entities_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS workflow_entities_fts_delete AFTER DELETE ON workflow_entities BEGIN
+        INSERT INTO workflow_entities_fts (workflow_entities_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS workflow_entities_fts_update AFTER UPDATE OF name, description ON workflow_entities BEGIN
+        INSERT INTO workflow_entities_fts (workflow_entities_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO workflow_entities_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END
+    ''',
+]
+
+# Shortest text the trigram index can match; shorter searches fall back to LIKE
+MIN_SEARCH_LENGTH = 3
+
+STEP_UPSERT_SQL = '''
+INSERT INTO workflow_steps (
+    entity_id, position, name, instructions, mcp_server_config, status,
+    result, error, started_at, completed_at, depends_on
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (entity_id, name) DO UPDATE SET
+    position = excluded.position,
+    instructions = excluded.instructions,
+    mcp_server_config = excluded.mcp_server_config,
+    status = excluded.status,
+    result = excluded.result,
+    error = excluded.error,
+    started_at = excluded.started_at,
+    completed_at = excluded.completed_at,
+    depends_on = excluded.depends_on
+'''
+
+# Entity IDs per query when loading steps and logs, below SQLite's bound parameter limit
+LOAD_BATCH_SIZE = 500
+
+# Applied to every connection. NORMAL synchronous is durable in WAL mode except on power loss.
+CONNECTION_PRAGMAS = [
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+]
+
+class Database(StorageBackend):
+    """SQLite database manager for workflow entities.
+
+    Writes go through a single writer connection (`conn`) guarded by `lock`. In WAL mode reads use
+    per-thread read-only connections from `reading()`, so they don't wait for the writer.
+    """
+
+    def __init__(self, db_path="workflows.db", read_pool=True, codec=None):
+        """Initialize the database connection. Large context and log values are compressed with `codec` if given."""
+        super().__init__(codec)
         self.db_path = db_path
+        self.read_pool = read_pool
         self.conn = None
         self.cursor = None
+        self.wal_enabled = False
+        self.search_enabled = False
+        self._readers = []
+        self._readers_lock = threading.Lock()
         self.initialize()
 
     def initialize(self):
@@ -31,6 +135,12 @@ class Database:
 
         # Connect to the database with check_same_thread=False to allow usage across threads
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL lets readers run concurrently with the writer; in-memory databases don't support it
+        if self.db_path != ":memory:":
+            journal_mode = self.conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            self.wal_enabled = journal_mode.lower() == "wal"
+        for pragma in CONNECTION_PRAGMAS:
+            self.conn.execute(pragma)
         # Enable foreign keys
         self.conn.execute("PRAGMA foreign_keys = ON")
         # Use Row as row factory to get dict-like rows
@@ -40,27 +150,410 @@ class Database:
         self.lock = threading.RLock()
 
         # Create workflow_entities table
+        self.cursor.execute(ENTITIES_TABLE_SQL)
+
+        # Steps and logs are stored per row so step transitions and new logs don't rewrite the entity
         self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS workflow_entities (
-            id TEXT PRIMARY KEY,
-            name TEXT UNIQUE,
+        CREATE TABLE IF NOT EXISTS workflow_steps (
+            entity_id TEXT NOT NULL REFERENCES workflow_entities(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
             name TEXT NOT NULL,
-            description TEXT,
-            status TEXT NOT NULL DEFAULT 'PENDING',
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            context TEXT NOT NULL,
-            steps TEXT NOT NULL,
-            is_cancelled INTEGER NOT NULL DEFAULT 0,
-            cancelled_at TEXT,
-            logs TEXT NOT NULL
+            instructions TEXT,
+            mcp_server_config TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            result TEXT,
+            error TEXT,
+            started_at TEXT,
+            completed_at TEXT,
+            depends_on TEXT,
+            PRIMARY KEY (entity_id, name)
+        )
+        ''')
+
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS workflow_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_id TEXT NOT NULL REFERENCES workflow_entities(id) ON DELETE CASCADE,
+            timestamp TEXT NOT NULL,
+            level TEXT NOT NULL,
+            message TEXT NOT NULL
         )
         ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_logs_entity ON workflow_logs (entity_id, id)")
+
+        self.conn.commit()
+
+        # Databases created before the steps/logs tables keep them as JSON columns on workflow_entities
+        migrate_to_normalized_layout(self.conn, ENTITIES_TABLE_SQL)
+        migrate_summary_columns(self.conn)
+        migrate_version_column(self.conn)
+        migrate_step_dependencies_column(self.conn)
+
+        # Created after the migration, which rebuilds workflow_entities
+        for statement in ENTITY_INDEXES_SQL:
+            self.cursor.execute(statement)
+        self.search_enabled = self._create_search_index()
+        self.conn.commit()
+
+    def _create_search_index(self):
+        """Create the full-text index and its sync triggers. Returns False if SQLite lacks FTS5 trigrams."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'workflow_entities_fts'"
+        ).fetchone() is not None
+        try:
+            self.cursor.execute(SEARCH_TABLE_SQL)
+        except sqlite3.OperationalError:
+            return False
+
+        for statement in SEARCH_TRIGGERS_SQL:
+            self.cursor.execute(statement)
+        if not exists:
+            # Index the rows written before the table existed
+            self.rebuild_search_index()
+        return True
 
+    def rebuild_search_index(self):
+        """Rebuild the full-text index from workflow_entities, e.g. after a VACUUM renumbered the rows."""
+        self.conn.execute("INSERT INTO workflow_entities_fts (workflow_entities_fts) VALUES ('rebuild')")
+
+    def search_condition(self, column, text):
+        """Get a WHERE condition and its parameters matching entities whose column contains the text."""
+        if self.search_enabled and len(text) >= MIN_SEARCH_LENGTH:
+            phrase = '"' + text.replace('"', '""') + '"'
+            return (
+                "rowid IN (SELECT rowid FROM workflow_entities_fts WHERE workflow_entities_fts MATCH ?)",
+                [f"{column} : {phrase}"]
+            )
+        return f"{column} LIKE ?", [f"%{text}%"]
+
+    def commit(self):
+        """Commit the writer connection. Must be called with the lock held."""
         self.conn.commit()
+        self.commit_count += 1
+
+    # ================== Reader connections ==================
+
+    @contextmanager
+    def reading(self):
+        """Get a connection for reads. Statements inside one block see a single consistent snapshot.
+
+        With WAL enabled this is a read-only connection owned by the calling thread, otherwise the
+        writer connection is used under the lock.
+        """
+        if not (self.read_pool and self.wal_enabled):
+            with self.lock:
+                yield self.conn
+            return
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_reader()
+            self._local.conn = conn
+
+        if conn.in_transaction:
+            # Nested block in the same thread: reuse the outer snapshot
+            yield conn
+            return
+
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self):
+        """Get a read-only connection of its own, for reads that may be resumed from other threads, such as streamed responses.
+
+        The connection sees a single consistent snapshot and is closed when the block exits.
+        """
+        if not (self.read_pool and self.wal_enabled):
+            with self.lock:
+                yield self.conn
+            return
+
+        conn = self._connect_reader()
+        try:
+            conn.execute("BEGIN")
+            yield conn
+        finally:
+            conn.close()
+
+    def _open_reader(self):
+        """Open a read-only connection for the calling thread."""
+        conn = self._connect_reader()
+        with self._readers_lock:
+            self._readers.append(conn)
+        return conn
+
+    def _connect_reader(self):
+        """Open a read-only connection to the database file."""
+        uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    # ================== Reads ==================
+
+    def filter_conditions(self, filters):
+        """Get the WHERE clause and parameters for listing filters."""
+        conditions = []
+        params = []
+        for key, value in (filters or {}).items():
+            if key in FILTER_COLUMNS and isinstance(value, (list, tuple, set, frozenset)):
+                values = [stored_value(item) for item in value]
+                conditions.append(f"{key} IN ({', '.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+            elif key in FILTER_COLUMNS:
+                conditions.append(f"{key} = ?")
+                params.append(stored_value(value))
+            elif key == "description":
+                condition, condition_params = self.search_condition("description", value)
+                conditions.append(condition)
+                params.extend(condition_params)
+            elif key == "is_cancelled":
+                conditions.append("is_cancelled = ?")
+                params.append(1 if value else 0)
+            elif key in DATE_FILTERS:
+                column, operator = DATE_FILTERS[key]
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def get_entity_row(self, column, value):
+        """Get the entity row whose `column` ("id" or "name") has a value, or None."""
+        if column not in ("id", "name"):
+            raise ValueError(f"Entities can't be looked up by '{column}'")
+        with self.reading() as conn:
+            return conn.execute(f"SELECT * FROM workflow_entities WHERE {column} = ?", (value,)).fetchone()
+
+    def get_updated_at(self, entity_id):
+        """Get the updated_at of an entity without reading the rest of its row, or None."""
+        with self.reading() as conn:
+            row = conn.execute("SELECT updated_at FROM workflow_entities WHERE id = ?", (entity_id,)).fetchone()
+        return row["updated_at"] if row else None
+
+    def select_rows(self, filters=None, columns=None, order_by=None, limit=None):
+        """Get the entity rows matching listing filters, ordered by a column if given.
+
+        With `columns` the rows are dicts of those columns only.
+        """
+        where, params = self.filter_conditions(filters)
+        query = f"SELECT {', '.join(columns) if columns else '*'} FROM workflow_entities{where}"
+        if order_by is not None:
+            if order_by not in ENTITY_COLUMNS:
+                raise ValueError(f"Entities can't be ordered by '{order_by}'")
+            query += f" ORDER BY {order_by}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        with self.reading() as conn:
+            cursor = conn.execute(query, params)
+            if columns:
+                return [dict(zip(columns, row)) for row in cursor]
+            return cursor.fetchall()
+
+    def page_rows(self, filters, columns, limit, cursor=None):
+        """Get an iterator over up to limit + 1 rows after a page cursor, most recently updated first.
+
+        Rows are streamed from the database cursor while the iterator is read.
+        """
+        where, params = self.filter_conditions(filters)
+        query, params = page_query(f"SELECT {', '.join(columns)} FROM workflow_entities", where, params, limit, cursor)
+        return self._stream_rows(query, params, columns)
+
+    def _stream_rows(self, query, params, columns):
+        with self.reading() as conn:
+            for row in conn.execute(query, params):
+                yield dict(zip(columns, row))
+
+    def load_steps(self, entity_ids):
+        """Get the step rows of entities, by entity ID, in step order."""
+        return self._load_children(
+            "SELECT * FROM workflow_steps WHERE entity_id IN ({}) ORDER BY entity_id, position", entity_ids
+        )
+
+    def load_logs(self, entity_ids):
+        """Get the log rows of entities, by entity ID, oldest first."""
+        return self._load_children("SELECT * FROM workflow_logs WHERE entity_id IN ({}) ORDER BY id", entity_ids)
+
+    def _load_children(self, query, entity_ids):
+        """Run a query over the rows of entities in batches and group the rows by entity ID."""
+        entity_ids = list(entity_ids)
+        rows_by_entity = {entity_id: [] for entity_id in entity_ids}
+        with self.reading() as conn:
+            for offset in range(0, len(entity_ids), LOAD_BATCH_SIZE):
+                batch = entity_ids[offset:offset + LOAD_BATCH_SIZE]
+                for row in conn.execute(query.format(", ".join("?" * len(batch))), batch):
+                    rows_by_entity[row["entity_id"]].append(row)
+        return rows_by_entity
+
+    def resolve_rows(self, identifier, limit):
+        """Get the rows an identifier refers to and how it matched them, in a single query.
+
+        Returns (0, [row]) for an ID, (1, [row]) for a name, and otherwise (2, rows) with up to
+        `limit` rows whose description contains the identifier, by name.
+        """
+        condition, params = self.search_condition("description", identifier)
+        query = f'''
+        SELECT 0 AS match_rank, * FROM workflow_entities WHERE id = ?
+        UNION ALL
+        SELECT 1, * FROM workflow_entities WHERE name = ?
+        UNION ALL
+        SELECT * FROM (
+            SELECT 2, * FROM workflow_entities
+            WHERE {condition} AND NOT EXISTS (SELECT 1 FROM workflow_entities WHERE id = ? OR name = ?)
+            ORDER BY name
+            LIMIT {int(limit)}
+        )
+        ORDER BY match_rank
+        '''
+        with self.reading() as conn:
+            rows = conn.execute(query, [identifier, identifier, *params, identifier, identifier]).fetchall()
+        if not rows:
+            return 2, []
+        rank = rows[0]["match_rank"]
+        return rank, rows if rank == 2 else rows[:1]
+
+    # ================== Writes ==================
+
+    def apply(self, changes):
+        """Write the EntityChanges of one or more saves in a single transaction.
+
+        The statements are built before the lock is taken, so the lock is held only while the
+        writer connection runs them. Updates are compare-and-swap on the version column: if another
+        writer saved an entity first, nothing is written and ConcurrentUpdateError is raised.
+        """
+        statements = self.write_statements(changes)
+        with self.lock:
+            try:
+                self.execute_writes(statements)
+                self.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def write_statements(self, changes):
+        """Build the statements writing EntityChanges, as (sql, rows, checked) tuples run with executemany.
+
+        Rows of the same statement are batched across entities, so saving many entities together
+        runs a few statements rather than a few per entity. `checked` lists the EntityChanges of
+        compare-and-swap updates, one per row, or is None.
+        """
+        check_new_names(changes)
+        replaced = []
+        inserts = {}  # columns -> rows
+        updates = {}  # columns -> (rows, checked changes)
+        new_steps = []
+        step_updates = {}  # changed step columns -> rows
+        new_logs = []
+        for entity_changes in changes:
+            columns = tuple(entity_changes.columns)
+            values = list(entity_changes.columns.values())
+            if entity_changes.insert:
+                replaced.append((entity_changes.name, entity_changes.entity_id))
+                inserts.setdefault(columns, []).append(values)
+            else:
+                rows, checked = updates.setdefault(columns, ([], []))
+                rows.append(values + [entity_changes.entity_id, entity_changes.version])
+                checked.append(entity_changes)
+            new_steps.extend(entity_changes.new_steps)
+            for fields, rows in entity_changes.step_updates.items():
+                step_updates.setdefault(fields, []).extend(rows)
+            new_logs.extend(entity_changes.new_logs)
+
+        statements = []
+        if replaced:
+            # Same as the former INSERT OR REPLACE: a new pipeline replaces one with the same name
+            statements.append(("DELETE FROM workflow_entities WHERE name = ? AND id != ?", replaced, None))
+        for columns, rows in inserts.items():
+            statements.append((
+                f"INSERT INTO workflow_entities ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                rows, None
+            ))
+        for columns, (rows, checked) in updates.items():
+            statements.append((
+                f"UPDATE workflow_entities SET {', '.join(f'{column} = ?' for column in columns)} "
+                "WHERE id = ? AND version = ?",
+                rows, checked
+            ))
+        if new_steps:
+            statements.append((STEP_UPSERT_SQL, new_steps, None))
+        for fields, rows in step_updates.items():
+            statements.append((
+                f"UPDATE workflow_steps SET {', '.join(f'{field} = ?' for field in fields)} "
+                "WHERE entity_id = ? AND name = ?",
+                rows, None
+            ))
+        if new_logs:
+            statements.append((
+                "INSERT INTO workflow_logs (entity_id, timestamp, level, message) VALUES (?, ?, ?, ?)",
+                new_logs, None
+            ))
+        return statements
+
+    def execute_writes(self, statements):
+        """Run statements from write_statements without committing. Must be called with the lock held."""
+        for sql, rows, checked in statements:
+            cursor = self.cursor.executemany(sql, rows)
+            if checked is not None and cursor.rowcount != len(rows):
+                raise self._conflict(checked)
+
+    def _conflict(self, checked):
+        """Get the error for the first entity a batch of compare-and-swap updates didn't write."""
+        for entity_changes in checked:
+            row = self.cursor.execute(
+                "SELECT version, updated_at FROM workflow_entities WHERE id = ?", (entity_changes.entity_id,)
+            ).fetchone()
+            written = (entity_changes.columns["version"], entity_changes.columns["updated_at"])
+            if row is None or tuple(row) != written:
+                return ConcurrentUpdateError(entity_changes.entity_id, entity_changes.name)
+        return ConcurrentUpdateError(checked[0].entity_id, checked[0].name)
+
+    def delete_named(self, name, except_id):
+        """Delete the entity with a name unless it has the given ID. Returns the number of deleted entities."""
+        with self.lock:
+            try:
+                deleted = self.cursor.execute(
+                    "DELETE FROM workflow_entities WHERE name = ? AND id != ?", (name, except_id)
+                ).rowcount
+                self.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return deleted
+
+    def delete_entities(self, keys):
+        """Delete entities, with their steps and logs, given as (id, updated_at) pairs.
+
+        Entities updated since are kept. Steps and logs are deleted by the foreign key cascade.
+        Returns the ids of the deleted entities.
+        """
+        deleted = []
+        with self.lock:
+            try:
+                for key in keys:
+                    row = self.cursor.execute(
+                        "DELETE FROM workflow_entities WHERE id = ? AND updated_at = ? RETURNING id", key
+                    ).fetchone()
+                    if row is not None:
+                        deleted.append(row[0])
+                self.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return deleted
 
     def close(self):
-        """Close the database connection."""
+        """Close the database connections."""
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
         if self.conn:
             self.conn.close()
 
@@ -0,0 +1,188 @@
+"""
+Identity map and LRU cache for workflow entities.
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+class CacheStats:
+    """Hit and miss counters."""
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self):
+        """Convert the counters to a dictionary."""
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 3)}
+
+class _RequestScope:
+    """Entities loaded during one request, keyed by id and by name."""
+
+    __slots__ = ("entities", "names", "stats", "keep")
+
+    def __init__(self):
+        self.entities = {}
+        self.names = {}
+        self.stats = CacheStats()
+        # Ids of the entities to keep in the LRU once the request succeeds
+        self.keep = set()
+
+class EntityCache:
+    """Process-wide LRU of workflow entities plus a per-request identity map.
+
+    Within a request scope every lookup of the same pipeline returns the same object. Across
+    requests entities are kept in a bounded LRU; the caller revalidates them against the
+    database and hands each request its own copy, so requests on other threads never change
+    the same object. The LRU keeps a copy of the request's entity once the request succeeds.
+    """
+
+    def __init__(self, max_entries=256):
+        """Initialize the cache with the maximum number of entities kept between requests."""
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()  # entity id -> entity
+        self._names = {}  # entity name -> entity id
+        self._local = threading.local()
+        # Counters of all requests; each request's own are kept in its scope
+        self.totals = CacheStats()
+
+    # ================== Request scopes ==================
+
+    @contextmanager
+    def request_scope(self):
+        """Open a request scope, or join the one already open in this thread. Yields the request's stats."""
+        scope = getattr(self._local, "scope", None)
+        if scope is not None:
+            yield scope.stats
+            return
+
+        scope = _RequestScope()
+        self._local.scope = scope
+        try:
+            yield scope.stats
+        except BaseException:
+            # Entities may have been changed in memory without being saved
+            for entity_id in list(scope.entities):
+                self.evict(entity_id)
+            raise
+        else:
+            for entity_id in scope.keep:
+                entity = scope.entities.get(entity_id)
+                if entity is not None and not entity.has_changes():
+                    self._keep(entity.copy())
+                else:
+                    self.evict(entity_id)
+        finally:
+            self._local.scope = None
+            self._local.last_request = scope.stats
+
+    def _scope(self):
+        return getattr(self._local, "scope", None)
+
+    def request_lookup(self, identifier):
+        """Get an entity already loaded in the current request by id or name."""
+        scope = self._scope()
+        if scope is None:
+            return None
+        entity = scope.entities.get(identifier)
+        if entity is None and identifier in scope.names:
+            entity = scope.entities.get(scope.names[identifier])
+        return entity
+
+    # ================== LRU ==================
+
+    def peek(self, identifier):
+        """Get a cached entity by id or name without validating it. It is shared: copy it before changing it."""
+        with self.lock:
+            entity_id = identifier if identifier in self._entries else self._names.get(identifier)
+            if entity_id is None:
+                return None
+            self._entries.move_to_end(entity_id)
+            return self._entries[entity_id]
+
+    def put(self, entity, keep=True):
+        """Register an entity in the current request and cache a copy of it.
+
+        The copy is taken when the request succeeds, or right away outside a request. With
+        keep=False it is only registered in the request, e.g. by bulk operations that would
+        otherwise push every other entity out of the LRU.
+        """
+        scope = self._scope()
+        if scope is None:
+            if keep:
+                self._keep(entity.copy())
+            return
+
+        scope.entities[entity.id] = entity
+        if entity.name is not None:
+            scope.names[entity.name] = entity.id
+        if keep:
+            scope.keep.add(entity.id)
+
+    def _keep(self, entity):
+        with self.lock:
+            current = self._entries.get(entity.id)
+            if current is not None and current.version > entity.version:
+                # A request that finished first saved a newer version
+                return
+            self._entries[entity.id] = entity
+            self._entries.move_to_end(entity.id)
+            if entity.name is not None:
+                self._names[entity.name] = entity.id
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                if self._names.get(evicted.name) == evicted.id:
+                    del self._names[evicted.name]
+
+    def evict(self, entity_id):
+        """Remove an entity from the cache."""
+        with self.lock:
+            entity = self._entries.pop(entity_id, None)
+            if entity is not None and self._names.get(entity.name) == entity_id:
+                del self._names[entity.name]
+
+        scope = self._scope()
+        if scope is not None and scope.entities.pop(entity_id, None) is not None:
+            scope.names = {name: value for name, value in scope.names.items() if value != entity_id}
+
+    def clear(self):
+        """Remove all entities from the cache."""
+        with self.lock:
+            self._entries.clear()
+            self._names.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ================== Stats ==================
+
+    @property
+    def last_request(self):
+        """Stats of the request open in this thread, or of the last one it finished."""
+        scope = self._scope()
+        if scope is not None:
+            return scope.stats
+        return getattr(self._local, "last_request", None) or CacheStats()
+
+    def record_hit(self):
+        with self.lock:
+            self.totals.hits += 1
+        scope = self._scope()
+        if scope is not None:
+            scope.stats.hits += 1
+
+    def record_miss(self):
+        with self.lock:
+            self.totals.misses += 1
+        scope = self._scope()
+        if scope is not None:
+            scope.stats.misses += 1
@@ -1,21 +1,79 @@
 """
 Database manager for the workflow management system.
 """
+import copy
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from db.models import WorkflowEntity 
 from db.database import Database
+from db.memoryStorage import MemoryStorage
+from db.shardedDatabase import DEFAULT_SHARDS, ShardedDatabase
+from db.storage import StorageBackend
+from db.archive import PipelineArchive, archive_finished_pipelines, default_archive_path
+from db.entityCache import EntityCache
 from db.workflowStep import WorkflowStep
+from db.stepGraph import step_plan
+
+STORAGE_BACKENDS = ("sqlite", "memory", "sharded")
+# Seconds a unit of work waits for another one changing the same pipeline; after that it relies on the version check
+WRITE_LOCK_TIMEOUT = 5.0
+
+def open_storage(db_path, storage="sqlite", shards=DEFAULT_SHARDS, codec=None):
+    """Open a storage backend by name: "sqlite" (one file), "memory" or "sharded" (`shards` files).
+
+    A StorageBackend instance is returned as is.
+    """
+    if isinstance(storage, StorageBackend):
+        return storage
+    if storage == "sqlite":
+        return Database(db_path, codec=codec)
+    if storage == "memory":
+        return MemoryStorage(codec=codec)
+    if storage == "sharded":
+        return ShardedDatabase(db_path, shards, codec=codec)
+    raise ValueError(f"Unknown storage backend '{storage}'. Use one of: {', '.join(STORAGE_BACKENDS)}")
 
 class DatabaseManager:
     """Manager for database operations."""
 
-    def __init__(self, db_path="workflows.db"):
-        """Initialize the database manager."""
+    def __init__(self, db_path="workflows.db", cache_size=256, archive_path=None, codec=None,
+                 storage="sqlite", shards=DEFAULT_SHARDS):
+        """Initialize the database manager.
+
+        Pipelines are kept in the `storage` backend (see open_storage). Finished pipelines are
+        archived to `archive_path`, next to the database by default; in-memory storage has no
+        archive unless one is given. Large contexts and log messages are compressed with `codec`
+        (a db.codec.BlobCodec) if given.
+        """
         self.db_path = db_path
-        self.db = Database(db_path)
+        self.db = open_storage(db_path, storage, shards, codec)
+        self.cache = EntityCache(cache_size)
+        if archive_path is None and not isinstance(self.db, MemoryStorage):
+            archive_path = default_archive_path(db_path)
+        self.archive_path = archive_path
+        self._archive = None
+        self._archive_lock = threading.Lock()
+        # Pipeline id -> [lock, number of units of work holding or waiting for it]
+        self._write_locks = {}
+        self._write_locks_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def archive(self):
+        """The archive database, opened on first use. None for in-memory databases."""
+        if self._archive is None and self.archive_path is not None:
+            with self._archive_lock:
+                if self._archive is None:
+                    self._archive = PipelineArchive(self.archive_path)
+        return self._archive
 
     def close(self):
         """Close the database connection."""
         self.db.close()
+        if self._archive is not None:
+            self._archive.close()
 
     def __enter__(self):
         """Context manager enter method."""
@@ -27,33 +85,61 @@ class DatabaseManager:
 
     # Workflow Entity Operations
 
-    def create_workflow_entity(self, config, name="Sample name"):
-        """Create a new pipeline (workflow entity)."""
+    def create_workflow_entity(self, config, name="Sample name", plan=None):
+        """Create a new pipeline (workflow entity), from the config's step plan if given (see db.stepGraph.step_plan)."""
+        entity = self._new_workflow_entity(config, name, plan=plan)
+        entity.save()
+        self.cache.put(entity)
+        return entity
 
+    def create_workflow_entities(self, config, pipelines, plan=None):
+        """Create many pipelines from one configuration, saved in a single transaction.
+
+        `pipelines` are names, or dicts with a "name" and an optional "context" merged into the
+        configuration's initial context. Returns the new entities in the same order.
+        """
         if not config:
             raise ValueError(f"Workflow configuration '{config}' not found")
-        
-        context = config.get("context", {})
-        steps = []
-        
-        for step_config in config["steps"]:
-            step = WorkflowStep.from_config(step_config)
-            steps.append(step)
-            print(step.name)
+
+        specs = [pipeline if isinstance(pipeline, dict) else {"name": pipeline} for pipeline in pipelines]
+        names = [spec.get("name") for spec in specs]
+        duplicates = sorted(name for name, count in Counter(names).items() if name is not None and count > 1)
+        if duplicates:
+            raise ValueError(f"Pipeline names must be unique: {', '.join(duplicates)}")
+
+        if plan is None:
+            # The step order is worked out once for the whole batch
+            plan = step_plan(config["steps"])
+        entities = [self._new_workflow_entity(config, spec.get("name"), spec.get("context"), plan) for spec in specs]
+        with self.db.unit_of_work():
+            for entity in entities:
+                entity.save()
+                # Registered in the request only: a large batch would push everything else out of the cache
+                self.cache.put(entity, keep=False)
+        return entities
+
+    def _new_workflow_entity(self, config, name, context=None, plan=None):
+        """Build an unsaved pipeline from a workflow configuration and its optional step plan (see db.stepGraph.step_plan)."""
+        if not config:
+            raise ValueError(f"Workflow configuration '{config}' not found")
+        if plan is None:
+            plan = step_plan(config["steps"])
 
         entity = WorkflowEntity(
             db=self.db,
             name=name,
             config_name=config["name"],
             description=config["description"],
-            context=config["context"],
-            steps=steps
+            # Configs are cached and shared, so the pipeline gets its own copy of the initial context
+            context=copy.deepcopy(config.get("context", {})),
+            steps=[WorkflowStep.from_config(step_config, depends_on) for step_config, depends_on in plan]
         )
-        
+        if context:
+            entity.deep_update_dict(entity.context, copy.deepcopy(context))
+
         entity.add_log(f"Workflow '{name}' based on '{config["name"]}' created")
-        entity.save()
         return entity
-    
+
     def set_step_status(self, pipelineId, stepId, status):
         #TODO: check if step is eligible to be run
         pipeline = self.get_workflow_entity(pipelineId)
@@ -73,22 +159,179 @@ class DatabaseManager:
         step.status = stepStatus
         pipeline.save()
 
+    def request_scope(self):
+        """Open a request scope: entities loaded inside it are shared. Yields the request's cache stats."""
+        return self.cache.request_scope()
+
+    @contextmanager
+    def unit_of_work(self):
+        """Open a request scope whose entity saves are written in a single transaction at the end.
+
+        Nested calls join the outer unit of work. If the block raises nothing is written and the
+        entities loaded in it are evicted from the cache. Yields the request's cache stats.
+
+        Units of work of this process change a pipeline one at a time: the pipelines loaded in one
+        are locked until it ends.
+        """
+        if getattr(self._local, "write_locks", None) is not None:
+            with self.cache.request_scope() as stats, self.db.unit_of_work():
+                yield stats
+            return
+
+        self._local.write_locks = {}
+        try:
+            with self.cache.request_scope() as stats, self.db.unit_of_work():
+                yield stats
+        finally:
+            self._release_write_locks()
+
+    def _lock_for_write(self, entity_id):
+        """Lock a pipeline until the unit of work open in this thread ends. Returns whether it had to wait for another one."""
+        held = getattr(self._local, "write_locks", None)
+        if held is None or entity_id in held:
+            return False
+        with self._write_locks_lock:
+            entry = self._write_locks.setdefault(entity_id, [threading.Lock(), 0])
+            entry[1] += 1
+        if entry[0].acquire(blocking=False):
+            held[entity_id] = entry
+            return False
+        if entry[0].acquire(timeout=WRITE_LOCK_TIMEOUT):
+            held[entity_id] = entry
+        else:
+            # Units of work waiting for each other's pipelines: go on unlocked, the version check still applies
+            self._forget_write_lock(entity_id, entry)
+        return True
+
+    def _release_write_locks(self):
+        """Release the pipelines locked by the unit of work ending in this thread."""
+        held, self._local.write_locks = self._local.write_locks, None
+        for entity_id, entry in held.items():
+            entry[0].release()
+            self._forget_write_lock(entity_id, entry)
+
+    def _forget_write_lock(self, entity_id, entry):
+        with self._write_locks_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._write_locks[entity_id]
+
+    def _locked_for_write(self, entity, keep=True):
+        """Lock a loaded pipeline for the open unit of work, reloading it if another one saved it meanwhile."""
+        if entity.archived or not self._lock_for_write(entity.id):
+            return entity
+        if WorkflowEntity.get_updated_at(self.db, entity.id) == entity.updated_at:
+            return entity
+        self.cache.evict(entity.id)
+        entity = WorkflowEntity.get_by_id(self.db, entity.id)
+        if entity:
+            self.cache.put(entity, keep)
+        return entity
+
     def get_workflow_entity(self, identifier):
         """Get a workflow entity by ID, name, or description."""
-        # Try to get by ID
-        entity = WorkflowEntity.get_by_id(self.db, identifier)
+        # Already loaded in this request
+        entity = self.cache.request_lookup(identifier)
         if entity:
+            self.cache.record_hit()
             return entity
 
-        # Try to get by name
-        entity = WorkflowEntity.get_by_name(self.db, identifier)
+        # Cached by an earlier request and unchanged in the database since
+        cached = self.cache.peek(identifier)
+        if cached and WorkflowEntity.get_updated_at(self.db, cached.id) == cached.updated_at:
+            self.cache.record_hit()
+            # The cached entity is shared by every thread; this request changes its own copy
+            entity = cached.copy()
+            self.cache.put(entity)
+            return self._locked_for_write(entity)
+
+        self.cache.record_miss()
+        entity = self._load_workflow_entity(identifier)
         if entity:
-            return entity
+            self.cache.put(entity)
+            return self._locked_for_write(entity)
 
-        # Try to get by description
-        entity = WorkflowEntity.get_by_description(self.db, identifier)
-        return entity
+        # Archived pipelines are read-only and not cached
+        return self._load_archived_workflow_entity(identifier)
+
+    def get_workflow_entities(self, identifiers):
+        """Get workflow entities by ID or name, loading the ones not loaded in this request in a few batched reads.
+
+        Returns a dict from identifier to entity; unknown identifiers are left out. The loaded
+        entities are shared with the rest of the request but not kept in the cache.
+        """
+        entities = {}
+        missing = []
+        for identifier in identifiers:
+            entity = self.cache.request_lookup(identifier)
+            if entity:
+                entities[identifier] = entity
+            else:
+                missing.append(identifier)
+
+        loaded = WorkflowEntity.get_many(self.db, missing)
+        for identifier, entity in loaded.items():
+            self.cache.put(entity, keep=False)
+        # Locked in id order, so bulk units of work don't wait for each other
+        for identifier, entity in sorted(loaded.items(), key=lambda item: item[1].id):
+            loaded[identifier] = self._locked_for_write(entity, keep=False)
+        entities.update((identifier, entity) for identifier, entity in loaded.items() if entity)
+        return entities
+
+    def _load_workflow_entity(self, identifier):
+        """Load a workflow entity by ID, name, or description from the database."""
+        return WorkflowEntity.resolve(self.db, identifier)
+
+    def _load_archived_workflow_entity(self, identifier):
+        """Load a workflow entity from the archive, if there is one."""
+        if self.archive_path is None or (self._archive is None and not os.path.exists(self.archive_path)):
+            return None
+        return self.archive.find(self.db, identifier)
+
+    def archive_finished_pipelines(self, older_than_days, batch_size=500):
+        """Move completed and cancelled pipelines not updated for `older_than_days` days to the archive.
+
+        Returns the number of archived pipelines.
+        """
+        if self.archive is None:
+            return 0
+        archived = archive_finished_pipelines(self.db, self.archive, older_than_days, batch_size)
+        for entity_id in archived:
+            self.cache.evict(entity_id)
+        return len(archived)
+
+    def evict_workflow_entity(self, identifier):
+        """Drop a workflow entity from the cache."""
+        entity = self.cache.peek(identifier)
+        if entity:
+            self.cache.evict(entity.id)
+
+    def clear_cache(self):
+        """Drop all cached workflow entities."""
+        self.cache.clear()
+
+    def get_cache_stats(self):
+        """Get the cache size, the hit/miss counters of the process and of this thread's current or last request, and the write counters."""
+        return {
+            "entries": len(self.cache),
+            "max_entries": self.cache.max_entries,
+            "last_request": self.cache.last_request.to_dict(),
+            "total": self.cache.totals.to_dict(),
+            "writes": {
+                "commits": self.db.commit_count,
+                "bytes_written": self.db.bytes_written,
+                "skipped_saves": self.db.skipped_saves
+            }
+        }
 
     def list_workflow_entities(self, filters=None):
         """List all workflow entities with optional filters."""
         return WorkflowEntity.list_all(self.db, filters)
+
+    def list_workflow_summaries(self, filters=None):
+        """List the summaries of workflow entities with optional filters."""
+        return WorkflowEntity.list_summaries(self.db, filters)
+
+    def workflow_summary_page(self, filters=None, limit=None, cursor=None):
+        """Get one page of workflow entity summaries, most recently updated first."""
+        return WorkflowEntity.summary_page(self.db, filters, limit, cursor)
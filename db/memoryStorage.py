@@ -0,0 +1,197 @@
+"""
+In-memory storage backend, for tests and pipelines that don't need to outlive the process.
+"""
+import heapq
+import operator
+import threading
+from contextlib import contextmanager
+from db.pagination import clamp_page_size, decode_cursor
+from db.storage import StorageBackend, ConcurrentUpdateError, check_new_names, DATE_FILTERS, FILTER_COLUMNS, STEP_ROW_COLUMNS, sort_key, stored_value
+
+COMPARISONS = {">=": operator.ge, "<": operator.lt}
+
+def row_filter(filters):
+    """Get a predicate telling whether an entity row matches listing filters, as the SQLite backend does."""
+    checks = []
+    for key, value in (filters or {}).items():
+        if key in FILTER_COLUMNS and isinstance(value, (list, tuple, set, frozenset)):
+            values = {stored_value(item) for item in value}
+            checks.append(lambda row, key=key, values=values: row[key] in values)
+        elif key in FILTER_COLUMNS:
+            checks.append(lambda row, key=key, value=stored_value(value): row[key] == value)
+        elif key == "description":
+            # Case-insensitive, like LIKE and the trigram index
+            text = value.lower()
+            checks.append(lambda row, text=text: text in (row["description"] or "").lower())
+        elif key == "is_cancelled":
+            checks.append(lambda row, value=1 if value else 0: row["is_cancelled"] == value)
+        elif key in DATE_FILTERS:
+            column, comparison = DATE_FILTERS[key]
+            compare = COMPARISONS[comparison]
+            checks.append(lambda row, column=column, compare=compare, value=value: compare(row[column], value))
+    return lambda row: all(check(row) for check in checks)
+
+class MemoryStorage(StorageBackend):
+    """Storage backend keeping rows in dictionaries.
+
+    Rows are never changed in place: a write replaces them, so rows handed out stay as they were read.
+    """
+
+    def __init__(self, codec=None):
+        """Initialize an empty store."""
+        super().__init__(codec)
+        self.lock = threading.RLock()
+        self._entities = {}  # entity id -> row, in insertion order
+        self._names = {}  # entity name -> entity id
+        self._steps = {}  # entity id -> {step name: row}
+        self._logs = {}  # entity id -> rows, oldest first
+        self._last_log_id = 0
+
+    # ================== Reads ==================
+
+    @contextmanager
+    def reading(self):
+        """Hold off writers while the block reads."""
+        with self.lock:
+            yield self
+
+    def get_entity_row(self, column, value):
+        """Get the entity row whose `column` ("id" or "name") has a value, or None."""
+        if column not in ("id", "name"):
+            raise ValueError(f"Entities can't be looked up by '{column}'")
+        with self.lock:
+            entity_id = value if column == "id" else self._names.get(value)
+            return self._entities.get(entity_id)
+
+    def get_updated_at(self, entity_id):
+        """Get the updated_at of an entity, or None."""
+        row = self._entities.get(entity_id)
+        return row["updated_at"] if row else None
+
+    def select_rows(self, filters=None, columns=None, order_by=None, limit=None):
+        """Get the entity rows matching listing filters, ordered by a column if given.
+
+        With `columns` the rows are dicts of those columns only.
+        """
+        matches = row_filter(filters)
+        with self.lock:
+            rows = [row for row in self._entities.values() if matches(row)]
+        if order_by is not None:
+            rows.sort(key=sort_key(order_by))
+        if limit is not None:
+            rows = rows[:limit]
+        if columns:
+            return [{column: row[column] for column in columns} for row in rows]
+        return rows
+
+    def page_rows(self, filters, columns, limit, cursor=None):
+        """Get an iterator over up to limit + 1 rows after a page cursor, most recently updated first."""
+        after = decode_cursor(cursor) if cursor else None
+        matches = row_filter(filters)
+        with self.lock:
+            rows = [
+                row for row in self._entities.values()
+                if matches(row) and (after is None or (row["updated_at"], row["id"]) < after)
+            ]
+        rows = heapq.nlargest(clamp_page_size(limit) + 1, rows, key=lambda row: (row["updated_at"], row["id"]))
+        return iter([{column: row[column] for column in columns} for row in rows])
+
+    def load_steps(self, entity_ids):
+        """Get the step rows of entities, by entity ID, in step order."""
+        with self.lock:
+            return {
+                entity_id: sorted(self._steps.get(entity_id, {}).values(), key=operator.itemgetter("position"))
+                for entity_id in entity_ids
+            }
+
+    def load_logs(self, entity_ids):
+        """Get the log rows of entities, by entity ID, oldest first."""
+        with self.lock:
+            return {entity_id: list(self._logs.get(entity_id, ())) for entity_id in entity_ids}
+
+    # ================== Writes ==================
+
+    def apply(self, changes):
+        """Write the EntityChanges of one or more saves. Nothing is written if one of them is invalid or conflicts."""
+        with self.lock:
+            check_new_names(changes)
+            for entity_changes in changes:
+                self._check(entity_changes)
+            for entity_changes in changes:
+                self._apply(entity_changes)
+            self.commit_count += 1
+
+    def _check(self, changes):
+        """Raise ValueError if the changes can't be written.
+
+        That is ConcurrentUpdateError if the entity's stored version isn't the one it was loaded
+        with, or a rename giving two entities the same name, as the UNIQUE constraint does.
+        """
+        if changes.insert:
+            return
+        row = self._entities.get(changes.entity_id)
+        if row is None or row["version"] != changes.version:
+            raise ConcurrentUpdateError(changes.entity_id, changes.name)
+        name = changes.columns.get("name")
+        if name is None:
+            return
+        owner = self._names.get(name)
+        if owner is not None and owner != changes.entity_id:
+            raise ValueError(f"Pipeline name '{name}' is already used")
+
+    def _apply(self, changes):
+        """Write the changes of one entity."""
+        entity_id = changes.entity_id
+        if changes.insert:
+            # A new pipeline replaces one with the same name
+            owner = self._names.get(changes.name)
+            if owner is not None and owner != entity_id:
+                self._delete(owner)
+            self._entities[entity_id] = dict(changes.columns)
+        else:
+            row = self._entities[entity_id]
+            self._names.pop(row["name"], None)
+            self._entities[entity_id] = {**row, **changes.columns}
+        name = self._entities[entity_id]["name"]
+        if name is not None:
+            self._names[name] = entity_id
+
+        steps = self._steps.setdefault(entity_id, {})
+        for values in changes.new_steps:
+            row = dict(zip(STEP_ROW_COLUMNS, values))
+            steps[row["name"]] = row
+        for fields, rows in changes.step_updates.items():
+            for values in rows:
+                step_name = values[-1]
+                if step_name in steps:
+                    steps[step_name] = {**steps[step_name], **dict(zip(fields, values))}
+
+        logs = self._logs.setdefault(entity_id, [])
+        for entity_id, timestamp, level, message in changes.new_logs:
+            self._last_log_id += 1
+            logs.append({
+                "id": self._last_log_id, "entity_id": entity_id, "timestamp": timestamp, "level": level, "message": message
+            })
+
+    def delete_entities(self, keys):
+        """Delete entities, with their steps and logs, given as (id, updated_at) pairs.
+
+        Entities updated since are kept. Returns the ids of the deleted entities.
+        """
+        deleted = []
+        with self.lock:
+            for entity_id, updated_at in keys:
+                row = self._entities.get(entity_id)
+                if row is not None and row["updated_at"] == updated_at:
+                    self._delete(entity_id)
+                    deleted.append(entity_id)
+            self.commit_count += 1
+        return deleted
+
+    def _delete(self, entity_id):
+        """Delete an entity with its steps and logs."""
+        row = self._entities.pop(entity_id)
+        if self._names.get(row["name"]) == entity_id:
+            del self._names[row["name"]]
+        self._steps.pop(entity_id, None)
+        self._logs.pop(entity_id, None)
@@ -0,0 +1,158 @@
+"""
+Schema migrations for the workflow database.
+"""
+import json
+
+# Columns of workflow_entities once steps and logs live in their own tables
+ENTITY_COLUMNS = [
+    "id", "name", "config_name", "description", "status", "created_at", "updated_at",
+    "context", "is_cancelled", "cancelled_at",
+    "current_step", "steps_total", "steps_completed", "last_activity_at", "version"
+]
+
+# Summary columns kept up to date by WorkflowEntity.save, with their definitions
+SUMMARY_COLUMNS = {
+    "current_step": "TEXT",
+    "steps_total": "INTEGER NOT NULL DEFAULT 0",
+    "steps_completed": "INTEGER NOT NULL DEFAULT 0",
+    "last_activity_at": "TEXT",
+}
+
+def table_columns(conn, table):
+    """Get the column names of a table."""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def migrate_to_normalized_layout(conn, create_entities_sql, batch_size=200):
+    """Move the steps and logs JSON blobs of workflow_entities into the workflow_steps and workflow_logs tables.
+
+    Rows are converted in small batches, each in its own transaction, so other connections are
+    only blocked briefly and an interrupted migration resumes where it stopped. Once every row is
+    converted the legacy columns are dropped by rebuilding the table.
+    Returns the number of migrated rows.
+    """
+    columns = table_columns(conn, "workflow_entities")
+    if "steps" not in columns and "logs" not in columns:
+        return 0
+
+    migrated = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, steps, logs FROM workflow_entities WHERE steps != '[]' OR logs != '[]' LIMIT ?",
+            (batch_size,)
+        ).fetchall()
+        if not rows:
+            break
+
+        with conn:
+            for entity_id, steps, logs in rows:
+                _migrate_row(conn, entity_id, steps, logs)
+        migrated += len(rows)
+
+    _drop_legacy_columns(conn, columns, create_entities_sql)
+    return migrated
+
+def migrate_summary_columns(conn):
+    """Add the summary columns to workflow_entities and fill them in from the steps of existing rows.
+
+    Returns the number of rows filled in.
+    """
+    columns = table_columns(conn, "workflow_entities")
+    with conn:
+        for column, definition in SUMMARY_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE workflow_entities ADD COLUMN {column} {definition}")
+
+        # Rows written before the columns existed have steps but no step count
+        return conn.execute('''
+        UPDATE workflow_entities SET
+            current_step = (
+                SELECT name FROM workflow_steps
+                WHERE entity_id = workflow_entities.id AND status = 'running'
+                ORDER BY position LIMIT 1
+            ),
+            steps_total = (SELECT COUNT(*) FROM workflow_steps WHERE entity_id = workflow_entities.id),
+            steps_completed = (
+                SELECT COUNT(*) FROM workflow_steps WHERE entity_id = workflow_entities.id AND status = 'completed'
+            ),
+            last_activity_at = COALESCE(NULLIF((
+                SELECT MAX(MAX(COALESCE(started_at, '')), MAX(COALESCE(completed_at, '')))
+                FROM workflow_steps WHERE entity_id = workflow_entities.id
+            ), ''), created_at)
+        WHERE steps_total = 0 AND EXISTS (SELECT 1 FROM workflow_steps WHERE entity_id = workflow_entities.id)
+        ''').rowcount
+
+def migrate_version_column(conn):
+    """Add the version column checked by compare-and-swap saves. Existing rows start at version 0.
+
+    Returns True if the column was added.
+    """
+    if "version" in table_columns(conn, "workflow_entities"):
+        return False
+    with conn:
+        conn.execute("ALTER TABLE workflow_entities ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    return True
+
+def migrate_step_dependencies_column(conn):
+    """Add the depends_on column of workflow_steps. Existing steps keep NULL: each waits for the step before it.
+
+    Returns True if the column was added.
+    """
+    if "depends_on" in table_columns(conn, "workflow_steps"):
+        return False
+    with conn:
+        conn.execute("ALTER TABLE workflow_steps ADD COLUMN depends_on TEXT")
+    return True
+
+def _migrate_row(conn, entity_id, steps, logs):
+    """Copy the steps and logs of one legacy row into the normalized tables."""
+    for position, step in enumerate(json.loads(steps or "[]")):
+        mcp_server_config = step.get("mcp_server_config")
+        conn.execute('''
+        INSERT OR REPLACE INTO workflow_steps (
+            entity_id, position, name, instructions, mcp_server_config, status,
+            result, error, started_at, completed_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            entity_id,
+            position,
+            step["name"],
+            step.get("instructions"),
+            json.dumps(mcp_server_config) if mcp_server_config is not None else None,
+            step.get("status", "pending"),
+            step.get("result"),
+            step.get("error"),
+            step.get("started_at"),
+            step.get("completed_at")
+        ))
+
+    conn.executemany(
+        "INSERT INTO workflow_logs (entity_id, timestamp, level, message) VALUES (?, ?, ?, ?)",
+        [(entity_id, log.get("timestamp"), log.get("level", "INFO"), log.get("message", "")) for log in json.loads(logs or "[]")]
+    )
+
+    conn.execute("UPDATE workflow_entities SET steps = '[]', logs = '[]' WHERE id = ?", (entity_id,))
+
+def _drop_legacy_columns(conn, columns, create_entities_sql):
+    """Rebuild workflow_entities without the steps and logs columns."""
+    copied = [column for column in ENTITY_COLUMNS if column in columns]
+    selected = ["COALESCE(status, 'created')" if column == "status" else column for column in copied]
+
+    # The rebuild drops the referenced table, which must not cascade to the steps and logs
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN")
+        try:
+            conn.execute("DROP TABLE IF EXISTS workflow_entities_migrated")
+            conn.execute(create_entities_sql.replace("workflow_entities", "workflow_entities_migrated", 1))
+            conn.execute(
+                f"INSERT INTO workflow_entities_migrated ({', '.join(copied)}) "
+                f"SELECT {', '.join(selected)} FROM workflow_entities"
+            )
+            conn.execute("DROP TABLE workflow_entities")
+            conn.execute("ALTER TABLE workflow_entities_migrated RENAME TO workflow_entities")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
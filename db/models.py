@@ -2,7 +2,8 @@
 Database models for the workflow management system.
 """
 # import sqlite3
-import json
+import copy
+import sys
 import uuid
 from datetime import datetime
 # import os
@@ -10,78 +11,393 @@ from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 # from typing import Dict, Any, Optional, List
-from db.workflowStep import WorkflowStep, StepStatus
+from db.workflowStep import WorkflowStep, StepStatus, STEP_TRACKED_FIELDS
+from db.stepGraph import SATISFIED_STATUSES, StepSchedule, dependencies_of
+from db.pagination import DEFAULT_PAGE_SIZE, KeysetPage
+from db.codec import decode as decode_blob, encode as encode_blob
+from db.serializer import dumps, loads
+from db.storage import EntityChanges
+from db.timestamps import pack, unpack
+from db.workflowLogs import WorkflowLogs
 # from db.database import Database
 
+# Most description matches reported by an ambiguous lookup
+AMBIGUOUS_MATCH_LIMIT = 5
+
+# Identifiers per query when loading many entities at once
+LOOKUP_BATCH_SIZE = 500
+
+class AmbiguousIdentifierError(ValueError):
+    """Raised when an identifier matches the description of more than one workflow entity."""
+
+    def __init__(self, identifier, names):
+        """Initialize the error with the identifier and the names of the matching entities."""
+        self.identifier = identifier
+        self.names = names
+        super().__init__(
+            f"'{identifier}' matches more than one pipeline: {', '.join(names)}. Use the pipeline ID or name."
+        )
+
 class WorkflowStatus(Enum):
     CREATED = "created"
     RUNNING = "running"
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Columns of workflow_entities that change after creation, keyed by attribute name
+ENTITY_TRACKED_FIELDS = frozenset({
+    "name", "config_name", "description", "status", "context", "is_cancelled", "cancelled_at",
+    "current_step", "steps_total", "steps_completed", "last_activity_at"
+})
+
+# Columns read by summary listings, which never decode the context, steps or logs
+SUMMARY_COLUMNS = (
+    "id", "name", "description", "config_name", "status", "current_step", "steps_total",
+    "steps_completed", "created_at", "updated_at", "last_activity_at"
+)
+
+_UNSET = object()
+# Placeholder of a context, steps or logs not loaded yet
+_UNLOADED = object()
+
+def _value_size(value):
+    """Approximate number of bytes SQLite stores for a column value."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bytes):
+        return len(value)
+    return 8
+
+# Statuses listed as active pipelines
+ACTIVE_STATUSES = (WorkflowStatus.CREATED, WorkflowStatus.RUNNING)
+
+def parse_status_filter(text):
+    """Turn "active", "all" or a comma-separated list of statuses into a status filter, or None for no filter."""
+    text = (text or "all").strip().lower()
+    if text == "all":
+        return None
+    if text == "active":
+        return list(ACTIVE_STATUSES)
+    try:
+        return [WorkflowStatus(status.strip()) for status in text.split(",") if status.strip()]
+    except ValueError:
+        valid = ", ".join(["active", "all"] + [status.value for status in WorkflowStatus])
+        raise ValueError(f"Unknown status filter '{text}'. Use one of: {valid}")
+
+def _intern(value):
+    """Share strings that repeat across pipelines, such as config and step names."""
+    return sys.intern(value) if isinstance(value, str) else value
+
 class WorkflowEntity:
     """Model for workflow entity."""
 
+    # Many entities are held by the cache and by listings, so they have no per-instance __dict__.
+    # Timestamps are kept packed (see db.timestamps) and read as ISO strings.
+    __slots__ = (
+        "_dirty", "db", "id", "name", "config_name", "description", "status", "_context", "_context_raw",
+        "_steps", "is_cancelled", "_cancelled_at", "_logs", "_unsaved_logs", "_created_at", "_updated_at",
+        "current_step", "steps_total", "steps_completed", "_last_activity_at", "_persisted",
+        "_persisted_steps", "version", "last_save_bytes", "archived", "_schedule"
+    )
+
     def __init__(self, db, id=None, name=None, config_name=None, description=None, status=WorkflowStatus.CREATED,
                  context=None, steps=None, is_cancelled=False, cancelled_at=None,
-                 logs=None, created_at=None, updated_at=None):
+                 logs=None, created_at=None, updated_at=None, current_step=None, steps_total=0,
+                 steps_completed=0, last_activity_at=None):
         """Initialize a workflow entity."""
+        # Fields changed since the entity was last saved
+        self._dirty = set()
         self.db = db
         self.id = id or str(uuid.uuid4())
         self.name = name
-        self.config_name = config_name
+        self.config_name = _intern(config_name)
         self.description = description
         self.status = status
+        # Context, steps and logs of stored entities are decoded or queried on first access
+        self._context_raw = None
         self.context = context or {}
-        self.steps = steps or []
+        self._steps = steps or []
         self.is_cancelled = is_cancelled
         self.cancelled_at = cancelled_at
-        self.logs = logs or []
+        self._logs = WorkflowLogs(logs or [])
+        # Logs added since the last save
+        self._unsaved_logs = list(self._logs)
         self.created_at = created_at or datetime.utcnow().isoformat()
         self.updated_at = updated_at or self.created_at
+        # Summary of the steps, stored so listings don't need to load them
+        self.current_step = _intern(current_step)
+        self.steps_total = steps_total
+        self.steps_completed = steps_completed
+        self.last_activity_at = last_activity_at or self.created_at
+        # Persistence state: whether the row exists and the position of each stored step
+        self._persisted = False
+        self._persisted_steps = {}
+        # Stored version the entity was loaded or last saved at; saves only apply on top of it
+        self.version = 0
+        # Approximate number of bytes written by the last save
+        self.last_save_bytes = 0
+        # Pipelines read from the archive can't be changed
+        self.archived = False
+        # Step dependency counts, built on first use and updated as steps start and complete
+        self._schedule = None
+
+    def __setattr__(self, name, value):
+        """Set an attribute and remember that a stored column changed."""
+        if name in ENTITY_TRACKED_FIELDS and name != "context" and getattr(self, name, _UNSET) != value:
+            self._dirty.add(name)
+        object.__setattr__(self, name, value)
+
+    # ================== Timestamps ==================
+
+    @property
+    def created_at(self):
+        return unpack(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created_at = pack(value)
+
+    @property
+    def updated_at(self):
+        return unpack(self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value):
+        self._updated_at = pack(value)
+
+    @property
+    def cancelled_at(self):
+        return unpack(self._cancelled_at)
+
+    @cancelled_at.setter
+    def cancelled_at(self, value):
+        self._cancelled_at = pack(value)
+
+    @property
+    def last_activity_at(self):
+        return unpack(self._last_activity_at)
+
+    @last_activity_at.setter
+    def last_activity_at(self, value):
+        self._last_activity_at = pack(value)
+
+    # ================== Lazily loaded fields ==================
+
+    @property
+    def context(self):
+        """Pipeline context, decoded on first access."""
+        if self._context is _UNLOADED:
+            self._context = loads(decode_blob(self._context_raw))
+            self._context_raw = None
+        return self._context
+
+    @context.setter
+    def context(self, value):
+        if getattr(self, "_context", _UNLOADED) is _UNLOADED or self._context != value:
+            self._dirty.add("context")
+        self._context = value
+        self._context_raw = None
+
+    @property
+    def steps(self):
+        """Pipeline steps, queried on first access."""
+        if self._steps is _UNLOADED:
+            self._set_loaded_steps(self.db.load_steps([self.id])[self.id])
+        return self._steps
+
+    @steps.setter
+    def steps(self, value):
+        self._steps = value
+        self._schedule = None
+
+    @property
+    def logs(self):
+        """Pipeline logs, queried on first access. Use add_log to append."""
+        if self._logs is _UNLOADED:
+            self._set_loaded_logs(self.db.load_logs([self.id])[self.id])
+        return self._logs
+
+    @property
+    def loaded_fields(self):
+        """Which of context, steps and logs have been decoded or queried."""
+        return frozenset(
+            field for field, value in (("context", self._context), ("steps", self._steps), ("logs", self._logs))
+            if value is not _UNLOADED
+        )
+
+    def _set_loaded_steps(self, rows):
+        """Build the steps from their stored rows."""
+        self._steps = [WorkflowStep.from_row(row) for row in rows]
+        self._schedule = None
+        self._persisted_steps = {step.name: position for position, step in enumerate(self._steps)}
+
+    def _set_loaded_logs(self, rows):
+        """Build the logs from their stored rows, followed by the logs added since loading."""
+        logs = WorkflowLogs()
+        for row in rows:
+            logs.add(row["timestamp"], row["level"], decode_blob(row["message"]))
+        logs.extend(self._unsaved_logs)
+        self._logs = logs
+
+    def copy(self):
+        """Copy the entity for another request: changes to the copy, saved or not, don't affect the original.
+
+        Context, steps and logs the original hasn't loaded yet are loaded by the copy when it needs them.
+        """
+        entity = object.__new__(WorkflowEntity)
+        for field in self.__slots__:
+            object.__setattr__(entity, field, getattr(self, field))
+        object.__setattr__(entity, "_dirty", set(self._dirty))
+        if self._context is not _UNLOADED:
+            object.__setattr__(entity, "_context", copy.deepcopy(self._context))
+        if self._steps is not _UNLOADED:
+            object.__setattr__(entity, "_steps", [step.copy() for step in self._steps])
+        if self._logs is not _UNLOADED:
+            object.__setattr__(entity, "_logs", self._logs.copy())
+        object.__setattr__(entity, "_unsaved_logs", list(self._unsaved_logs))
+        object.__setattr__(entity, "_persisted_steps", dict(self._persisted_steps))
+        object.__setattr__(entity, "_schedule", None)
+        return entity
+
+    @property
+    def dirty_fields(self):
+        """Columns changed since the entity was last saved."""
+        return frozenset(self._dirty)
+
+    def mark_dirty(self, *fields):
+        """Flag columns as changed, e.g. after mutating the context in place."""
+        self._dirty.update(fields)
+
+    def has_changes(self):
+        """Whether save() has anything to write."""
+        if not self._persisted or self._dirty or self._unsaved_logs:
+            return True
+        if self._steps is _UNLOADED:
+            return False
+        return any(
+            step._dirty or self._persisted_steps.get(step.name) != position
+            for position, step in enumerate(self._steps)
+        )
 
     def save(self):
-        """Save the workflow entity to the database."""
-        self.updated_at = datetime.utcnow().isoformat()
-        
-        serialized_steps = []
-        for step in self.steps:
-            step_dict = {
-                "name": step.name,
-                "instructions": step.instructions,
-                "mcp_server_config": step.mcp_server_config,
-                "status": step.status.value,
-                "result": step.result,
-                "error": step.error,
-                "started_at": step.started_at,
-                "completed_at": step.completed_at
-            }
-            serialized_steps.append(step_dict)
-        
-        with self.db.lock:
-            self.db.cursor.execute('''
-            INSERT OR REPLACE INTO workflow_entities (
-                id, name, config_name, description, status, created_at, updated_at,
-                context, steps, is_cancelled, cancelled_at, logs
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.id,
-                self.name,
-                self.config_name,
-                self.description,
-                self.status.value,
-                self.created_at,
-                self.updated_at,
-                json.dumps(self.context),
-                json.dumps(serialized_steps),
-                1 if self.is_cancelled else 0,
-                self.cancelled_at,
-                json.dumps(self.logs)
-            ))
-            
-            self.db.conn.commit()
+        """Save the workflow entity to the database.
+
+        Only changed columns and steps are written and only new logs are appended, so the cost of a
+        save doesn't grow with the length of the pipeline history. A save with no changes writes
+        nothing. Inside a unit of work the write is deferred until the unit of work flushes.
+        Raises ConcurrentUpdateError if another writer saved the pipeline since it was loaded.
+        """
+        if self.archived:
+            raise ValueError(f"Pipeline '{self.name}' is archived and can't be changed")
+
+        uow = self.db.current_unit_of_work()
+        if uow is not None:
+            uow.register(self)
+            return self
+
+        if not self.has_changes():
+            self.db.skipped_saves += 1
+            return self
+
+        changes, state = self._changes()
+        self.db.apply([changes])
+        self._mark_persisted(state)
         return self
 
+    def _column_value(self, field):
+        """Stored value of an entity column."""
+        value = getattr(self, field)
+        if field == "status":
+            return value.value
+        if field == "context":
+            return encode_blob(self.db.codec, dumps(value))
+        if field == "is_cancelled":
+            return 1 if value else 0
+        return value
+
+    def _changes(self):
+        """Collect the changed columns, the changed steps and the new logs for the storage backend.
+
+        Returns the EntityChanges to apply, and the persistence state to apply with _mark_persisted
+        once they are written.
+        """
+        self.updated_at = datetime.utcnow().isoformat()
+        written = 0
+
+        step_fields = {}
+        new_steps = []
+        partial_updates = {}  # changed columns -> rows
+        # Steps that were never loaded can't have changed
+        for position, step in enumerate(self._steps if self._steps is not _UNLOADED else ()):
+            if self._persisted_steps.get(step.name) != position:
+                new_steps.append(self._step_row(step, position))
+                step_fields[step.name] = (position, STEP_TRACKED_FIELDS)
+            elif step._dirty:
+                changed = tuple(sorted(step._dirty))
+                partial_updates.setdefault(changed, []).append(
+                    [step.stored_value(field) for field in changed] + [self.id, step.name]
+                )
+                step_fields[step.name] = (position, changed)
+
+        if self._steps is not _UNLOADED:
+            self._refresh_summary(steps_changed=bool(step_fields))
+
+        if self._persisted:
+            fields = sorted(self._dirty)
+            columns = {field: self._column_value(field) for field in fields}
+            columns.update(updated_at=self.updated_at, version=self.version + 1)
+        else:
+            fields = sorted(ENTITY_TRACKED_FIELDS)
+            columns = {field: self._column_value(field) for field in fields}
+            columns.update(updated_at=self.updated_at, id=self.id, created_at=self.created_at, version=self.version + 1)
+        written += sum(_value_size(value) for value in columns.values())
+        written += sum(_value_size(value) for row in new_steps for value in row)
+        written += sum(
+            _value_size(value) for changed, rows in partial_updates.items() for row in rows for value in row[:len(changed)]
+        )
+
+        new_logs = [
+            (self.id, log["timestamp"], log["level"], encode_blob(self.db.codec, log["message"]))
+            for log in self._unsaved_logs
+        ]
+        written += sum(_value_size(value) for row in new_logs for value in row[1:])
+
+        changes = EntityChanges(
+            self.id, self.name, not self._persisted, columns, new_steps, partial_updates, new_logs, self.version
+        )
+        return changes, (fields, step_fields, len(new_logs), written)
+
+    def _refresh_summary(self, steps_changed):
+        """Update the summary columns from the steps."""
+        current_step = self.get_current_step()
+        self.current_step = current_step.name if current_step else None
+        self.steps_total = len(self.steps)
+        self.steps_completed = sum(1 for step in self.steps if step.status == StepStatus.COMPLETED)
+        if steps_changed and self._persisted:
+            self.last_activity_at = self.updated_at
+
+    def _mark_persisted(self, state):
+        """Record what is stored in the database after a successful commit."""
+        fields, step_fields, log_count, written = state
+        self._persisted = True
+        self.version += 1
+        self._dirty.difference_update(fields)
+        steps = {step.name: step for step in self._steps} if step_fields else {}
+        for name, (position, changed) in step_fields.items():
+            self._persisted_steps[name] = position
+            if name in steps:
+                steps[name].mark_clean(changed)
+        del self._unsaved_logs[:log_count]
+        self.last_save_bytes = written
+        self.db.bytes_written += written
+
+    def _step_row(self, step, position):
+        """Row values of a step for the workflow_steps table."""
+        name, *values = step.to_row()
+        return (self.id, position, name, *values)
+
     def add_log(self, message, level="INFO"):
         """Add a log entry to the workflow entity."""
         log_entry = {
@@ -89,25 +405,14 @@ class WorkflowEntity:
             "level": level,
             "message": message
         }
-        self.logs.append(log_entry)
+        # Stored logs are only queried when read
+        self._unsaved_logs.append(log_entry)
+        if self._logs is not _UNLOADED:
+            self._logs.append(log_entry)
         return self
     
     def to_dict(self):
         """Convert the workflow entity to a dictionary."""
-        # Convert steps to a serializable format
-        serialized_steps = []
-        for step in self.steps:
-            step_dict = {
-                "name": step.name,
-                "status": step.status.value,
-                "instructions": step.instructions,
-                "result": step.result,
-                "error": step.error,
-                "started_at": step.started_at,
-                "completed_at": step.completed_at
-            }
-            serialized_steps.append(step_dict)
-        
         return {
             "id": self.id,
             "name": self.name,
@@ -117,10 +422,10 @@ class WorkflowEntity:
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "context": self.context,
-            "steps": serialized_steps,
+            "steps": [step.to_dict() for step in self.steps],
             "is_cancelled": self.is_cancelled,
             "cancelled_at": self.cancelled_at,
-            "logs": self.logs
+            "logs": list(self.logs)
         }
     
     # ============== Business logic methods ================
@@ -143,6 +448,7 @@ class WorkflowEntity:
     def update_context(self, context):
         """Update workflow context (deep merge)."""
         self.deep_update_dict(self.context, context)
+        self.mark_dirty("context")
         self.updated_at = datetime.utcnow().isoformat()
         self.add_log(f"context updated: {context}", "INFO")
         return self
@@ -166,6 +472,7 @@ class WorkflowEntity:
             step = step_or_step_id
             
         if step:
+            self._step_status_changing(step, StepStatus.RUNNING)
             step.status = StepStatus.RUNNING
             step.started_at = datetime.utcnow().isoformat()
             self.add_log(f"Step started: {step.name}", "INFO")
@@ -182,6 +489,7 @@ class WorkflowEntity:
             step = step_or_step_id
             
         if step:
+            self._step_status_changing(step, StepStatus.COMPLETED)
             step.status = StepStatus.COMPLETED
             step.completed_at = datetime.utcnow().isoformat()
             self.add_log(f"Step completed: {step.name}", "INFO")
@@ -196,11 +504,29 @@ class WorkflowEntity:
             step = step_or_step_id
             
         if step:
+            self._step_status_changing(step, StepStatus.FAILED)
             step.status = StepStatus.FAILED
             step.error = error
             self.add_log(f"Step failed: {step.name} - {error}", "ERROR")
         return self
 
+    def _step_status_changing(self, step, status):
+        """Update the step schedule, if built, before a step's status changes."""
+        schedule = self._schedule
+        if schedule is None or step.status == status:
+            return
+        if step.status in SATISFIED_STATUSES:
+            # A step done again: rebuild the counts when next needed
+            self._schedule = None
+        elif status in SATISFIED_STATUSES:
+            schedule.satisfied(step.name)
+        schedule.started(step.name)
+
+    def _step_schedule(self):
+        if self._schedule is None:
+            self._schedule = StepSchedule(self.steps)
+        return self._schedule
+
     # ============= Step retrieval methods ================
     def get_step(self, step_id):
         """Get a step by ID."""
@@ -215,6 +541,23 @@ class WorkflowEntity:
         running_steps = [step for step in self.steps if step.status == StepStatus.RUNNING]
         return running_steps[0] if running_steps else None
     
+    def get_running_steps(self):
+        """Get every running step: independent steps can run at the same time."""
+        return self.get_steps_by_status(StepStatus.RUNNING)
+
+    def get_ready_steps(self):
+        """Get the pending steps whose dependencies are all completed, in step order."""
+        steps = self.steps
+        ready = sorted(self._step_schedule().ready.values())
+        return [steps[position] for position in ready if steps[position].status == StepStatus.PENDING]
+
+    def get_unmet_dependencies(self, step):
+        """Get the names of the steps a step still waits for."""
+        position = self.steps.index(step)
+        previous = self.steps[position - 1].name if position else None
+        statuses = {s.name: s.status for s in self.steps}
+        return [name for name in dependencies_of(step, previous) if statuses.get(name) not in SATISFIED_STATUSES]
+
     def get_first_step(self):
         """Get the first step in the workflow."""
         return self.steps[0] if self.steps else None
@@ -226,30 +569,15 @@ class WorkflowEntity:
 
     # ================== Class methods for database operations ==================
     @classmethod
-    def from_row(cls, db, row):
-        """Create a workflow entity from a database row."""
+    def from_row(cls, db, row, steps_rows=None, log_rows=None):
+        """Create a workflow entity from a database row and optionally its step and log rows.
+
+        The context is decoded on first access. Steps and logs not given are queried on first access.
+        """
         if not row:
             return None
-        
-        steps = []
-
-        if "steps" in row.keys() and row["steps"]:
-            steps_data = json.loads(row["steps"])
-            for step_data in steps_data:
-                step = WorkflowStep(
-                    name=step_data["name"],
-                    instructions=step_data["instructions"],
-                    mcp_server_config=step_data.get("mcp_server_config"),
-                    status=StepStatus(step_data["status"]),
-                    result=step_data.get("result"),
-                    error=step_data.get("error"),
-                    started_at=step_data.get("started_at"),
-                    completed_at=step_data.get("completed_at")
-                )
 
-                steps.append(step)
-        
-        return cls(
+        entity = cls(
             db=db,
             id=row["id"],
             name=row["name"],
@@ -258,67 +586,117 @@ class WorkflowEntity:
             status=WorkflowStatus(row["status"]),
             created_at=row["created_at"],
             updated_at=row["updated_at"],
-            context=json.loads(row["context"]),
-            steps=steps,
             is_cancelled=bool(row["is_cancelled"]),
             cancelled_at=row["cancelled_at"],
-            logs=json.loads(row["logs"])
+            current_step=row["current_step"],
+            steps_total=row["steps_total"],
+            steps_completed=row["steps_completed"],
+            last_activity_at=row["last_activity_at"]
         )
+        entity._context = _UNLOADED
+        entity._context_raw = row["context"]
+        if steps_rows is None:
+            entity._steps = _UNLOADED
+        else:
+            entity._set_loaded_steps(steps_rows)
+        if log_rows is None:
+            entity._logs = _UNLOADED
+        else:
+            entity._set_loaded_logs(log_rows)
+        entity.version = row["version"]
+        entity._persisted = True
+        entity._dirty.clear()
+        return entity
+
+    @classmethod
+    def _load_rows(cls, db, rows, eager=False):
+        """Build entities from their rows. With `eager` their steps and logs are loaded too, in a few batched reads."""
+        if not rows:
+            return []
+        if not eager:
+            return [cls.from_row(db, row) for row in rows]
+
+        ids = [row["id"] for row in rows]
+        with db.reading():
+            steps_by_entity = db.load_steps(ids)
+            logs_by_entity = db.load_logs(ids)
+        return [
+            cls.from_row(db, row, steps_by_entity[row["id"]], logs_by_entity[row["id"]])
+            for row in rows
+        ]
 
     @classmethod
     def get_by_id(cls, db, workflow_id):
         """Get a workflow entity by ID."""
-        with db.lock:
-            db.cursor.execute(
-                "SELECT * FROM workflow_entities WHERE id = ?", (workflow_id,)
-            )
-            row = db.cursor.fetchone()
+        return cls.from_row(db, db.get_entity_row("id", workflow_id))
 
-        return cls.from_row(db, row)
+    @classmethod
+    def get_updated_at(cls, db, workflow_id):
+        """Get the last update time of a workflow entity without loading it."""
+        return db.get_updated_at(workflow_id)
 
     @classmethod
     def get_by_name(cls, db, name):
         """Get a workflow entity by name."""
-        with db.lock:
-            db.cursor.execute(
-                "SELECT * FROM workflow_entities WHERE name = ?", (name,)
-            )
-            row = db.cursor.fetchone()
-        return cls.from_row(db, row)
+        return cls.from_row(db, db.get_entity_row("name", name))
+
+    @classmethod
+    def get_many(cls, db, identifiers):
+        """Get workflow entities by ID or name, with their steps, in a few batched reads.
+
+        Returns a dict from identifier to entity; unknown identifiers are left out. Logs are
+        queried on first access.
+        """
+        rows = {}
+        with db.reading():
+            for column in ("id", "name"):
+                missing = [identifier for identifier in dict.fromkeys(identifiers) if identifier not in rows]
+                for offset in range(0, len(missing), LOOKUP_BATCH_SIZE):
+                    for row in db.select_rows({column: missing[offset:offset + LOOKUP_BATCH_SIZE]}):
+                        rows[row[column]] = row
+            entity_rows = {row["id"]: row for row in rows.values()}
+            steps_by_entity = db.load_steps(list(entity_rows))
+
+        entities = {
+            entity_id: cls.from_row(db, row, steps_by_entity[entity_id])
+            for entity_id, row in entity_rows.items()
+        }
+        return {identifier: entities[row["id"]] for identifier, row in rows.items()}
 
     @classmethod
     def get_by_description(cls, db, description):
         """Get a workflow entity by description."""
-        with db.lock:
-            db.cursor.execute(
-                "SELECT * FROM workflow_entities WHERE description LIKE ?", (f"%{description}%",)
-            )
-            row = db.cursor.fetchone()
-        return cls.from_row(db, row)
+        rows = db.select_rows({"description": description}, limit=1)
+        return cls.from_row(db, rows[0]) if rows else None
+
+    @classmethod
+    def resolve(cls, db, identifier):
+        """Get the workflow entity an identifier refers to by ID, name, or part of its description.
+
+        They are tried in that order of precedence. Raises AmbiguousIdentifierError if the
+        identifier only matches descriptions and more than one of them.
+        """
+        match_rank, rows = db.resolve_rows(identifier, AMBIGUOUS_MATCH_LIMIT)
+        if match_rank == 2 and len(rows) > 1:
+            raise AmbiguousIdentifierError(identifier, [row["name"] for row in rows])
+        return cls.from_row(db, rows[0]) if rows else None
 
     @classmethod
     def list_all(cls, db, filters=None):
         """List all workflow entities with optional filters."""
-        query = "SELECT * FROM workflow_entities"
-        params = []
-        
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                if key in ["id", "name", "config_name"]:
-                    conditions.append(f"{key} = ?")
-                    params.append(value)
-                elif key == "description":
-                    conditions.append("description LIKE ?")
-                    params.append(f"%{value}%")
-                elif key == "is_cancelled":
-                    conditions.append("is_cancelled = ?")
-                    params.append(1 if value else 0)
-            
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-        
-        with db.lock:
-            db.cursor.execute(query, params)
-            rows = db.cursor.fetchall()
-        return [cls.from_row(db, row) for row in rows]
+        with db.reading():
+            return cls._load_rows(db, db.select_rows(filters), eager=True)
+
+    @classmethod
+    def list_summaries(cls, db, filters=None):
+        """List the summary columns of workflow entities as dictionaries, without loading their context, steps or logs."""
+        return db.select_rows(filters, SUMMARY_COLUMNS)
+
+    @classmethod
+    def summary_page(cls, db, filters=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Get one page of summaries, most recently updated first.
+
+        Rows are streamed from the storage backend while the page is iterated; the page's
+        next_cursor is set once it has been read. Raises ValueError for an invalid cursor.
+        """
+        return KeysetPage(db.page_rows(filters, SUMMARY_COLUMNS, limit, cursor), limit)
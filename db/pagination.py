@@ -0,0 +1,73 @@
+"""
+Keyset pagination of pipeline listings.
+
+Pages are ordered by (updated_at, id), newest first. A page is read with one extra row to know
+whether another page follows; the cursor of the next page is the key of the last row returned.
+"""
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+ORDER_BY_SQL = " ORDER BY updated_at DESC, id DESC"
+
+def encode_cursor(updated_at, entity_id):
+    """Encode the key of the last row of a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([updated_at, entity_id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    """Decode a cursor into the (updated_at, id) key it was made from."""
+    try:
+        updated_at, entity_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError(f"Invalid page cursor '{cursor}'")
+    if not isinstance(updated_at, str) or not isinstance(entity_id, str):
+        raise ValueError(f"Invalid page cursor '{cursor}'")
+    return updated_at, entity_id
+
+def page_query(select_sql, where, params, limit, cursor=None):
+    """Add the cursor condition, the order and the limit to a listing query.
+
+    `where` is a WHERE clause (or an empty string) over workflow_entities. Returns the query and
+    its parameters.
+    """
+    limit = clamp_page_size(limit)
+    params = list(params)
+    if cursor:
+        where += (" AND " if where else " WHERE ") + "(updated_at, id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+    return f"{select_sql}{where}{ORDER_BY_SQL} LIMIT {limit + 1}", params
+
+def clamp_page_size(limit):
+    """Keep a requested page size between 1 and MAX_PAGE_SIZE."""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+class KeysetPage:
+    """Rows of one page, read from the database cursor while the page is iterated.
+
+    `next_cursor` is set once iteration ends, if another page follows.
+    """
+
+    def __init__(self, rows, limit, key=lambda row: (row["updated_at"], row["id"])):
+        """Initialize the page from a row iterator fetched with page_query."""
+        self._rows = rows
+        self.limit = clamp_page_size(limit)
+        self.key = key
+        self.next_cursor = None
+
+    def __iter__(self):
+        last = None
+        try:
+            for count, row in enumerate(self._rows):
+                if count == self.limit:
+                    self.next_cursor = encode_cursor(*self.key(last))
+                    break
+                last = row
+                yield row
+        finally:
+            close = getattr(self._rows, "close", None)
+            if close is not None:
+                close()
@@ -0,0 +1,72 @@
+"""
+JSON serialization of stored pipeline values.
+
+Uses orjson or msgspec when installed and the standard json module otherwise. All backends write
+compact UTF-8 JSON and read each other's output, so the backend can change between runs.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, faster
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional, faster
+    msgspec = None
+
+class Serializer:
+    """JSON encoder and decoder of one backend."""
+
+    def __init__(self, name, dumps, loads):
+        """Initialize the serializer with functions converting between objects and JSON text."""
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+def _json_serializer():
+    encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    return Serializer("json", encoder.encode, json.loads)
+
+def _orjson_serializer():
+    options = orjson.OPT_NON_STR_KEYS
+    return Serializer("orjson", lambda value: orjson.dumps(value, option=options).decode("utf-8"), orjson.loads)
+
+def _msgspec_serializer():
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+    return Serializer("msgspec", lambda value: encoder.encode(value).decode("utf-8"), decoder.decode)
+
+BACKENDS = {
+    "orjson": (lambda: orjson is not None, _orjson_serializer),
+    "msgspec": (lambda: msgspec is not None, _msgspec_serializer),
+    "json": (lambda: True, _json_serializer),
+}
+
+def get_serializer(name=None):
+    """Get the serializer of a backend, or of the fastest one installed."""
+    if name is None:
+        name = next(backend for backend, (available, _) in BACKENDS.items() if available())
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown serializer '{name}'. Use one of: {', '.join(BACKENDS)}")
+    available, factory = BACKENDS[name]
+    if not available():
+        raise ValueError(f"Serializer '{name}' is not installed")
+    return factory()
+
+serializer = get_serializer()
+
+def dumps(value):
+    """Encode a value as JSON text."""
+    return serializer.dumps(value)
+
+def loads(text):
+    """Decode JSON text."""
+    return serializer.loads(text)
+
+def use_serializer(name=None):
+    """Switch the backend used by dumps and loads. Returns the new serializer."""
+    global serializer
+    serializer = get_serializer(name)
+    return serializer
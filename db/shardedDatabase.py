@@ -0,0 +1,177 @@
+"""
+Sharded SQLite storage backend.
+
+Pipelines are spread over several SQLite files by a hash of their ID. Each shard has its own
+writer connection and lock, so saves of pipelines on different shards don't wait for each other.
+Lookups by ID go to one shard; lookups by name or description and listings ask every shard and
+merge the results.
+
+Each shard commits on its own: a unit of work touching pipelines on several shards is written in
+one transaction per shard. Version conflicts are found on every shard before any of them commits,
+so a conflicting unit of work writes nothing; a crash between the shard commits can still leave it
+partly written. Names are unique per shard; a new pipeline still replaces one with the same name on
+any shard.
+"""
+import heapq
+import itertools
+import os
+import zlib
+from contextlib import ExitStack, contextmanager
+from db.database import Database
+from db.pagination import clamp_page_size, decode_cursor
+from db.storage import StorageBackend, check_new_names, sort_key
+
+DEFAULT_SHARDS = 4
+
+def shard_paths(db_path, shards):
+    """Paths of the shard files of a database: workflows.db is split into workflows.shard0.db and so on."""
+    if db_path == ":memory:":
+        return [":memory:"] * shards
+    base, extension = os.path.splitext(db_path)
+    return [f"{base}.shard{index}{extension or '.db'}" for index in range(shards)]
+
+class ShardedDatabase(StorageBackend):
+    """Storage backend spreading pipelines over several SQLite databases."""
+
+    def __init__(self, db_path="workflows.db", shards=DEFAULT_SHARDS, read_pool=True, codec=None):
+        """Initialize the backend, opening or creating one database per shard."""
+        if shards < 1:
+            raise ValueError(f"A sharded database needs at least one shard, not {shards}")
+        super().__init__(codec)
+        self.db_path = db_path
+        self.shards = [Database(path, read_pool=read_pool, codec=codec) for path in shard_paths(db_path, shards)]
+
+    @property
+    def search_enabled(self):
+        return all(shard.search_enabled for shard in self.shards)
+
+    @property
+    def wal_enabled(self):
+        return all(shard.wal_enabled for shard in self.shards)
+
+    def shard_index(self, entity_id):
+        """Get the index of the shard an entity is stored on."""
+        return zlib.crc32(entity_id.encode("utf-8")) % len(self.shards)
+
+    def shard_for(self, entity_id):
+        """Get the shard an entity is stored on."""
+        return self.shards[self.shard_index(entity_id)]
+
+    def _group_by_shard(self, items, entity_id):
+        """Group items by the shard of their entity ID. Returns (shard, items) pairs in shard order."""
+        groups = {}
+        for item in items:
+            groups.setdefault(self.shard_index(entity_id(item)), []).append(item)
+        return [(self.shards[index], groups[index]) for index in sorted(groups)]
+
+    # ================== Reads ==================
+
+    @contextmanager
+    def reading(self):
+        """Read every shard from a snapshot taken when the block starts."""
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard.reading())
+            yield self
+
+    def get_entity_row(self, column, value):
+        """Get the entity row whose `column` ("id" or "name") has a value, or None."""
+        if column == "id":
+            return self.shard_for(value).get_entity_row(column, value)
+        for shard in self.shards:
+            row = shard.get_entity_row(column, value)
+            if row is not None:
+                return row
+        return None
+
+    def get_updated_at(self, entity_id):
+        """Get the updated_at of an entity, or None."""
+        return self.shard_for(entity_id).get_updated_at(entity_id)
+
+    def select_rows(self, filters=None, columns=None, order_by=None, limit=None):
+        """Get the entity rows matching listing filters from every shard, ordered by a column if given."""
+        shard_rows = [shard.select_rows(filters, columns, order_by, limit) for shard in self.shards]
+        if order_by is None:
+            rows = list(itertools.chain.from_iterable(shard_rows))
+        else:
+            rows = list(heapq.merge(*shard_rows, key=sort_key(order_by)))
+        return rows[:limit] if limit is not None else rows
+
+    def page_rows(self, filters, columns, limit, cursor=None):
+        """Get an iterator over up to limit + 1 rows after a page cursor, merged from the pages of every shard."""
+        if cursor:
+            decode_cursor(cursor)  # raise for an invalid cursor now, not while iterating
+        pages = [shard.page_rows(filters, columns, limit, cursor) for shard in self.shards]
+        return self._merge_pages(pages, clamp_page_size(limit) + 1)
+
+    def _merge_pages(self, pages, count):
+        try:
+            merged = heapq.merge(*pages, key=lambda row: (row["updated_at"], row["id"]), reverse=True)
+            yield from itertools.islice(merged, count)
+        finally:
+            # Ends the read transactions of pages that weren't read to the end
+            for page in pages:
+                page.close()
+
+    def load_steps(self, entity_ids):
+        """Get the step rows of entities, by entity ID, in step order."""
+        rows_by_entity = {}
+        for shard, group in self._group_by_shard(entity_ids, lambda entity_id: entity_id):
+            rows_by_entity.update(shard.load_steps(group))
+        return rows_by_entity
+
+    def load_logs(self, entity_ids):
+        """Get the log rows of entities, by entity ID, oldest first."""
+        rows_by_entity = {}
+        for shard, group in self._group_by_shard(entity_ids, lambda entity_id: entity_id):
+            rows_by_entity.update(shard.load_logs(group))
+        return rows_by_entity
+
+    # ================== Writes ==================
+
+    def apply(self, changes):
+        """Write the EntityChanges of one or more saves, in one transaction per shard.
+
+        The shards' locks are taken in shard order and every shard's statements run before any
+        shard commits, so a ConcurrentUpdateError on one shard leaves all of them unchanged.
+        """
+        check_new_names(changes)
+        groups = [
+            (shard, shard.write_statements(group))
+            for shard, group in self._group_by_shard(changes, lambda entity_changes: entity_changes.entity_id)
+        ]
+        with ExitStack() as stack:
+            for shard, _ in groups:
+                stack.enter_context(shard.lock)
+            try:
+                for shard, statements in groups:
+                    shard.execute_writes(statements)
+            except Exception:
+                for shard, _ in groups:
+                    shard.conn.rollback()
+                raise
+            for shard, _ in groups:
+                shard.commit()
+                self.commit_count += 1
+
+        # New pipelines replace ones with the same name on the other shards
+        for entity_changes in changes:
+            if entity_changes.insert and entity_changes.name is not None:
+                home = self.shard_for(entity_changes.entity_id)
+                for shard in self.shards:
+                    # Checked through the reader first, so most inserts don't take the other shards' locks
+                    if shard is not home and shard.get_entity_row("name", entity_changes.name) is not None:
+                        shard.delete_named(entity_changes.name, entity_changes.entity_id)
+
+    def delete_entities(self, keys):
+        """Delete entities, with their steps and logs, given as (id, updated_at) pairs. Returns the ids of the deleted ones."""
+        deleted = []
+        for shard, group in self._group_by_shard(keys, lambda key: key[0]):
+            deleted.extend(shard.delete_entities(group))
+            self.commit_count += 1
+        return deleted
+
+    def close(self):
+        """Close the databases of all shards."""
+        for shard in self.shards:
+            shard.close()
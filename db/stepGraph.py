@@ -0,0 +1,136 @@
+"""
+Dependencies between the steps of a pipeline.
+
+A step config may list the ids of the steps it waits for in `depends_on`. A step without
+`depends_on` waits for the step before it, so configs without any stay a linear sequence, and
+`depends_on: []` lets a step start with the pipeline. Steps whose dependencies are all completed
+are ready; the executor starts every ready step, so independent steps run at the same time.
+"""
+import heapq
+
+from db.workflowStep import StepStatus
+
+# Statuses that satisfy the steps depending on a step
+SATISFIED_STATUSES = frozenset({StepStatus.COMPLETED, StepStatus.SKIPPED})
+
+def step_dependencies(step_configs):
+    """Get the step ids each step of a config waits for, by step id, in config order."""
+    dependencies = {}
+    previous = None
+    for step in step_configs:
+        depends_on = step.get("depends_on")
+        if depends_on is None:
+            depends_on = [previous] if previous is not None else []
+        dependencies[step["id"]] = tuple(depends_on)
+        previous = step["id"]
+    return dependencies
+
+def topological_order(dependencies):
+    """Order step ids so every step comes after the steps it depends on, keeping config order otherwise.
+
+    Raises ValueError naming the steps of a cycle or an unknown dependency.
+    """
+    positions = {step_id: position for position, step_id in enumerate(dependencies)}
+    dependents = {step_id: [] for step_id in dependencies}
+    waiting = {}
+    for step_id, depends_on in dependencies.items():
+        for dependency in depends_on:
+            if dependency not in positions:
+                raise ValueError(f"Step '{step_id}' depends on unknown step '{dependency}'")
+            if dependency == step_id:
+                raise ValueError(f"Step '{step_id}' depends on itself")
+            dependents[dependency].append(step_id)
+        waiting[step_id] = len(set(depends_on))
+
+    ready = [positions[step_id] for step_id, count in waiting.items() if count == 0]
+    heapq.heapify(ready)
+    names = list(dependencies)
+    order = []
+    while ready:
+        step_id = names[heapq.heappop(ready)]
+        order.append(step_id)
+        for dependent in dict.fromkeys(dependents[step_id]):
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heapq.heappush(ready, positions[dependent])
+
+    if len(order) < len(dependencies):
+        raise ValueError(f"Step dependencies form a cycle: {' -> '.join(_cycle(dependencies, waiting))}")
+    return order
+
+def step_plan(step_configs):
+    """Order the step configs of a workflow configuration after the steps they depend on.
+
+    Returns a tuple of (step config, depends_on) pairs to build a pipeline's steps from; the step
+    configs themselves are left untouched. Raises ValueError like topological_order.
+    """
+    by_id = {step["id"]: step for step in step_configs}
+    dependencies = step_dependencies(step_configs)
+    plan = []
+    previous = None
+    for step_id in topological_order(dependencies):
+        depends_on = dependencies[step_id]
+        # Waiting for the step just before is the default and isn't stored
+        if depends_on == ((previous,) if previous is not None else ()):
+            depends_on = None
+        plan.append((by_id[step_id], depends_on))
+        previous = step_id
+    return tuple(plan)
+
+def _cycle(dependencies, waiting):
+    """Find one cycle among the steps left waiting by topological_order."""
+    step_id = next(step_id for step_id, count in waiting.items() if count > 0)
+    path = []
+    seen = {}
+    while step_id not in seen:
+        seen[step_id] = len(path)
+        path.append(step_id)
+        step_id = next(dependency for dependency in dependencies[step_id] if waiting[dependency] > 0)
+    return path[seen[step_id]:] + [step_id]
+
+def dependencies_of(step, previous):
+    """Names of the steps a step waits for, given the name of the step before it (None for the first)."""
+    if step.depends_on is not None:
+        return step.depends_on
+    return (previous,) if previous is not None else ()
+
+class StepSchedule:
+    """Unmet dependency counts of a pipeline's steps, updated as steps complete instead of rescanned."""
+
+    __slots__ = ("positions", "dependents", "waiting", "ready")
+
+    def __init__(self, steps):
+        """Build the schedule from steps in position order. A step without depends_on waits for the one before it."""
+        self.positions = {step.name: position for position, step in enumerate(steps)}
+        self.dependents = {step.name: [] for step in steps}
+        statuses = {step.name: step.status for step in steps}
+        self.waiting = {}
+        # Pending steps without unmet dependencies, with their positions
+        self.ready = {}
+        previous = None
+        for position, step in enumerate(steps):
+            depends_on = dependencies_of(step, previous)
+            unmet = 0
+            for dependency in depends_on:
+                # A dependency missing from the pipeline can never be met
+                self.dependents.setdefault(dependency, []).append(step.name)
+                if statuses.get(dependency) not in SATISFIED_STATUSES:
+                    unmet += 1
+            self.waiting[step.name] = unmet
+            if not unmet and step.status == StepStatus.PENDING:
+                self.ready[step.name] = position
+            previous = step.name
+
+    def satisfied(self, name):
+        """Record that a step was completed or skipped. Returns the steps whose last dependency it was."""
+        ready = []
+        for dependent in self.dependents.get(name, ()):
+            self.waiting[dependent] -= 1
+            if self.waiting[dependent] == 0:
+                self.ready[dependent] = self.positions[dependent]
+                ready.append(dependent)
+        return ready
+
+    def started(self, name):
+        """Record that a step left the pending status."""
+        self.ready.pop(name, None)
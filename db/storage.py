@@ -0,0 +1,196 @@
+"""
+Storage backend interface.
+
+Models and the database manager read and write pipelines only through a StorageBackend, so the
+store can be swapped: db.database.Database keeps them in one SQLite file, db.memoryStorage in
+process memory and db.shardedDatabase across several SQLite files.
+
+Rows are mappings from column name to value, with the columns of the workflow_entities,
+workflow_steps and workflow_logs tables. Writes arrive as EntityChanges, one per entity save.
+"""
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from db.unitOfWork import UnitOfWork
+from db.workflowStep import STEP_COLUMNS
+
+# Listing filters on timestamps: filter name -> (column, comparison)
+DATE_FILTERS = {
+    "created_after": ("created_at", ">="),
+    "created_before": ("created_at", "<"),
+    "updated_after": ("updated_at", ">="),
+    "updated_before": ("updated_at", "<"),
+}
+
+# Columns listings can filter on by value, or by a list of values
+FILTER_COLUMNS = ("id", "name", "config_name", "status")
+
+# Columns of a workflow_steps row, in the order of EntityChanges.new_steps values
+STEP_ROW_COLUMNS = ("entity_id", "position") + STEP_COLUMNS
+
+class ConcurrentUpdateError(ValueError):
+    """Raised when a save finds its pipeline changed or deleted by another writer since it was loaded."""
+
+    def __init__(self, entity_id, name):
+        """Initialize the error with the ID and name of the pipeline."""
+        self.entity_id = entity_id
+        self.name = name
+        super().__init__(f"Pipeline '{name or entity_id}' was changed by another request. Reload it and try again.")
+
+def check_new_names(changes):
+    """Raise ValueError if EntityChanges written together create two entities with the same name."""
+    names = set()
+    for entity_changes in changes:
+        if entity_changes.insert and entity_changes.name is not None:
+            if entity_changes.name in names:
+                raise ValueError(f"Pipeline name '{entity_changes.name}' is used by more than one new pipeline")
+            names.add(entity_changes.name)
+
+def stored_value(value):
+    """Stored value of a filter value: enums are stored by value."""
+    return value.value if isinstance(value, Enum) else value
+
+def sort_key(column):
+    """Key sorting rows by a column the way SQLite does, NULLs first."""
+    return lambda row: (row[column] is not None, row[column])
+
+class EntityChanges:
+    """Rows written by one entity save."""
+
+    __slots__ = ("entity_id", "name", "insert", "version", "columns", "new_steps", "step_updates", "new_logs")
+
+    def __init__(self, entity_id, name, insert, columns, new_steps=(), step_updates=None, new_logs=(), version=None):
+        """Initialize the changes.
+
+        `columns` maps workflow_entities columns to their new values, including the next version;
+        an insert has all of them and replaces any entity with the same name. An update is only
+        written if the stored row still has `version`, the one the entity was loaded with.
+        `new_steps` are full workflow_steps rows to upsert, `step_updates` maps a tuple of changed
+        step columns to rows of [values..., entity_id, name], and `new_logs` are
+        (entity_id, timestamp, level, message) rows to append.
+        """
+        self.entity_id = entity_id
+        self.name = name
+        self.insert = insert
+        self.columns = columns
+        self.new_steps = new_steps
+        self.step_updates = step_updates or {}
+        self.new_logs = new_logs
+        self.version = version
+
+class StorageBackend:
+    """Store of workflow entities, their steps and their logs."""
+
+    def __init__(self, codec=None):
+        """Initialize the backend. Large context and log values are compressed with `codec` if given."""
+        self.codec = codec
+        self.commit_count = 0
+        # Approximate bytes written by entity saves, and saves skipped because nothing changed
+        self.bytes_written = 0
+        self.skipped_saves = 0
+        self._local = threading.local()
+
+    # ================== Units of work ==================
+
+    @contextmanager
+    def unit_of_work(self):
+        """Collect entity saves made in this thread and write them in one transaction at the end.
+
+        Nested calls join the outer unit of work. Nothing is written if the block raises.
+        """
+        uow = self.current_unit_of_work()
+        if uow is not None:
+            yield uow
+            return
+
+        uow = UnitOfWork(self)
+        self._local.uow = uow
+        try:
+            yield uow
+        finally:
+            self._local.uow = None
+        uow.flush()
+
+    def current_unit_of_work(self):
+        """Get the unit of work open in this thread, if any."""
+        return getattr(self._local, "uow", None)
+
+    # ================== Reads ==================
+
+    @contextmanager
+    def reading(self):
+        """Group reads so they see a single consistent snapshot, where the backend supports it."""
+        yield self
+
+    def get_entity_row(self, column, value):
+        """Get the entity row whose `column` ("id" or "name") has a value, or None."""
+        raise NotImplementedError
+
+    def get_updated_at(self, entity_id):
+        """Get the updated_at of an entity without reading the rest of its row, or None."""
+        raise NotImplementedError
+
+    def select_rows(self, filters=None, columns=None, order_by=None, limit=None):
+        """Get the entity rows matching listing filters, ordered by a column if given.
+
+        With `columns` the rows are dicts of those columns only.
+        """
+        raise NotImplementedError
+
+    def page_rows(self, filters, columns, limit, cursor=None):
+        """Get an iterator over up to limit + 1 rows after a page cursor, most recently updated first.
+
+        The rows are dicts of `columns`, which must include updated_at and id. Raises ValueError
+        for an invalid cursor.
+        """
+        raise NotImplementedError
+
+    def load_steps(self, entity_ids):
+        """Get the step rows of entities, by entity ID, in step order."""
+        raise NotImplementedError
+
+    def load_logs(self, entity_ids):
+        """Get the log rows of entities, by entity ID, oldest first."""
+        raise NotImplementedError
+
+    def resolve_rows(self, identifier, limit):
+        """Get the rows an identifier refers to and how it matched them.
+
+        Returns (0, [row]) for an ID, (1, [row]) for a name, and otherwise (2, rows) with up to
+        `limit` rows whose description contains the identifier, by name.
+        """
+        row = self.get_entity_row("id", identifier)
+        if row is not None:
+            return 0, [row]
+        row = self.get_entity_row("name", identifier)
+        if row is not None:
+            return 1, [row]
+        return 2, self.select_rows({"description": identifier}, order_by="name", limit=limit)
+
+    # ================== Writes ==================
+
+    def apply(self, changes):
+        """Write the EntityChanges of one or more saves in a single transaction.
+
+        Raises ConcurrentUpdateError, writing nothing, if an updated entity's stored version is not
+        the one it was loaded with.
+        """
+        raise NotImplementedError
+
+    def delete_entities(self, keys):
+        """Delete entities, with their steps and logs, given as (id, updated_at) pairs.
+
+        Entities updated since are kept. Returns the ids of the deleted entities.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release the backend's resources."""
+
+    def __enter__(self):
+        """Context manager enter method."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit method."""
+        self.close()
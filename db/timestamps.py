@@ -0,0 +1,37 @@
+"""
+Compact in-memory storage of timestamps.
+
+Timestamps are ISO 8601 strings in the database and in the models' interface. Models keep them
+packed as integer microseconds since the epoch (32 bytes instead of about 70 for the string) and turn
+them back into the same string when read. Strings that wouldn't come back unchanged, such as ones
+with a time zone, are kept as they are.
+"""
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+def _is_canonical(value):
+    """Whether a string has the exact layout datetime.isoformat() gives naive timestamps."""
+    if len(value) == 26:
+        # isoformat() leaves out zero microseconds
+        if value[19] != "." or value.endswith("000000"):
+            return False
+    elif len(value) != 19:
+        return False
+    return value[4] == value[7] == "-" and value[10] == "T" and value[13] == value[16] == ":"
+
+def pack(value):
+    """Get the compact form of an ISO timestamp string, or the value itself if it has none."""
+    if not isinstance(value, str) or not _is_canonical(value):
+        return value
+    try:
+        return (datetime.fromisoformat(value) - EPOCH) // MICROSECOND
+    except ValueError:
+        return value
+
+def unpack(value):
+    """Get the ISO timestamp string of a packed value."""
+    if value is None or isinstance(value, str):
+        return value
+    return (EPOCH + timedelta(microseconds=value)).isoformat()
@@ -0,0 +1,34 @@
+"""
+Unit of work that collects entity saves and flushes them in one transaction.
+"""
+
+class UnitOfWork:
+    """Entities saved while the unit of work is open, written together when it closes."""
+
+    def __init__(self, db):
+        """Initialize the unit of work for a database."""
+        self.db = db
+        self._pending = {}  # entity id -> entity, in first-save order
+
+    def register(self, entity):
+        """Defer the write of an entity until flush."""
+        self._pending.setdefault(entity.id, entity)
+
+    @property
+    def pending(self):
+        """Entities waiting to be written."""
+        return list(self._pending.values())
+
+    def flush(self):
+        """Write all pending entities in a single transaction."""
+        entities = [entity for entity in self.pending if entity.has_changes()]
+        self.db.skipped_saves += len(self._pending) - len(entities)
+        self._pending = {}
+        if not entities:
+            return
+
+        prepared = [(entity, *entity._changes()) for entity in entities]
+        self.db.apply([changes for _, changes, _ in prepared])
+
+        for entity, _, state in prepared:
+            entity._mark_persisted(state)
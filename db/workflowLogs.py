@@ -0,0 +1,76 @@
+"""
+Columnar storage of pipeline logs.
+"""
+import sys
+from array import array
+from db.timestamps import pack, unpack
+
+class WorkflowLogs:
+    """Log entries of a pipeline, kept as one column per field.
+
+    Reads like a list of {"timestamp", "level", "message"} dicts. Timestamps are packed into an
+    array of integers and levels are interned, so an entry costs little more than its message.
+    """
+
+    __slots__ = ("_timestamps", "_levels", "_messages")
+
+    def __init__(self, entries=()):
+        """Initialize the logs with entries given as dicts."""
+        self._timestamps = array("q")
+        self._levels = []
+        self._messages = []
+        self.extend(entries)
+
+    def add(self, timestamp, level, message):
+        """Append an entry."""
+        packed = pack(timestamp)
+        if not isinstance(packed, int) and isinstance(self._timestamps, array):
+            # Timestamps that can't be packed are kept as they are
+            self._timestamps = list(self._timestamps)
+        self._timestamps.append(packed)
+        self._levels.append(sys.intern(level))
+        self._messages.append(message)
+
+    def append(self, entry):
+        """Append an entry given as a dict."""
+        self.add(entry["timestamp"], entry["level"], entry["message"])
+
+    def extend(self, entries):
+        """Append entries given as dicts."""
+        for entry in entries:
+            self.add(entry["timestamp"], entry["level"], entry["message"])
+
+    def copy(self):
+        """Copy the logs without unpacking them."""
+        logs = WorkflowLogs()
+        logs._timestamps = self._timestamps[:]
+        logs._levels = self._levels[:]
+        logs._messages = self._messages[:]
+        return logs
+
+    def _entry(self, index):
+        return {
+            "timestamp": unpack(self._timestamps[index]),
+            "level": self._levels[index],
+            "message": self._messages[index]
+        }
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(len(self)))]
+        return self._entry(range(len(self))[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._entry(index)
+
+    def __eq__(self, other):
+        if isinstance(other, (WorkflowLogs, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"WorkflowLogs({list(self)!r})"
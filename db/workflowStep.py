@@ -7,9 +7,12 @@ Database models for the workflow step.
 # from datetime import datetime
 # import os
 # import threading
+import copy
+import sys
 from enum import Enum
-from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
+from db.serializer import dumps, loads
+from db.timestamps import pack, unpack
 
 class StepStatus(Enum):
     PENDING = "pending"
@@ -19,26 +22,117 @@ class StepStatus(Enum):
     FAILED = "failed"
     SKIPPED = "skipped"
 
-@dataclass
+# Fields stored in workflow_steps, in column order
+STEP_COLUMNS = (
+    "name", "instructions", "mcp_server_config", "status", "result", "error", "started_at", "completed_at",
+    "depends_on"
+)
+
+# Fields stored in workflow_steps that can change after the step is created
+STEP_TRACKED_FIELDS = frozenset({
+    "instructions", "mcp_server_config", "status", "result", "error", "started_at", "completed_at"
+})
+
+# Changed fields of a clean step; shared, a set is only created once a field changes
+_CLEAN = frozenset()
+
 class WorkflowStep:
     """Individual workflow step configuration and state"""
-    name: str
-    instructions: str
-    mcp_server_config: Optional[Dict[str, Any]] = None 
-    status: StepStatus = StepStatus.PENDING
-    result: Optional[str] = None
-    error: Optional[str] = None
-    started_at: Optional[str] = None
-    completed_at: Optional[str] = None
 
+    # Timestamps are kept packed (see db.timestamps) and read as ISO strings
+    __slots__ = (
+        "name", "instructions", "mcp_server_config", "status", "result", "error",
+        "_started_at", "_completed_at", "depends_on", "_dirty"
+    )
+
+    def __init__(self, name: str, instructions: str, mcp_server_config: Optional[Dict[str, Any]] = None,
+                 status: StepStatus = StepStatus.PENDING, result: Optional[str] = None,
+                 error: Optional[str] = None, started_at: Optional[str] = None,
+                 completed_at: Optional[str] = None, depends_on: Optional[List[str]] = None):
+        """Initialize the step. Changes are tracked from here on.
+
+        `depends_on` names the steps it waits for; None waits for the step before it (see db.stepGraph).
+        """
+        set_field = object.__setattr__
+        # Step names repeat across every pipeline of a config
+        set_field(self, "name", sys.intern(name) if isinstance(name, str) else name)
+        set_field(self, "instructions", instructions)
+        set_field(self, "mcp_server_config", mcp_server_config)
+        set_field(self, "status", status)
+        set_field(self, "result", result)
+        set_field(self, "error", error)
+        set_field(self, "_started_at", pack(started_at))
+        set_field(self, "_completed_at", pack(completed_at))
+        set_field(self, "depends_on", tuple(dict.fromkeys(map(sys.intern, depends_on))) if depends_on is not None else None)
+        set_field(self, "_dirty", _CLEAN)
+
+    def __setattr__(self, name, value):
+        """Set a field and remember it changed since the step was last saved."""
+        if name in STEP_TRACKED_FIELDS and getattr(self, name) != value:
+            self.mark_dirty(name)
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, WorkflowStep):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in STEP_COLUMNS)
+        return f"WorkflowStep({fields})"
+
+    @property
+    def started_at(self):
+        return unpack(self._started_at)
+
+    @started_at.setter
+    def started_at(self, value):
+        self._started_at = pack(value)
+
+    @property
+    def completed_at(self):
+        return unpack(self._completed_at)
+
+    @completed_at.setter
+    def completed_at(self, value):
+        self._completed_at = pack(value)
+
+    def copy(self):
+        """Copy the step, with its unsaved changes."""
+        step = object.__new__(WorkflowStep)
+        for field in self.__slots__:
+            object.__setattr__(step, field, getattr(self, field))
+        object.__setattr__(step, "mcp_server_config", copy.deepcopy(self.mcp_server_config))
+        if self._dirty is not _CLEAN:
+            object.__setattr__(step, "_dirty", set(self._dirty))
+        return step
+
+    @property
+    def dirty_fields(self):
+        """Fields changed since the step was last saved."""
+        return frozenset(self._dirty)
+
+    def mark_dirty(self, *fields):
+        """Flag fields as changed, e.g. after mutating mcp_server_config in place."""
+        if self._dirty is _CLEAN:
+            self._dirty = set()
+        self._dirty.update(fields)
+
+    def mark_clean(self, fields=None):
+        """Forget the changes of the given fields, or of all fields, once they are saved."""
+        if fields is not None and self._dirty is not _CLEAN:
+            self._dirty.difference_update(fields)
+        if fields is None or not self._dirty:
+            self._dirty = _CLEAN
     
     @classmethod
-    def from_config(cls, config):
-        
+    def from_config(cls, config, depends_on=None):
+        """Create a pending step from its config, waiting for the steps in `depends_on` or for the step before it."""
         return WorkflowStep(
             name=config["id"],
             instructions=config.get("instructions", ""),
-            mcp_server_config=config.get("action")
+            mcp_server_config=copy.deepcopy(config.get("action")),
+            depends_on=depends_on
         )
     
     def to_dict(self):
@@ -51,5 +145,38 @@ class WorkflowStep:
             "result": self.result,
             "error": self.error,
             "started_at": self.started_at,
-            "completed_at": self.completed_at
-        }
\ No newline at end of file
+            "completed_at": self.completed_at,
+            "depends_on": list(self.depends_on) if self.depends_on is not None else None
+        }
+
+    def stored_value(self, field):
+        """Value of a field as stored in workflow_steps."""
+        value = getattr(self, field)
+        if field == "status":
+            return value.value
+        if field in ("mcp_server_config", "depends_on"):
+            return dumps(value) if value is not None else None
+        return value
+
+    def to_row(self):
+        """Stored values of the step, in STEP_COLUMNS order."""
+        values = self.to_dict()
+        for field in ("mcp_server_config", "depends_on"):
+            if values[field] is not None:
+                values[field] = dumps(values[field])
+        return tuple(values[column] for column in STEP_COLUMNS)
+
+    @classmethod
+    def from_row(cls, row):
+        """Create a step from a workflow_steps row."""
+        return cls(
+            name=row["name"],
+            instructions=row["instructions"],
+            mcp_server_config=loads(row["mcp_server_config"]) if row["mcp_server_config"] else None,
+            status=StepStatus(row["status"]),
+            result=row["result"],
+            error=row["error"],
+            started_at=row["started_at"],
+            completed_at=row["completed_at"],
+            depends_on=loads(row["depends_on"]) if row["depends_on"] else None
+        )
@@ -1,12 +1,46 @@
+import os
 from mcp.server.fastmcp import FastMCP
 from helpers import make_nws_request, format_alert
 from pipelineMGMT.manager import WorkflowManager
+from pipelineMGMT.asyncManager import AsyncWorkflowManager, DEFAULT_DB_WORKERS, DEFAULT_DB_WRITERS
 from pipelineMGMT.configManager import ConfigManager
+from pipelineMGMT.mcpClientPool import MCPClientPool, DEFAULT_CALLS_PER_SERVER, DEFAULT_IDLE_TIMEOUT
+from db.models import parse_status_filter
+from db.pagination import DEFAULT_PAGE_SIZE
+from db.archive import ArchiveJob
+from db.codec import BlobCodec
+from db.shardedDatabase import DEFAULT_SHARDS
 from mcp.server.fastmcp.prompts.prompt_manager import Prompt
 
 mcp = FastMCP("gpmgmt")
-workflowManager = WorkflowManager()
-configManager = ConfigManager()
+# Set GPMGMT_COMPRESS_THRESHOLD to compress contexts and log messages larger than that many bytes
+compressThreshold = os.environ.get("GPMGMT_COMPRESS_THRESHOLD")
+# Set GPMGMT_DB_PATH to keep pipelines in another database file, GPMGMT_STORAGE to "memory" or "sharded"
+# (with GPMGMT_SHARDS files) to change where pipelines are kept
+workflowManager = WorkflowManager(
+    db_path=os.environ.get("GPMGMT_DB_PATH", "workflows.db"),
+    codec=BlobCodec(int(compressThreshold)) if compressThreshold else None,
+    storage=os.environ.get("GPMGMT_STORAGE", "sqlite"),
+    shards=int(os.environ.get("GPMGMT_SHARDS", DEFAULT_SHARDS)),
+    # Automated steps keep a session per downstream MCP server, running GPMGMT_MCP_CALLS_PER_SERVER calls at once
+    # and closed after GPMGMT_MCP_IDLE_TIMEOUT seconds unused
+    mcp_clients=MCPClientPool(
+        max_calls_per_server=int(os.environ.get("GPMGMT_MCP_CALLS_PER_SERVER", DEFAULT_CALLS_PER_SERVER)),
+        idle_timeout=float(os.environ.get("GPMGMT_MCP_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT))
+    )
+)
+# Tools await database work on GPMGMT_DB_WORKERS read and GPMGMT_DB_WRITERS write threads instead of blocking the event loop
+asyncWorkflowManager = AsyncWorkflowManager(
+    workflowManager,
+    max_workers=int(os.environ.get("GPMGMT_DB_WORKERS", DEFAULT_DB_WORKERS)),
+    max_writers=int(os.environ.get("GPMGMT_DB_WRITERS", DEFAULT_DB_WRITERS))
+)
+# Set GPMGMT_WATCH_CONFIGS=1 to reload workflow configs in the background instead of on every request
+configManager = ConfigManager(watch=os.environ.get("GPMGMT_WATCH_CONFIGS") == "1")
+# Set GPMGMT_RETENTION_DAYS to archive finished pipelines not updated for that many days in the background
+if os.environ.get("GPMGMT_RETENTION_DAYS"):
+    archiveJob = ArchiveJob(workflowManager.db_manager, float(os.environ["GPMGMT_RETENTION_DAYS"]))
+    archiveJob.start()
 
 # PROMPTS
 @mcp.prompt()
@@ -33,16 +67,24 @@ async def get_available_workflows() -> str:
 @mcp.tool()
 async def get_details_for_workflow(config_name: str) -> str:
     """Get details for the launch_result."""
-    workflows = configManager.load_workflow_configs()
-
-    filtered_configs = [config for config in workflows if config.get("name", "NA") == config_name]
+    matches = configManager.count_workflow_configs(config_name)
 
-    if len(filtered_configs) < 1:
+    if matches < 1:
         return f"Workflow '{config_name}' not found."
-    elif len(filtered_configs) > 1:
+    elif matches > 1:
         return f"Multiple workflows found with the name '{config_name}'. Please specify a unique name."
     
-    return f"{filtered_configs[0]}\n"
+    return f"{configManager.get_workflow_config(config_name)}\n"
+
+@mcp.tool()
+async def get_workflow_config_errors() -> str:
+    """Get the errors of workflow configuration files that failed to load. Broken files keep serving their last valid version."""
+    errors = configManager.get_config_errors()
+
+    if not errors:
+        return "All workflow configurations loaded successfully."
+
+    return "\n".join(f"{path}: {error}" for path, error in sorted(errors.items()))
 
 @mcp.tool()
 async def create_pipeline(config_name: str, custom_name: str) -> str:
@@ -54,7 +96,7 @@ async def create_pipeline(config_name: str, custom_name: str) -> str:
         return "Custom name for the pipeline is required."
 
     try:
-        launch_result = workflowManager.create_workflow(config_name, custom_name)
+        launch_result = await asyncWorkflowManager.create_workflow(config_name, custom_name)
 
         return f"""{launch_result["id"]}""" #tmp
     except ValueError as e:
@@ -64,18 +106,47 @@ async def create_pipeline(config_name: str, custom_name: str) -> str:
 
 #@mcp.resource("resource://active-pipelines")
 @mcp.tool()
-async def list_active_pipelines() -> str:
-    """List all active pipelines(workflows)."""
-    pipelines = workflowManager.list_workflows()
+async def list_active_pipelines(
+    status: str = "active",
+    config_name: str = "",
+    updated_after: str = "",
+    updated_before: str = "",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = ""
+) -> str:
+    """List pipelines(workflows), most recently updated first, one page at a time.
+
+    status: "active" (created or running), "all", or a comma-separated list such as "completed,cancelled".
+    config_name: only pipelines created from this workflow configuration.
+    updated_after / updated_before: ISO dates or timestamps, e.g. 2025-01-31.
+    limit: pipelines per page. cursor: the "Next cursor" value of the previous page.
+    """
+    try:
+        filters = {}
+        statuses = parse_status_filter(status)
+        if statuses is not None:
+            filters["status"] = statuses
+        if config_name:
+            filters["config_name"] = config_name
+        if updated_after:
+            filters["updated_after"] = updated_after
+        if updated_before:
+            filters["updated_before"] = updated_before
+
+        page = await asyncWorkflowManager.list_workflows_page(filters, limit, cursor or None)
+    except ValueError as e:
+        return f"Error listing pipelines: {str(e)}"
+
+    if not page["pipelines"]:
+        return "No pipelines found."
 
-    if not pipelines:
-        return "No active pipelines found."
-    
     result = []
-    for wf in pipelines:
+    for wf in page["pipelines"]:
         result.append(f"{wf['id']}: {wf['name']} - {wf['status']}")
-        result.append(f"Current step: {wf['current_step']}")
-    
+        result.append(f"Current step: {wf['current_step']} ({wf['steps_completed']}/{wf['steps_total']} steps completed)")
+    if page["next_cursor"]:
+        result.append(f"Next cursor: {page['next_cursor']}")
+
     return "\n".join(result)
 
 @mcp.tool()
@@ -83,9 +154,16 @@ async def launch_pipeline(pipepline_id: str) -> str:
     """Launch pipeline with the given name. Then execute the instructions for the first step returned in the response."""
 
     try:
-        launch_result = workflowManager.launch_workflow(pipepline_id)
-        
-        return f"""The following instructions to be executed: {launch_result["step_execution"]["instructions"]}"""
+        launch_result = await asyncWorkflowManager.launch_workflow(pipepline_id)
+        if "error" in launch_result:
+            return f"Error launching pipeline: {launch_result['error']}"
+
+        step_execution = launch_result["step_execution"]
+        if "error" in step_execution:
+            return f"Error executing the first step: {step_execution['error']}"
+        if "result" in step_execution:
+            return f"""The first step '{step_execution["step"].name}' was executed automatically. Result: {step_execution["result"]}"""
+        return f"""The following instructions to be executed: {step_execution["instructions"]}"""
     
     except ValueError as e:
         return f"Error launching pipeline: {str(e)}"
@@ -99,7 +177,7 @@ async def update_pipeline_context(pipepline_id: str, context: dict = None) -> st
         context = {}
 
     try:
-        update_result = workflowManager.update_workflow(pipepline_id, context)
+        update_result = await asyncWorkflowManager.update_workflow(pipepline_id, context)
         return f"""Pipeline '{update_result["name"]}' updated successfully."""
     except ValueError as e:
         return f"Error updating pipeline: {str(e)}"
@@ -110,22 +188,80 @@ async def update_pipeline_context(pipepline_id: str, context: dict = None) -> st
 async def cancel_pipeline(pipepline_id: str, reason: str = None) -> str:
     """Cancel pipeline with the reason(optional)."""
     try:
-        cancel_result = workflowManager.cancel_workflow(pipepline_id, reason)
+        cancel_result = await asyncWorkflowManager.cancel_workflow(pipepline_id, reason)
         return f"""Pipeline '{cancel_result["name"]}' has been cancelled successfully."""
     except ValueError as e:
         return f"Error cancelling pipeline: {str(e)}"
     except Exception as e:
         return f"Unexpected error: {str(e)}"
     
+# BULK PIPELINE TOOLS
+@mcp.tool()
+async def create_pipelines(config_name: str, pipelines: list[str | dict]) -> str:
+    """Create many pipelines based on the workflow configuration with the provided config_name, in one transaction. Each item is a custom pipeline name, or an object with a "name" and an optional "context". Returns the new pipeline IDs, one per line."""
+    if not config_name:
+        return "Workflow configuration name is required."
+
+    if not pipelines:
+        return "At least one pipeline is required."
+
+    try:
+        creation_result = await asyncWorkflowManager.create_workflows_bulk(config_name, pipelines)
+        if "error" in creation_result:
+            return f"Error creating pipelines: {creation_result['error']}"
+        return "\n".join(f"{pipeline['id']}: {pipeline['name']}" for pipeline in creation_result["pipelines"])
+    except ValueError as e:
+        return f"Error creating pipelines: {str(e)}"
+    except Exception as e:
+        return f"Unexpected error: {str(e)}"
+
+@mcp.tool()
+async def complete_pipelines_current_step(pipeline_ids: list[str]) -> str:
+    """Complete the current step of many pipelines in one transaction and start their next steps. Pipelines without a next step are completed."""
+    try:
+        completion_result = await asyncWorkflowManager.complete_workflow_steps_bulk(pipeline_ids)
+        result = []
+        for pipeline in completion_result["pipelines"]:
+            if "error" in pipeline:
+                result.append(f"{pipeline['pipeline']}: error - {pipeline['error']}")
+            elif pipeline["next_step"]:
+                result.append(f"{pipeline['id']}: {pipeline['name']} - next step: {pipeline['next_step']}")
+            else:
+                result.append(f"{pipeline['id']}: {pipeline['name']} - completed")
+        return "\n".join(result)
+    except ValueError as e:
+        return f"Error completing steps: {str(e)}"
+    except Exception as e:
+        return f"Unexpected error: {str(e)}"
+
+@mcp.tool()
+async def cancel_pipelines(pipeline_ids: list[str], reason: str = None) -> str:
+    """Cancel many pipelines in one transaction with the reason(optional)."""
+    try:
+        cancel_result = await asyncWorkflowManager.cancel_workflows_bulk(pipeline_ids, reason)
+        result = []
+        for pipeline in cancel_result["pipelines"]:
+            if "error" in pipeline:
+                result.append(f"{pipeline['pipeline']}: error - {pipeline['error']}")
+            else:
+                result.append(f"{pipeline['id']}: {pipeline['name']} - cancelled")
+        return "\n".join(result)
+    except ValueError as e:
+        return f"Error cancelling pipelines: {str(e)}"
+    except Exception as e:
+        return f"Unexpected error: {str(e)}"
+
 # PIPELINE MGMT TOOLS
 @mcp.tool()
 async def get_execution_instructions(pipepline_id: str, step_id: str = None) -> str:
     """Get execution instructions for the step in the pipeline. Current step instructions will be returned if step_id is not provided."""
     try:
-        execution = workflowManager.execute_workflow_step(pipepline_id, step_id)
+        execution = await asyncWorkflowManager.execute_workflow_step(pipepline_id, step_id)
         if "error" in execution:
             return f"Error executing step: {execution['error']}"
-        
+        if "result" in execution:
+            return f"Step '{execution['step'].name}' was executed automatically. Result: {execution['result']}\nNext step: {execution['next_step']}"
+
         return f"Execute on your own the instructions provided in the response: {execution}.\n\n"
         
     except ValueError as e:
@@ -137,7 +273,7 @@ async def get_execution_instructions(pipepline_id: str, step_id: str = None) ->
 async def complete_pipeline_step(pipepline_id, step_name: str) -> str:
     """Complete the current step in the pipeline."""
     try:
-        step_completion_result = workflowManager.complete_workflow_step(pipepline_id, step_name)
+        step_completion_result = await asyncWorkflowManager.complete_workflow_step(pipepline_id, step_name)
         # return information about the completed step and further instructions if any. If the pipeline is finished, return a message indicating completion.
         return step_completion_result
         # return f"Step '{step_id}' in launch_result '{name}' has been marked as completed."
@@ -150,7 +286,7 @@ async def complete_pipeline_step(pipepline_id, step_name: str) -> str:
 async def complete_pipeline_current_step(pipepline_id) -> str:
     """Complete the current step in the pipeline."""
     try:
-        step_completion_result = workflowManager.complete_workflow_current_step(pipepline_id)
+        step_completion_result = await asyncWorkflowManager.complete_workflow_current_step(pipepline_id)
         # return information about the completed step and further instructions if any. If the pipeline is finished, return a message indicating completion.
         return step_completion_result
         # return f"Step '{step_id}' in launch_result '{name}' has been marked as completed."
@@ -163,15 +299,26 @@ async def complete_pipeline_current_step(pipepline_id) -> str:
 async def get_pipeline_logs(pipeline_id: str) -> str:
     """Return logs from pipeline entity (WorkflowEntity) stored in db."""
     try:
-        entity = workflowManager.db_manager.get_workflow_entity(pipeline_id)
-        if not entity:
+        logs = await asyncWorkflowManager.get_workflow_logs(pipeline_id)
+        if logs is None:
             return f"Pipeline with id {pipeline_id} not found."
-        logs = entity.logs
         if not logs:
             return "No logs found for this pipeline."
         return "\n".join(f"[{log['timestamp']}] {log['level']}: {log['message']}" for log in logs)
     except Exception as e:
         return f"Error retrieving logs: {str(e)}"
 
+@mcp.tool()
+async def get_pipeline_cache_stats() -> str:
+    """Get hit/miss statistics of the pipeline cache and write statistics since the server started."""
+    stats = asyncWorkflowManager.get_cache_stats()
+    # Tool calls run on the database threads, each with its own request counters; only the totals are shared
+    total, writes = stats["total"], stats["writes"]
+    return (
+        f"Cached pipelines: {stats['entries']}/{stats['max_entries']}\n"
+        f"Total: {total['hits']} hits, {total['misses']} misses (hit rate {total['hit_rate']:.1%})\n"
+        f"Writes: {writes['commits']} commits, {writes['bytes_written']} bytes, {writes['skipped_saves']} unchanged saves skipped"
+    )
+
 if __name__ == "__main__":
     mcp.run(transport='stdio')
\ No newline at end of file
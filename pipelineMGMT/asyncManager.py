@@ -0,0 +1,153 @@
+"""
+Async facade over the workflow manager for the MCP tools.
+
+WorkflowManager and the storage backends are synchronous: loading a pipeline reads the database
+and saving one commits. Called from an `async def` tool they block the event loop, so one slow
+commit delays every other client. AsyncWorkflowManager runs those calls on dedicated worker threads
+instead and awaits them. Calls that only read have a pool of their own, so they don't queue behind
+updates waiting for the database writer; the pool sizes bound how many calls run at once.
+
+Each call runs entirely on one worker thread, so its unit of work, request scope and reader
+connection stay in that thread as they do for synchronous callers.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads running read-only calls, which run in parallel on their own connections in WAL mode
+DEFAULT_DB_WORKERS = 4
+# Threads running calls that save pipelines. SQLite has one writer per file, so a few threads are
+# enough to prepare saves while another commits; sharded storage can use more.
+DEFAULT_DB_WRITERS = 2
+
+class AsyncWorkflowManager:
+    """Awaitable workflow manager operations, run on bounded pools of database threads."""
+
+    def __init__(self, workflow_manager, max_workers=DEFAULT_DB_WORKERS, max_writers=DEFAULT_DB_WRITERS):
+        """Initialize the facade over a WorkflowManager with `max_workers` read threads and `max_writers` write threads."""
+        if max_workers < 1 or max_writers < 1:
+            raise ValueError(f"The database pools need at least one thread each, not {max_workers} and {max_writers}")
+        self.workflow_manager = workflow_manager
+        self.max_workers = max_workers
+        self.max_writers = max_writers
+        self.read_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gpmgmt-db-read")
+        self.write_executor = ThreadPoolExecutor(max_workers=max_writers, thread_name_prefix="gpmgmt-db-write")
+
+    async def call(self, function, *args, **kwargs):
+        """Run a blocking function that may save pipelines on a write thread and wait for its result without blocking the event loop."""
+        return await self._run(self.write_executor, function, *args, **kwargs)
+
+    async def read(self, function, *args, **kwargs):
+        """Run a blocking function that only reads on a read thread and wait for its result without blocking the event loop."""
+        return await self._run(self.read_executor, function, *args, **kwargs)
+
+    async def _run(self, executor, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+    def close(self):
+        """Wait for running calls, stop the database threads and close the workflow manager."""
+        self.read_executor.shutdown(wait=True)
+        self.write_executor.shutdown(wait=True)
+        self.workflow_manager.close()
+
+    def __enter__(self):
+        """Context manager enter method."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit method."""
+        self.close()
+
+    # Workflow Entity Operations
+
+    async def create_workflow(self, workflow_config_name, custom_name=None, context=None):
+        """Create a pipeline from a workflow configuration."""
+        return await self.call(self.workflow_manager.create_workflow, workflow_config_name, custom_name, context)
+
+    async def launch_workflow(self, pipeline_id):
+        """Launch a pipeline. An automated first step calls its MCP tool."""
+        response = await self.call(self.workflow_manager.start_workflow, pipeline_id)
+        execution = response.get("step_execution")
+        if execution and ("action" in execution or execution.get("started_actions")):
+            response = self.workflow_manager.update_launch_response(response, await self.run_step_action(execution))
+        return response
+
+    async def get_workflow(self, identifier):
+        """Get a pipeline by ID, name, or description."""
+        return await self.read(self.workflow_manager.get_workflow, identifier)
+
+    async def get_workflow_logs(self, identifier):
+        """Get the logs of a pipeline, or None if it doesn't exist."""
+        return await self.read(self.workflow_manager.get_workflow_logs, identifier)
+
+    async def update_workflow(self, identifier, context):
+        """Update a pipeline's context."""
+        return await self.call(self.workflow_manager.update_workflow, identifier, context)
+
+    async def cancel_workflow(self, identifier, reason=None):
+        """Cancel a pipeline."""
+        return await self.call(self.workflow_manager.cancel_workflow, identifier, reason)
+
+    async def execute_workflow_step(self, pipeline_id, step_id=None):
+        """Execute a pipeline step. Automated steps call their MCP tool."""
+        execution = await self.call(self.workflow_manager.start_workflow_step, pipeline_id, step_id)
+        return await self.run_step_action(execution)
+
+    async def run_step_action(self, execution):
+        """Call the MCP tools of the automated steps an execution started and record their outcomes.
+
+        The tool calls are awaited on the MCP client pool, so they hold no database thread while they run.
+        """
+        manager = self.workflow_manager
+        executions = manager.action_executions(execution)
+        if not executions:
+            return execution
+
+        def submit(started):
+            future = manager.executor.submit_action(started["action"])
+            return asyncio.ensure_future(asyncio.wrap_future(future)), future
+
+        running = {}
+        for started in executions:
+            waiter, future = submit(started)
+            running[waiter] = (started, future)
+        outcomes = []
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in done:
+                started, future = running.pop(waiter)
+                outcome = await self.call(manager.finish_step_action, started, manager.executor.action_outcome(future))
+                outcomes.append((started, outcome))
+                for follow_up in outcome.pop("started_actions", ()):
+                    waiter, future = submit(follow_up)
+                    running[waiter] = (follow_up, future)
+        return manager.action_response(execution, outcomes)
+
+    async def complete_workflow_step(self, pipeline_id, step_name, result=None):
+        """Complete a pipeline step."""
+        return await self.call(self.workflow_manager.complete_workflow_step, pipeline_id, step_name, result)
+
+    async def complete_workflow_current_step(self, pipeline_id):
+        """Complete the current step of a pipeline."""
+        return await self.call(self.workflow_manager.complete_workflow_current_step, pipeline_id)
+
+    async def create_workflows_bulk(self, workflow_config_name, pipelines):
+        """Create many pipelines from one workflow configuration in a single transaction."""
+        return await self.call(self.workflow_manager.create_workflows_bulk, workflow_config_name, pipelines)
+
+    async def complete_workflow_steps_bulk(self, identifiers):
+        """Complete the current step of many pipelines in a single transaction."""
+        return await self.call(self.workflow_manager.complete_workflow_steps_bulk, identifiers)
+
+    async def cancel_workflows_bulk(self, identifiers, reason=None):
+        """Cancel many pipelines in a single transaction."""
+        return await self.call(self.workflow_manager.cancel_workflows_bulk, identifiers, reason)
+
+    async def list_workflows_page(self, filters=None, limit=None, cursor=None):
+        """List one page of pipelines, most recently updated first."""
+        return await self.read(self.workflow_manager.list_workflows_page, filters, limit, cursor)
+
+    def get_cache_stats(self):
+        """Get the pipeline cache statistics. Reads counters only, so it runs on the event loop."""
+        return self.workflow_manager.get_cache_stats()
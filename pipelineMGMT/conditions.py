@@ -0,0 +1,316 @@
+"""
+Compiled step conditions.
+
+A step's `completion` is either a description for the user ("User has to confirm ...") or a
+condition on the pipeline context that must hold before the step can be completed:
+
+- built-assets-location != null     comparisons: == != < > <= >= in, not in
+- approved and retries < 3          and / or / not, && / || / !, parentheses
+- owner.team == "core"              dotted context paths, as in instruction templates
+- ticket_number && approved         a name alone is true when its value is set and truthy
+
+Only a text using one of == != < > <= >= && || is read as a condition, so descriptions such as
+"Approved" or "Assets not in repo" stay descriptions.
+
+Literals are null, true, false, numbers, quoted strings and [lists]. `null` matches a missing
+key, None, an empty string and a parameter declaration still left in the context, such as
+{"type": "string", "required": true}.
+
+A condition may also be given as a dict in the ConditionEvaluator format, e.g.
+{"all": [{"parameter": "ticket_number", "operator": "!=", "value": ""}, {"step_completed": "build"}]}.
+
+Conditions are compiled once into predicate closures called as predicate(context, steps_status, outputs),
+where steps_status maps step names to status values and outputs maps step names to their outputs.
+"""
+import operator
+import os
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from pipelineMGMT.templates import _MISSING, Placeholder
+
+# Source text (or dict) of a step's condition and its compiled predicate
+CompiledCondition = namedtuple("CompiledCondition", ["source", "predicate"])
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)(?![\w\-])
+      | (?P<string>"[^"]*"|'[^']*')
+      | (?P<symbol>==|!=|<=|>=|&&|\|\||[<>!()\[\],])
+      | (?P<name>[A-Za-z_][\w\-]*(?:\.[\w\-]+)*)
+    )""", re.VERBOSE)
+# A completion text using one of these is meant as a condition, so it must compile
+CONDITION_SYMBOLS = re.compile(r"==|!=|<=|>=|&&|\|\|")
+# A completion text without any of these is a description, even if it would parse as an expression
+EXPRESSION_SYMBOLS = re.compile(r"==|!=|<|>|&&|\|\|")
+
+COMPARISONS = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt, ">": operator.gt, "<=": operator.le, ">=": operator.ge,
+    "in": lambda actual, expected: actual in expected,
+    "not in": lambda actual, expected: actual not in expected
+}
+LITERALS = {"null": None, "none": None, "true": True, "false": False}
+KEYWORDS = {"and", "or", "not", "in"}
+
+def is_null(value):
+    """Whether a context value counts as unset."""
+    return value is None or value is _MISSING or value == "" or (isinstance(value, dict) and "type" in value and "required" in value)
+
+def _compare(compare, left, right):
+    """Apply a comparison, treating values that can't be compared as not matching."""
+    try:
+        return compare(left, right)
+    except TypeError:
+        return False
+
+class _ExpressionParser:
+    """Recursive descent parser turning a condition expression into a predicate closure."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = TOKEN_PATTERN.match(text, position)
+            if not match:
+                raise ValueError(f"Unexpected '{text[position:].strip()[:20]}' in condition '{self.text}'")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "name" and value.lower() in LITERALS:
+                kind, value = "literal", LITERALS[value.lower()]
+            elif kind == "name" and value in KEYWORDS:
+                kind = "keyword"
+            elif kind == "number":
+                kind, value = "literal", float(value) if "." in value else int(value)
+            elif kind == "string":
+                kind, value = "literal", value[1:-1]
+            self.tokens.append((kind, value))
+            position = match.end()
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Empty condition")
+        predicate = self._or()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.position][1]}' in condition '{self.text}'")
+        return predicate
+
+    def _peek(self, *values):
+        if self.position < len(self.tokens) and self.tokens[self.position][0] in ("keyword", "symbol"):
+            if self.tokens[self.position][1] in values:
+                return self.tokens[self.position][1]
+        return None
+
+    def _take(self):
+        if self.position >= len(self.tokens):
+            raise ValueError(f"Condition '{self.text}' ends unexpectedly")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _expect(self, value):
+        if self._take()[1] != value:
+            raise ValueError(f"Expected '{value}' in condition '{self.text}'")
+
+    def _or(self):
+        predicates = [self._and()]
+        while self._peek("or", "||"):
+            self.position += 1
+            predicates.append(self._and())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda context: any(predicate(context) for predicate in predicates)
+
+    def _and(self):
+        predicates = [self._not()]
+        while self._peek("and", "&&"):
+            self.position += 1
+            predicates.append(self._not())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda context: all(predicate(context) for predicate in predicates)
+
+    def _not(self):
+        if self._peek("not", "!"):
+            self.position += 1
+            predicate = self._not()
+            return lambda context: not predicate(context)
+        return self._comparison()
+
+    def _comparison(self):
+        if self._peek("("):
+            self.position += 1
+            predicate = self._or()
+            self._expect(")")
+            return predicate
+
+        left = self._operand()
+        symbol = self._peek(*COMPARISONS, "not")
+        if symbol == "not":
+            self.position += 1
+            self._expect("in")
+            symbol = "not in"
+        elif symbol is None:
+            # A name alone: set and truthy
+            def predicate(context):
+                value = left(context)
+                return not is_null(value) and bool(value)
+            return predicate
+        else:
+            self.position += 1
+        right = self._operand()
+        return self._compile_comparison(symbol, left, right)
+
+    def _compile_comparison(self, symbol, left, right):
+        constant = getattr(right, "constant", _MISSING)
+        if symbol in ("==", "!=") and constant is None:
+            if symbol == "==":
+                return lambda context: is_null(left(context))
+            return lambda context: not is_null(left(context))
+
+        compare = COMPARISONS[symbol]
+        if constant is not _MISSING:
+            # The common case of a name compared with a literal
+            def predicate(context):
+                actual = left(context)
+                return False if actual is _MISSING else _compare(compare, actual, constant)
+            return predicate
+
+        def predicate(context):
+            actual = left(context)
+            expected = right(context)
+            return False if actual is _MISSING or expected is _MISSING else _compare(compare, actual, expected)
+        return predicate
+
+    def _operand(self):
+        kind, value = self._take()
+        if kind == "literal":
+            return self._constant(value)
+        if kind == "name":
+            return Placeholder(value, value).resolve
+        if value == "[":
+            items = []
+            while not self._peek("]"):
+                item_kind, item = self._take()
+                if item_kind != "literal":
+                    raise ValueError(f"Lists in condition '{self.text}' may only hold literals")
+                items.append(item)
+                if not self._peek("]"):
+                    self._expect(",")
+            self.position += 1
+            return self._constant(items)
+        raise ValueError(f"Unexpected '{value}' in condition '{self.text}'")
+
+    @staticmethod
+    def _constant(value):
+        operand = lambda context: value
+        operand.constant = value
+        return operand
+
+@lru_cache(maxsize=4096)
+def compile_expression(text):
+    """Compile a condition expression into a cached predicate(context, steps_status=None, outputs=None).
+
+    Raises ValueError if the text is not a valid expression.
+    """
+    predicate = _ExpressionParser(text).parse()
+    return lambda context, steps_status=None, outputs=None: predicate(context)
+
+def compile_condition(condition):
+    """Compile a condition expression, dict, list of conditions or bool into a predicate(context, steps_status, outputs).
+
+    Raises ValueError for conditions that can't be compiled.
+    """
+    if isinstance(condition, bool):
+        return lambda context, steps_status=None, outputs=None: condition
+    if isinstance(condition, str):
+        return compile_expression(condition)
+    if isinstance(condition, list):
+        return _all([compile_condition(item) for item in condition])
+    if not isinstance(condition, dict):
+        raise ValueError(f"A condition must be an expression, a dict or a list, not {condition!r}")
+
+    if "all" in condition:
+        return _all([compile_condition(item) for item in condition["all"]])
+    if "any" in condition:
+        predicates = [compile_condition(item) for item in condition["any"]]
+        return lambda context, steps_status=None, outputs=None: any(
+            predicate(context, steps_status, outputs) for predicate in predicates
+        )
+    if "not" in condition:
+        negated = compile_condition(condition["not"])
+        return lambda context, steps_status=None, outputs=None: not negated(context, steps_status, outputs)
+
+    if "parameter" in condition:
+        compare = COMPARISONS.get(condition.get("operator"))
+        if compare is None:
+            raise ValueError(f"Unknown condition operator {condition.get('operator')!r}")
+        param = condition["parameter"]
+        expected = condition.get("value")
+        return lambda context, steps_status=None, outputs=None: _compare(compare, context.get(param), expected)
+
+    if "step_completed" in condition:
+        step = condition["step_completed"]
+        return lambda context, steps_status=None, outputs=None: (steps_status or {}).get(step) == "completed"
+
+    if "file_exists" in condition:
+        path = condition["file_exists"]
+        return lambda context, steps_status=None, outputs=None: os.path.exists(path)
+
+    if "output_available" in condition:
+        step_id, _, output_key = condition["output_available"].partition(".")
+        return lambda context, steps_status=None, outputs=None: (outputs or {}).get(step_id, {}).get(output_key) is not None
+
+    if "time_elapsed" in condition:
+        after_step = condition["time_elapsed"]["after_step"]
+        delta = timedelta(minutes=condition["time_elapsed"]["minutes"])
+
+        def elapsed(context, steps_status=None, outputs=None):
+            ref_time = context.get("step_start_times", {}).get(after_step)
+            return bool(ref_time) and datetime.utcnow() >= datetime.fromisoformat(ref_time) + delta
+        return elapsed
+
+    # external_check is a placeholder without a service to ask, like unknown conditions
+    return lambda context, steps_status=None, outputs=None: False
+
+def _all(predicates):
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda context, steps_status=None, outputs=None: all(
+        predicate(context, steps_status, outputs) for predicate in predicates
+    )
+
+def completion_condition(completion):
+    """Compile a step's `completion` into a CompiledCondition, or None when it is a description for the user.
+
+    Raises ValueError for a completion that looks like an expression but doesn't compile.
+    """
+    if completion is None:
+        return None
+    if isinstance(completion, str):
+        if not EXPRESSION_SYMBOLS.search(completion):
+            return None
+        try:
+            return CompiledCondition(completion, compile_expression(completion))
+        except ValueError:
+            # "Wait for > 5 approvals" is a description; "a == (b" is a broken condition
+            if CONDITION_SYMBOLS.search(completion):
+                raise
+            return None
+    try:
+        return CompiledCondition(completion, compile_condition(completion))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed condition {completion!r}: {e!r}")
+
+def step_conditions(config):
+    """Compile the completion conditions of a workflow configuration's steps: {step id: CompiledCondition}."""
+    conditions = {}
+    for step in config.get("steps", ()):
+        condition = completion_condition(step.get("completion"))
+        if condition is not None:
+            conditions[step["id"]] = condition
+    return conditions
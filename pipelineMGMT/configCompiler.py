@@ -0,0 +1,108 @@
+"""
+Compiler for workflow configurations into a single snapshot file that loads fast at startup.
+
+Usage: python -m pipelineMGMT.configCompiler [workflows_dir] [-o output_file]
+"""
+import argparse
+import hashlib
+import marshal
+import os
+import sys
+from collections import namedtuple
+
+from pipelineMGMT.parser import WorkflowParser
+
+SNAPSHOT_FILENAME = ".gpmgmt-configs.bin"
+SNAPSHOT_MAGIC = b"GPMC"
+SNAPSHOT_FORMAT_VERSION = 3
+
+# configs: {file hash: config}, files: {path relative to the workflows dir: (mtime_ns, size, file hash)}
+CompiledConfigs = namedtuple("CompiledConfigs", ["configs", "files"])
+EMPTY_COMPILED_CONFIGS = CompiledConfigs({}, {})
+
+def file_hash(data):
+    """Hash the raw bytes of a workflow configuration file."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def default_snapshot_path(workflows_dir):
+    """Get the default snapshot location for a workflows directory."""
+    return os.path.join(workflows_dir, SNAPSHOT_FILENAME)
+
+def compile_workflow_configs(workflows_dir, output_path=None):
+    """Validate all configurations in a directory and write them to a snapshot file keyed by file hash.
+
+    The snapshot also records the mtime and size of every file so that unchanged files can be
+    matched without reading them.
+
+    Returns a tuple of (number of compiled configs, {file path: error}).
+    """
+    output_path = output_path or default_snapshot_path(workflows_dir)
+    compiled = {}
+    files = {}
+    errors = {}
+
+    def load_with_hash(file_path):
+        stat = os.stat(file_path)
+        with open(file_path, "rb") as f:
+            digest = file_hash(f.read())
+        return stat, digest, WorkflowParser.load_workflow_config(file_path)
+
+    prefix = os.path.join(workflows_dir, "")
+    report = WorkflowParser.load_files(WorkflowParser.find_workflow_files(workflows_dir), loader=load_with_hash)
+    for result in report.files:
+        if result.ok:
+            stat, digest, config = result.config
+            compiled[digest] = config
+            files[result.path[len(prefix):]] = (stat.st_mtime_ns, stat.st_size, digest)
+        else:
+            errors[result.path] = result.error
+
+    payload = marshal.dumps({"marshal_version": marshal.version, "configs": compiled, "files": files})
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_FORMAT_VERSION]) + payload)
+    os.replace(tmp_path, output_path)
+
+    return len(compiled), errors
+
+def load_compiled_configs(snapshot_path):
+    """Load a snapshot file as CompiledConfigs. Missing or incompatible snapshots load as empty."""
+    try:
+        with open(snapshot_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return EMPTY_COMPILED_CONFIGS
+
+    header_size = len(SNAPSHOT_MAGIC) + 1
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC or data[len(SNAPSHOT_MAGIC):header_size] != bytes([SNAPSHOT_FORMAT_VERSION]):
+        return EMPTY_COMPILED_CONFIGS
+
+    try:
+        payload = marshal.loads(data[header_size:])
+    except (EOFError, ValueError, TypeError):
+        return EMPTY_COMPILED_CONFIGS
+
+    if payload.get("marshal_version") != marshal.version:
+        return EMPTY_COMPILED_CONFIGS
+    return CompiledConfigs(payload.get("configs", {}), payload.get("files", {}))
+
+def main(argv=None):
+    """Command line entry point."""
+    arg_parser = argparse.ArgumentParser(description="Validate workflow configurations and compile them into a snapshot file.")
+    arg_parser.add_argument("workflows_dir", nargs="?", default="workflows", help="Directory with workflow configuration files")
+    arg_parser.add_argument("-o", "--output", help=f"Snapshot file to write (default: <workflows_dir>/{SNAPSHOT_FILENAME})")
+    args = arg_parser.parse_args(argv)
+
+    if not os.path.isdir(args.workflows_dir):
+        print(f"Workflows directory not found: {args.workflows_dir}", file=sys.stderr)
+        return 2
+
+    count, errors = compile_workflow_configs(args.workflows_dir, args.output)
+    for file_path, error in sorted(errors.items()):
+        print(f"Invalid workflow config {file_path}: {error}", file=sys.stderr)
+    print(f"Compiled {count} workflow configs into {args.output or default_snapshot_path(args.workflows_dir)}")
+
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,21 +2,38 @@
 Manager for the workflow configurations.
 """
 
-from pipelineMGMT.parser import WorkflowParser
+from pipelineMGMT.configRegistry import ConfigRegistry
 
 class ConfigManager:
     """Manager for workflow configurations."""
 
-    def __init__(self, workflows_dir="workflows"):
-        """Initialize the config manager."""
+    def __init__(self, workflows_dir="workflows", watch=False, watch_interval=2.0):
+        """Initialize the config manager. With watch=True the configs are reloaded in the background."""
         self.workflows_dir = workflows_dir
+        self.registry = ConfigRegistry.for_directory(workflows_dir)
+        if watch:
+            self.registry.start_watching(watch_interval)
 
     def load_workflow_configs(self):
         """Load all workflow configurations from the workflows directory."""
-        return WorkflowParser.load_all_workflow_configs(self.workflows_dir)
+        return self.registry.get_all()
 
     def get_workflow_config(self, name):
         """Get a specific workflow configuration by name."""
-        configs = self.load_workflow_configs()
-        return next((config for config in configs if config.get("name") == name), None)
-    
\ No newline at end of file
+        return self.registry.get(name)
+
+    def get_step_conditions(self, name):
+        """Get the compiled completion conditions of a workflow configuration's steps, keyed by step id."""
+        return self.registry.get_step_conditions(name)
+
+    def get_step_plan(self, config):
+        """Get the steps of a loaded workflow configuration ordered after their dependencies, or None if it was replaced."""
+        return self.registry.get_step_plan(config)
+
+    def count_workflow_configs(self, name):
+        """Get the number of workflow configurations sharing the given name."""
+        return self.registry.count(name)
+
+    def get_config_errors(self):
+        """Get the load errors of workflow configuration files, keyed by file path."""
+        return self.registry.get_errors()
@@ -0,0 +1,240 @@
+"""
+Process-wide registry of parsed workflow configurations.
+"""
+import os
+import threading
+from types import MappingProxyType
+
+from pipelineMGMT.parser import WorkflowParser
+from pipelineMGMT.configWatcher import ConfigWatcher
+from pipelineMGMT.configCompiler import default_snapshot_path, file_hash, load_compiled_configs
+from pipelineMGMT.conditions import step_conditions
+from db.stepGraph import step_plan
+
+class ConfigSnapshot:
+    """Immutable view of the parsed and validated configurations at one point in time."""
+
+    __slots__ = ("configs", "by_name", "name_counts", "errors", "generation", "conditions", "step_plans")
+
+    def __init__(self, configs=(), by_name=None, name_counts=None, errors=None, generation=0, conditions=None,
+                 step_plans=None):
+        """Initialize the snapshot. `conditions` and `step_plans` hold the compiled step conditions and the
+        ordered steps (see db.stepGraph.step_plan) of each config in by_name."""
+        self.configs = tuple(configs)
+        self.by_name = MappingProxyType(dict(by_name or {}))
+        self.name_counts = MappingProxyType(dict(name_counts or {}))
+        self.errors = MappingProxyType(dict(errors or {}))
+        self.generation = generation
+        self.conditions = MappingProxyType(dict(conditions or {}))
+        self.step_plans = MappingProxyType(dict(step_plans or {}))
+
+class ConfigRegistry:
+    """Caches parsed workflow configurations and re-parses only changed files."""
+
+    _registries = {}
+    _registries_lock = threading.Lock()
+
+    def __init__(self, directory, compiled_path=None, max_workers=None):
+        """Initialize the registry for a workflows directory and its optional compiled snapshot file."""
+        self.directory = directory
+        self.max_workers = max_workers
+        self.compiled_path = compiled_path or default_snapshot_path(directory)
+        self._prefix = os.path.join(directory, "")
+        self._compiled = None  # CompiledConfigs, loaded before the first files are parsed
+        self.lock = threading.RLock()
+        self.watcher = None
+        self._entries = {}  # file path -> (mtime_ns, size, config)
+        self._errors = {}  # file path -> error message
+        # Readers only ever load this attribute; refresh() swaps in a new snapshot
+        self.snapshot = ConfigSnapshot()
+
+    @classmethod
+    def for_directory(cls, directory):
+        """Get the shared registry for a directory, creating it on first use."""
+        key = os.path.abspath(directory)
+        with cls._registries_lock:
+            registry = cls._registries.get(key)
+            if registry is None:
+                registry = cls(directory)
+                cls._registries[key] = registry
+            return registry
+
+    # ================== Refreshing ==================
+
+    def refresh(self):
+        """Stat the workflow files and re-parse the ones that changed since the last refresh."""
+        with self.lock:
+            seen = set()
+            changed = {}  # file path -> (signature, cached entry)
+
+            for path in WorkflowParser.find_workflow_files(self.directory):
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = self._entries.get(path)
+                if not cached or cached[:2] != signature:
+                    changed[path] = (signature, cached)
+
+            if changed:
+                if self._compiled is None:
+                    self._compiled = load_compiled_configs(self.compiled_path)
+
+                to_load = []
+                for path, (signature, cached) in changed.items():
+                    # Files that still match the compiled snapshot are neither read nor parsed
+                    config = self._compiled_by_signature(path, signature)
+                    if config is None:
+                        to_load.append(path)
+                    else:
+                        self._entries[path] = signature + (config,)
+                        self._errors.pop(path, None)
+
+                report = WorkflowParser.load_files(to_load, self.max_workers, loader=self._load_file)
+                for result in report.files:
+                    signature, cached = changed[result.path]
+                    if result.ok:
+                        self._entries[result.path] = signature + (result.config,)
+                        self._errors.pop(result.path, None)
+                    else:
+                        self._errors[result.path] = result.error
+                        if cached:
+                            # Keep serving the last good version until the file is fixed
+                            self._entries[result.path] = signature + (cached[2],)
+
+            removed = [path for path in self._entries if path not in seen]
+            for path in removed:
+                del self._entries[path]
+            stale_errors = [path for path in self._errors if path not in seen]
+            for path in stale_errors:
+                del self._errors[path]
+
+            if changed or removed or stale_errors:
+                self._publish()
+            return self.snapshot
+
+    def _compiled_by_signature(self, path, signature):
+        """Get the compiled config for a file whose mtime and size match the snapshot, if any."""
+        known = self._compiled.files.get(path[len(self._prefix):])
+        if known and tuple(known[:2]) == signature:
+            return self._compiled.configs.get(known[2])
+        return None
+
+    def _load_file(self, path):
+        """Load a config from the compiled snapshot if the file hash matches, otherwise parse and validate it."""
+        if self._compiled.configs:
+            with open(path, "rb") as f:
+                config = self._compiled.configs.get(file_hash(f.read()))
+            if config is not None:
+                return config
+
+        return WorkflowParser.load_workflow_config(path)
+
+    def record_error(self, path, message):
+        """Record an error that is not tied to parsing a single file."""
+        with self.lock:
+            self._errors[path] = message
+            self._publish()
+
+    def _publish(self):
+        """Build a new snapshot from the current entries and swap it in."""
+        configs = [self._entries[path][2] for path in sorted(self._entries)]
+        by_name = {}
+        name_counts = {}
+        for config in configs:
+            name = config.get("name")
+            by_name.setdefault(name, config)
+            name_counts[name] = name_counts.get(name, 0) + 1
+
+        # Conditions and step plans are compiled once per config: unchanged configs keep theirs
+        previous = self.snapshot
+        conditions = {}
+        step_plans = {}
+        for name, config in by_name.items():
+            if previous.by_name.get(name) is config:
+                conditions[name] = previous.conditions[name]
+                step_plans[name] = previous.step_plans[name]
+            else:
+                conditions[name] = MappingProxyType(step_conditions(config))
+                step_plans[name] = step_plan(config["steps"])
+
+        self.snapshot = ConfigSnapshot(
+            configs,
+            by_name,
+            name_counts,
+            self._errors,
+            self.snapshot.generation + 1,
+            conditions,
+            step_plans
+        )
+
+    # ================== Watching ==================
+
+    def start_watching(self, interval=2.0):
+        """Start refreshing the registry in the background instead of on every lookup."""
+        with self.lock:
+            if self.watcher is None or not self.watcher.is_alive():
+                self.refresh()
+                self.watcher = ConfigWatcher(self, interval)
+                self.watcher.start()
+            return self.watcher
+
+    def stop_watching(self):
+        """Stop the background watcher, if any."""
+        with self.lock:
+            watcher, self.watcher = self.watcher, None
+        if watcher:
+            watcher.stop()
+
+    @property
+    def is_watching(self):
+        """Whether a background watcher keeps the snapshot up to date."""
+        watcher = self.watcher
+        return watcher is not None and watcher.is_alive()
+
+    # ================== Lookups ==================
+
+    def current(self):
+        """Get the current snapshot, refreshing it first unless a watcher is running."""
+        if self.is_watching:
+            return self.snapshot
+        return self.refresh()
+
+    def get_all(self):
+        """Get all valid workflow configurations."""
+        return list(self.current().configs)
+
+    def get(self, name):
+        """Get a workflow configuration by name."""
+        return self.current().by_name.get(name)
+
+    def get_step_conditions(self, name):
+        """Get the compiled completion conditions of a configuration's steps, keyed by step id.
+
+        Served from the current snapshot without checking the files again once configs are loaded,
+        since it is called for every completed step.
+        """
+        snapshot = self.snapshot if self.snapshot.generation else self.current()
+        return snapshot.conditions.get(name, {})
+
+    def get_step_plan(self, config):
+        """Get the steps of a configuration returned by get() ordered after their dependencies, as (step config, depends_on) pairs.
+
+        Served from the current snapshot like get_step_conditions. None if the configuration was
+        replaced since, or isn't from this registry.
+        """
+        snapshot = self.snapshot if self.snapshot.generation else self.current()
+        name = config.get("name")
+        if snapshot.by_name.get(name) is not config:
+            return None
+        return snapshot.step_plans[name]
+
+    def count(self, name):
+        """Get the number of loaded configurations with the given name."""
+        return self.current().name_counts.get(name, 0)
+
+    def get_errors(self):
+        """Get the errors of files that failed to load, keyed by file path."""
+        return dict(self.current().errors)
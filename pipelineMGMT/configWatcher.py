@@ -0,0 +1,63 @@
+"""
+Background watcher that keeps a config registry up to date.
+"""
+import threading
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # inotify is optional, polling is used without it
+    INotify = None
+
+class ConfigWatcher(threading.Thread):
+    """Refreshes a ConfigRegistry when files in its directory change."""
+
+    def __init__(self, registry, interval=2.0, use_inotify=True):
+        """Initialize the watcher for a registry."""
+        super().__init__(name=f"config-watcher:{registry.directory}", daemon=True)
+        self.registry = registry
+        self.interval = interval
+        self.use_inotify = use_inotify and INotify is not None
+        self._stop_event = threading.Event()
+
+    def stop(self, timeout=None):
+        """Stop the watcher and wait for the thread to exit."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        """Watch the directory until stopped."""
+        inotify = self._open_inotify() if self.use_inotify else None
+        try:
+            while not self._stop_event.is_set():
+                if inotify is not None:
+                    # Wake up on file events, but still rescan every interval to catch missed events
+                    inotify.read(timeout=int(self.interval * 1000))
+                elif self._stop_event.wait(self.interval):
+                    break
+
+                if not self._stop_event.is_set():
+                    self._refresh()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _open_inotify(self):
+        """Open an inotify watch on the directory, or None if it is not available."""
+        try:
+            inotify = INotify()
+            inotify.add_watch(
+                self.registry.directory,
+                inotify_flags.CLOSE_WRITE | inotify_flags.CREATE | inotify_flags.DELETE
+                | inotify_flags.MOVED_TO | inotify_flags.MOVED_FROM
+            )
+            return inotify
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """Rebuild the registry snapshot, keeping the watcher alive on unexpected errors."""
+        try:
+            self.registry.refresh()
+        except Exception as e:
+            self.registry.record_error(self.registry.directory, f"Config refresh failed: {e}")
@@ -1,17 +1,24 @@
 """
 Executor for pipeline steps.
 """
+import copy
+from concurrent.futures import Future
 
-import string
 from db.models import StepStatus
+from pipelineMGMT.mcpClientPool import DEFAULT_CALL_TIMEOUT
+from pipelineMGMT.templates import render_template
 
 class WorkflowExecutor:
     """Executor for workflow steps."""
 
-    def __init__(self, db_manager):
-        """Initialize the workflow executor."""
+    def __init__(self, db_manager, mcp_clients=None, config_manager=None):
+        """Initialize the workflow executor. Automated steps call their tools through `mcp_clients`, an MCPClientPool.
+
+        Steps are completed only once the completion conditions of their config in `config_manager` hold.
+        """
         self.db_manager = db_manager
-        # self.mcp_clients = {}  # Map of server name to MCP client
+        self.mcp_clients = mcp_clients
+        self.config_manager = config_manager
 
     def execute_step(self, workflow_id, stepName=None):
         """Execute a workflow step with optional stepName. If the stepName is not provided, the current step will be executed."""
@@ -30,23 +37,105 @@ class WorkflowExecutor:
 
         # For manual steps, return instructions
         # if step_type == StepType.MANUAL:
-        instructions = self._format_string_with_params(execution["instructions"], entity.context)
+        missing = []
+        instructions = self._format_string_with_params(execution["instructions"], entity.context, missing)
         execution["instructions"] = instructions
+        if missing:
+            execution["missing_context"] = missing
+            entity.add_log(f"Missing context for step '{step.name}' instructions: {', '.join(missing)}", "WARNING")
+
+        # Other steps started with this one whose actions the caller runs alongside, even if this one can't run
+        started_actions = self.step_actions(entity, execution.pop("started"))
+
+        # Automated steps: the action is rendered here and run by the caller (see submit_action)
+        if step.mcp_server_config:
+            action, action_missing = self._render_action(entity, step)
+            if action_missing:
+                # The step stays running: execute it again once the context is updated
+                error = f"Missing context for step '{step.name}' action: {', '.join(action_missing)}"
+                entity.add_log(error, "WARNING")
+                entity.save()
+                return {"entity": entity, "step": step, "error": error, "started_actions": started_actions}
+            execution["action"] = action
+
+        if started_actions:
+            execution["started_actions"] = started_actions
         entity.save()
 
         return execution
 
-        # elif step_type == StepType.AUTOMATED:
-        # For automated steps, execute the action
-            # error = f"Automated steps are not implemented"
-            # entity.add_log(error, "ERROR")
-        #     return {"error": error}
-        # else:
-        #     error = f"Unknown step type '{step_type}' for step '{step.name}'"
-        #     entity.add_log(error, "ERROR")
-        #     entity.save()
-        #     return {"error": error}
-        
+    def step_actions(self, entity, steps):
+        """Render the actions of started automated steps as executions for the caller to run. Manual steps are left out."""
+        executions = []
+        for step in steps:
+            if not step.mcp_server_config:
+                continue
+            action, missing = self._render_action(entity, step)
+            if missing:
+                # Left running: executing it again once the context is updated runs the action
+                entity.add_log(f"Missing context for step '{step.name}' action: {', '.join(missing)}", "WARNING")
+                continue
+            executions.append({"entity": entity, "step": step, "instructions": step.instructions, "action": action})
+        return executions
+
+    def _render_action(self, entity, step):
+        """Fill the arguments of a step's action from the pipeline context. Returns the action and the missing context keys."""
+        missing = []
+        action = dict(step.mcp_server_config)
+        action["arguments"] = self._format_dict_with_params(action.get("arguments"), entity.context, missing)
+        return action, missing
+
+    def submit_action(self, action):
+        """Start calling the MCP tool of a rendered step action. Returns a future of the tool's result text."""
+        try:
+            if self.mcp_clients is None:
+                raise ValueError("No MCP client pool to run automated steps with")
+            return self.mcp_clients.submit(
+                action.get("server"), action.get("tool"), action.get("arguments"), action.get("timeout", DEFAULT_CALL_TIMEOUT)
+            )
+        except ValueError as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def action_outcome(self, future):
+        """Wait for the tool call of an action: {"result": text} or {"error": message}."""
+        try:
+            return {"result": future.result()}
+        except Exception as e:
+            return {"error": str(e) or type(e).__name__}
+
+    def finish_step_action(self, entity, stepName, outcome):
+        """Complete an automated step with the result of its action and start the next one, or fail it with the action's error."""
+        workflow_step = entity.get_step(stepName)
+        if not workflow_step:
+            raise ValueError(f"Step '{stepName}' not found in workflow entity '{entity.id}'")
+
+        if "error" not in outcome:
+            unmet = self.unmet_completion_condition(entity, workflow_step)
+            if unmet is not None:
+                outcome = {"error": f"Completion condition not met: {unmet}"}
+        if "error" in outcome:
+            entity.fail_step(workflow_step, outcome["error"])
+            entity.save()
+            return {"error": f"Step '{stepName}' failed: {outcome['error']}"}
+
+        started = self.complete_entity_step(entity, entity.id, stepName, outcome["result"])
+        next_step = entity.get_current_step()
+        started_actions = self.step_actions(entity, started)
+        if next_step or entity.get_steps_by_status(StepStatus.PENDING):
+            entity.save()
+        else:
+            entity.complete()
+        return {
+            "entity": entity,
+            "step": workflow_step,
+            "result": outcome["result"],
+            "next_step": next_step.name if next_step else None,
+            "next_steps": [step.name for step in entity.get_running_steps()],
+            "started_actions": started_actions
+        }
+
     def execute_workflow_step(self, identifier, stepName=None): #remove
         """Execute a workflow step."""
         entity = self.db_manager.get_workflow_entity(identifier)
@@ -61,18 +150,29 @@ class WorkflowExecutor:
 
         # workflow_step = None
         # If no stepName is provided, use the current step
+        started = []
         if not stepName:
             current_step = entity.get_current_step()
             if not current_step:
-                current_step = entity.get_first_step()
+                # Start every step that is ready, e.g. all the steps without dependencies on launch
+                started = entity.get_ready_steps()
+                current_step = started[0] if started else entity.get_first_step()
                 if not current_step:
                     raise ValueError("No step specified and no current step set")
             stepName = current_step.name
             # workflow_step = current_step
+        else:
+            workflow_step = entity.get_step(stepName)
+            if workflow_step and workflow_step.status == StepStatus.PENDING:
+                waiting_for = entity.get_unmet_dependencies(workflow_step)
+                if waiting_for:
+                    raise ValueError(f"Step '{stepName}' is waiting for steps: {', '.join(waiting_for)}")
 
         print(f"Executing step: {stepName}")
         # Find the step in the entity's steps
         entity.start_step(stepName)
+        for step in started[1:]:
+            entity.start_step(step)
         entity.save()
 
         # print(f"Pipeline status: {entity.status}")
@@ -83,7 +183,8 @@ class WorkflowExecutor:
             "entity": entity,
             "step": workflow_step,
             # "type": workflow_step.step_type,
-            "instructions": workflow_step.instructions
+            "instructions": workflow_step.instructions,
+            "started": started[1:]
             # "action": workflow_step.action if workflow_step.step_type == StepType.AUTOMATED else None
         }
     
@@ -107,6 +208,19 @@ class WorkflowExecutor:
         if not entity:
             raise ValueError(f"Workflow entity '{identifier}' not found")
 
+        self.complete_entity_step(entity, identifier, stepName, result)
+
+        for step in entity.steps:
+            print(f"• {step.name}: ({step.status})")
+
+        entity.save()
+        return entity
+
+    def complete_entity_step(self, entity, identifier, stepName=None, result=None):
+        """Complete a step of a loaded workflow entity and start every step that became ready. Returns the started steps.
+
+        The current step is completed if stepName is not provided.
+        """
         if entity.is_cancelled:
             raise ValueError(f"Cannot complete step for cancelled workflow '{identifier}'")
 
@@ -124,6 +238,10 @@ class WorkflowExecutor:
         if not workflow_step:
             raise ValueError(f"Step '{stepName}' not found in workflow entity '{identifier}'")
         
+        unmet = self.unmet_completion_condition(entity, workflow_step, result)
+        if unmet is not None:
+            raise ValueError(f"Step '{stepName}' can't be completed until its completion condition is met: {unmet}")
+
         # Store the result in the step
         if result:
             workflow_step.result = str(result) if not isinstance(result, str) else result
@@ -135,18 +253,33 @@ class WorkflowExecutor:
         if result and isinstance(result, dict):
             entity.update_context(result)
 
-        # Find the next pending step
-        pending_steps = entity.get_steps_by_status(StepStatus.PENDING)
-        if pending_steps:
-            entity.start_step(pending_steps[0])
-        else:
+        # Start the steps waiting for this one, and any other step that is ready
+        started = entity.get_ready_steps()
+        for next_step in started:
+            entity.start_step(next_step)
+        if not started and not entity.get_running_steps() and not entity.get_steps_by_status(StepStatus.PENDING):
             entity.add_log("All steps completed", "INFO")
+        return started
 
-        for step in entity.steps:
-            print(f"• {step.name}: ({step.status})")
+    def unmet_completion_condition(self, entity, step, result=None):
+        """Get the completion condition of a step if it doesn't hold, or None.
 
-        entity.save()
-        return entity
+        The condition sees the pipeline context with a dict result merged in, as completing the step would leave it.
+        """
+        if self.config_manager is None:
+            return None
+        condition = self.config_manager.get_step_conditions(entity.config_name).get(step.name)
+        if condition is None:
+            return None
+
+        context = entity.context
+        if isinstance(result, dict):
+            context = entity.deep_update_dict(copy.deepcopy(context), result)
+        steps_status = {other.name: other.status.value for other in entity.steps}
+        outputs = {other.name: {"result": other.result} for other in entity.steps if other.result is not None}
+        if condition.predicate(context, steps_status, outputs):
+            return None
+        return condition.source
 
     def complete_manual_step(self, workflow_id, stepName, result=None):
         """Complete a manual workflow step."""
@@ -162,42 +295,27 @@ class WorkflowExecutor:
         except ValueError as e:
             return {"error": str(e)}
 
-    def _format_string_with_params(self, text, params):
-        """Format a string with workflow context."""
-        if not text:
-            return text
+    def _format_string_with_params(self, text, params, missing=None):
+        """Format a string with workflow context. Unresolved placeholders are appended to `missing`."""
+        return render_template(text, params, missing)
 
-        # Create a formatter with custom braces
-        # formatter = string.Formatter()
-        
-        # Replace {param} with actual values
-        formatted_text = text
-        for param_name, param_value in params.items():
-            placeholder = "{" + param_name + "}"
-            if placeholder in formatted_text:
-                formatted_text = formatted_text.replace(placeholder, str(param_value))
-                
-        return formatted_text
-
-    def _format_dict_with_params(self, dict_obj, params):
+    def _format_dict_with_params(self, dict_obj, params, missing=None):
         """Format a dictionary's values with workflow context."""
         if not dict_obj:
             return {}
 
         formatted_dict = {}
         for key, value in dict_obj.items():
-            if isinstance(value, str):
-                formatted_dict[key] = self._format_string_with_params(value, params)
-            elif isinstance(value, dict):
-                formatted_dict[key] = self._format_dict_with_params(value, params)
-            elif isinstance(value, list):
-                formatted_dict[key] = [
-                    self._format_string_with_params(item, params) if isinstance(item, str)
-                    else (self._format_dict_with_params(item, params) if isinstance(item, dict)
-                          else item)
-                    for item in value
-                ]
-            else:
-                formatted_dict[key] = value
-                
+            formatted_dict[key] = self._format_value_with_params(value, params, missing)
+
         return formatted_dict
+
+    def _format_value_with_params(self, value, params, missing=None):
+        """Format a string, dictionary or list value with workflow context."""
+        if isinstance(value, str):
+            return render_template(value, params, missing)
+        if isinstance(value, dict):
+            return self._format_dict_with_params(value, params, missing)
+        if isinstance(value, list):
+            return [self._format_value_with_params(item, params, missing) for item in value]
+        return value
@@ -1,24 +1,79 @@
 """
 Manager for workflow operations.
 """
+import functools
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
 
 from db.manager import DatabaseManager
+from db.shardedDatabase import DEFAULT_SHARDS
 from pipelineMGMT.executor import WorkflowExecutor
 from pipelineMGMT.configManager import ConfigManager
+from pipelineMGMT.mcpClientPool import MCPClientPool
 from db.models import WorkflowStatus, StepStatus
+from db.storage import ConcurrentUpdateError
 from db.workflowStep import WorkflowStep
 
+# Times a manager call is run again when another request saved one of its pipelines first
+CONFLICT_RETRIES = 3
+# Seconds to wait before the first retry, at most; the limit doubles with every retry
+CONFLICT_BACKOFF = 0.002
+
+def transactional(method):
+    """Run a manager method in a unit of work: pipelines are shared with nested calls and saved in one transaction.
+
+    If another request saved one of the pipelines first, the unit of work writes nothing and drops
+    them from the cache; the outermost call then runs again on freshly loaded pipelines, after a
+    random wait so that calls racing for the same pipeline don't collide again. Calls of this
+    process don't race: DatabaseManager.unit_of_work locks the pipelines they load.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.db_manager.db.current_unit_of_work() is not None:
+            # Retried by the call that opened the unit of work
+            return method(self, *args, **kwargs)
+        for attempt in range(CONFLICT_RETRIES + 1):
+            try:
+                with self.db_manager.unit_of_work():
+                    return method(self, *args, **kwargs)
+            except ConcurrentUpdateError:
+                if attempt == CONFLICT_RETRIES:
+                    raise
+                time.sleep(random.uniform(0, CONFLICT_BACKOFF * 2 ** attempt))
+    return wrapper
+
+def request_scoped(method):
+    """Run a read-only manager method in a request scope: pipelines are shared with nested calls.
+
+    Outside a unit of work nothing is saved and no pipeline is locked, so reads don't wait for
+    calls changing the same pipelines.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.db_manager.request_scope():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class WorkflowManager:
     """Manager for workflow operations."""
 
-    def __init__(self, db_path="workflows.db", workflows_dir="workflows"):
-        """Initialize the workflow manager."""
-        self.db_manager = DatabaseManager(db_path)
-        self.executor = WorkflowExecutor(self.db_manager)
+    def __init__(self, db_path="workflows.db", workflows_dir="workflows", codec=None, storage="sqlite",
+                 shards=DEFAULT_SHARDS, mcp_clients=None):
+        """Initialize the workflow manager.
+
+        `codec` compresses large contexts and log messages; `storage` and `shards` choose the storage backend.
+        Automated steps call their tools through `mcp_clients`, an MCPClientPool closed with the manager.
+        """
+        self.db_manager = DatabaseManager(db_path, codec=codec, storage=storage, shards=shards)
+        self.mcp_clients = mcp_clients if mcp_clients is not None else MCPClientPool()
         self.workflows_dir = workflows_dir
+        self.config_manager = ConfigManager(workflows_dir)
+        self.executor = WorkflowExecutor(self.db_manager, self.mcp_clients, self.config_manager)
 
     def close(self):
         """Close the workflow manager."""
+        self.mcp_clients.close()
         self.db_manager.close()
 
     def __enter__(self):
@@ -29,22 +84,30 @@ class WorkflowManager:
         """Context manager exit method."""
         self.close()
 
+    def unit_of_work(self):
+        """Open a unit of work spanning several manager calls. Yields the request's cache stats."""
+        return self.db_manager.unit_of_work()
+
+    def get_cache_stats(self):
+        """Get the pipeline cache statistics."""
+        return self.db_manager.get_cache_stats()
+
     def load_workflow_configs(self):
         """Load all workflow configurations from the workflows directory."""
-        configs = ConfigManager().load_workflow_configs()
-            
-        return configs
+        return self.config_manager.load_workflow_configs()
 
     # Workflow Entity Operations
 
+    @transactional
     def create_workflow(self, workflow_config_name, custom_name=None, context=None):
         """Create and launch a new pipeline (workflow entity) based on workflow config(template), custom pipeline name and optional context."""
         try:
-            config = next((config for config in self.load_workflow_configs() if config.get("name") == workflow_config_name), None)
+            config = self.config_manager.get_workflow_config(workflow_config_name)
 
             entity = self.db_manager.create_workflow_entity(
                 config,
-                name=custom_name
+                name=custom_name,
+                plan=self.config_manager.get_step_plan(config) if config else None
             )
             
             # Generate a description if not provided
@@ -84,7 +147,25 @@ class WorkflowManager:
             return {"error": str(e)}
 
     def launch_workflow(self, pipeline_id):
-        """Launch a pipeline(workflow entity) with id."""
+        """Launch a pipeline(workflow entity) with id. An automated first step calls its MCP tool."""
+        response = self.start_workflow(pipeline_id)
+        execution = response.get("step_execution")
+        if execution and ("action" in execution or execution.get("started_actions")):
+            response = self.update_launch_response(response, self.run_step_action(execution))
+        return response
+
+    def update_launch_response(self, response, execution):
+        """Replace the step execution of a launch response with the outcome of its action."""
+        response["step_execution"] = execution
+        entity = execution.get("entity")
+        if entity:
+            response["steps"] = entity.to_dict()["steps"]
+            response["status"] = str(entity.status)
+        return response
+
+    @transactional
+    def start_workflow(self, pipeline_id):
+        """Launch a pipeline(workflow entity) with id. The action of an automated first step is returned, not run."""
         try:
             step_execution = self.executor.execute_step(pipeline_id)
 
@@ -116,6 +197,7 @@ class WorkflowManager:
         except ValueError as e:
             return {"error": str(e)}
 
+    @request_scoped
     def get_workflow(self, identifier): #todo: rename to get_workflow_entity
         """Get a pipeline (workflow entity) by ID, name, or description."""
         try:
@@ -136,6 +218,15 @@ class WorkflowManager:
         except Exception as e:
             return {"error": str(e)}
 
+    @request_scoped
+    def get_workflow_logs(self, identifier):
+        """Get the logs of a pipeline (workflow entity) by ID, name, or description, or None if it doesn't exist."""
+        entity = self.db_manager.get_workflow_entity(identifier)
+        if not entity:
+            return None
+        return list(entity.logs)
+
+    @transactional
     def update_workflow(self, identifier, context):
         """Update a workflow entity's context."""
         try:
@@ -159,6 +250,7 @@ class WorkflowManager:
         except ValueError as e:
             return {"error": str(e)}
         
+    @transactional
     def update_workflow_entity(self, identifier, context):
         """Update a workflow entity's context."""
         entity = self.db_manager.get_workflow_entity(identifier)
@@ -170,6 +262,7 @@ class WorkflowManager:
         entity.save()
         return entity
     
+    @transactional
     def complete_workflow(self, pipelineId):
         """Complete a workflow."""
         entity = self.db_manager.get_workflow_entity(pipelineId)
@@ -190,11 +283,73 @@ class WorkflowManager:
         }
 
     def execute_workflow_step(self, pipelineId, step_id=None):
-        """Execute a workflow step."""
+        """Execute a workflow step. Automated steps call their MCP tool and are completed or failed with its outcome."""
+        return self.run_step_action(self.start_workflow_step(pipelineId, step_id))
+
+    @transactional
+    def start_workflow_step(self, pipelineId, step_id=None):
+        """Start a workflow step. The action of an automated step is returned, not run."""
         execution = self.executor.execute_step(pipelineId, step_id)
         # TODO: handle errors
         return execution
+
+    def run_step_action(self, execution):
+        """Call the MCP tools of the automated steps an execution started and record their outcomes.
+
+        Independent automated steps run at the same time, and the steps they make ready are run as
+        soon as they complete. The calls run outside of a unit of work, so a conflicting save
+        retries recording an outcome, not the call. Executions without actions are returned as they are.
+        """
+        executions = self.action_executions(execution)
+        if not executions:
+            return execution
+        running = {self.executor.submit_action(started["action"]): started for started in executions}
+        outcomes = []
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                started = running.pop(future)
+                outcome = self.finish_step_action(started, self.executor.action_outcome(future))
+                outcomes.append((started, outcome))
+                for follow_up in outcome.pop("started_actions", ()):
+                    running[self.executor.submit_action(follow_up["action"])] = follow_up
+        return self.action_response(execution, outcomes)
+
+    def action_executions(self, execution):
+        """Get the executions whose actions to run: the executed step's own and those of the steps started with it."""
+        started = execution.pop("started_actions", [])
+        return ([execution] if "action" in execution else []) + started
+
+    def action_response(self, execution, outcomes):
+        """Build the response of an execution from (execution, outcome) pairs of the actions run for it.
+
+        The executed step's outcome is the response, with the outcomes of the other automated steps in "automated_steps".
+        """
+        response = execution
+        automated_steps = []
+        for started, outcome in outcomes:
+            if started is execution:
+                response = outcome
+            elif "error" in outcome:
+                automated_steps.append({"step": started["step"].name, "error": outcome["error"]})
+            else:
+                automated_steps.append({"step": started["step"].name, "result": outcome["result"]})
+        if automated_steps:
+            response["automated_steps"] = automated_steps
+        return response
+
+    @transactional
+    def finish_step_action(self, execution, outcome):
+        """Complete or fail a started automated step with the outcome of its action."""
+        try:
+            entity = self.db_manager.get_workflow_entity(execution["entity"].id)
+            if not entity:
+                raise ValueError(f"Workflow entity '{execution['entity'].id}' not found")
+            return self.executor.finish_step_action(entity, execution["step"].name, outcome)
+        except ValueError as e:
+            return {"error": str(e)}
     
+    @transactional
     def complete_workflow_current_step(self, pipelineId):
         """Complete the current step in the workflow."""
         entity = self.db_manager.get_workflow_entity(pipelineId)
@@ -207,9 +362,13 @@ class WorkflowManager:
 
         return self.complete_workflow_step(pipelineId, current_step.name)
 
+    @transactional
     def complete_workflow_step(self, pipelineId, stepName, result=None):
         """Complete a workflow step."""
         step_completion_result = self.executor.complete_manual_step(pipelineId, stepName, result)
+        if "error" in step_completion_result:
+            # E.g. the step's completion condition is not met yet
+            return step_completion_result
 
         next_step = None
         remaining_running_steps = self.get_workflow_steps_with_status(pipelineId, StepStatus.RUNNING)
@@ -231,9 +390,13 @@ class WorkflowManager:
         steps_strings = [f"{step.name}: {step.status}" for step in all_pipeline_steps]
 
         result = f"Current step has been successfully completed! \n Current pipeline execution state: \n {steps_strings} \n The next step to proceed with is: {next_step.name}. \n Please follow the instruction: {next_step.instructions}"
+        # Independent steps run at the same time
+        for other_step in remaining_running_steps[1:]:
+            result += f" \n Also running: {other_step.name}. \n Please follow the instruction: {other_step.instructions}"
 
         return result
 
+    @transactional
     def cancel_workflow(self, identifier, reason=None):
         """Cancel a workflow."""
         try:
@@ -256,26 +419,95 @@ class WorkflowManager:
         except ValueError as e:
             return {"error": str(e)}
 
+    # Bulk Operations
+
+    @transactional
+    def create_workflows_bulk(self, workflow_config_name, pipelines):
+        """Create many pipelines (workflow entities) from one workflow config in a single transaction.
+
+        `pipelines` are names, or dicts with a "name" and an optional "context" merged into the config's context.
+        """
+        try:
+            config = self.config_manager.get_workflow_config(workflow_config_name)
+            plan = self.config_manager.get_step_plan(config) if config else None
+            entities = self.db_manager.create_workflow_entities(config, pipelines, plan)
+            return {"pipelines": [{"id": entity.id, "name": entity.name} for entity in entities]}
+        except ValueError as e:
+            return {"error": str(e)}
+
+    @transactional
+    def complete_workflow_steps_bulk(self, identifiers):
+        """Complete the current step of many pipelines in a single transaction and start their next steps.
+
+        Pipelines without a next step are completed. Pipelines that can't be advanced get an error
+        in their result and don't stop the others.
+        """
+        entities = self.db_manager.get_workflow_entities(identifiers)
+        results = []
+        for identifier in identifiers:
+            entity = entities.get(identifier)
+            try:
+                if not entity:
+                    raise ValueError(f"Workflow entity '{identifier}' not found")
+                self.executor.complete_entity_step(entity, identifier)
+            except ValueError as e:
+                results.append({"pipeline": identifier, "error": str(e)})
+                continue
+
+            next_step = entity.get_current_step()
+            if next_step or entity.get_steps_by_status(StepStatus.PENDING):
+                entity.save()
+            else:
+                entity.complete()
+            results.append({
+                "id": entity.id,
+                "name": entity.name,
+                "status": str(entity.status),
+                "next_step": next_step.name if next_step else None
+            })
+        return {"pipelines": results}
+
+    @transactional
+    def cancel_workflows_bulk(self, identifiers, reason=None):
+        """Cancel many pipelines in a single transaction. Unknown pipelines get an error in their result."""
+        entities = self.db_manager.get_workflow_entities(identifiers)
+        results = []
+        for identifier in identifiers:
+            entity = entities.get(identifier)
+            if not entity:
+                results.append({"pipeline": identifier, "error": f"Workflow entity '{identifier}' not found"})
+                continue
+
+            if not entity.is_cancelled:
+                entity.cancel(reason)
+                entity.save()
+            results.append({
+                "id": entity.id,
+                "name": entity.name,
+                "is_cancelled": entity.is_cancelled,
+                "cancelled_at": entity.cancelled_at
+            })
+        return {"pipelines": results}
+
     def list_workflows(self, filters=None):
         """List all workflow entities with optional filters."""
         try:
-            entities = self.db_manager.list_workflow_entities(filters)
-            return [
-                {
-                    "id": entity.id,
-                    "name": entity.name,
-                    "description": entity.description,
-                    "config_name": entity.config_name,
-                    "current_step": entity.get_current_step().name if entity.get_current_step() else None,
-                    "status": str(entity.status),
-                    "created_at": entity.created_at,
-                    "updated_at": entity.updated_at
-                }
-                for entity in entities
-            ]
+            summaries = self.db_manager.list_workflow_summaries(filters)
+            for summary in summaries:
+                summary["status"] = str(WorkflowStatus(summary["status"]))
+            return summaries
         except Exception as e:
             return {"error": str(e)}
 
+    def list_workflows_page(self, filters=None, limit=None, cursor=None):
+        """List one page of workflow entities, most recently updated first, with the cursor of the next page."""
+        page = self.db_manager.workflow_summary_page(filters, limit, cursor)
+        pipelines = []
+        for summary in page:
+            summary["status"] = str(WorkflowStatus(summary["status"]))
+            pipelines.append(summary)
+        return {"pipelines": pipelines, "next_cursor": page.next_cursor}
+
     def list_workflow_configs(self):
         """List all workflow configurations."""
         try:
@@ -284,6 +516,7 @@ class WorkflowManager:
         except Exception as e:
             return {"error": str(e)}
     
+    @request_scoped
     def get_workflow_steps(self, pipelineId):
         """Get all workflow steps."""
         try:
@@ -292,6 +525,7 @@ class WorkflowManager:
         except Exception as e:
             return {"error": str(e)}
         
+    @request_scoped
     def get_workflow_steps_with_status(self, identifier, status):
         """Get workflow steps with a specific status."""
         try:
@@ -0,0 +1,217 @@
+"""
+Pool of MCP client sessions for automated pipeline steps.
+
+An automated step names a downstream MCP server and one of its tools in its `action`:
+
+    "action": {
+        "server": {"command": "python", "args": ["servers/tickets.py"]},
+        "tool": "close_ticket",
+        "arguments": {"ticket": "{ticket_number}"},
+        "timeout": 60
+    }
+
+`server` is a command started over stdio (with optional "args", "env" and "cwd") or {"url": ...}
+for a streamable HTTP server. Starting a server and initializing a session costs far more than a
+tool call, so the pool keeps one session per server config and sends every call for that server
+through it. At most `max_calls_per_server` calls run on a server at once, sessions unused for
+`idle_timeout` seconds are closed, and a session that breaks is opened again on the next call.
+
+Sessions live on an event loop thread of the pool, started on first use, so synchronous callers
+and other event loops share them.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from mcp import ClientSession, McpError, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+# Calls running at once on one downstream server; further calls wait for a free slot
+DEFAULT_CALLS_PER_SERVER = 4
+# Seconds a session may stay unused before it is closed and its server stopped
+DEFAULT_IDLE_TIMEOUT = 300.0
+# Seconds a tool call may take, including waiting for a slot and starting the server
+DEFAULT_CALL_TIMEOUT = 60.0
+# Seconds closing the pool waits for sessions to shut down
+CLOSE_TIMEOUT = 10.0
+
+class MCPToolError(ValueError):
+    """A downstream MCP tool reported an error."""
+
+def server_key(server):
+    """Key of a server config: calls to configs with the same settings share a session."""
+    if not isinstance(server, dict) or not (server.get("command") or server.get("url")):
+        raise ValueError(f"An MCP server config needs a 'command' or a 'url', not {server!r}")
+    return json.dumps(server, sort_keys=True)
+
+def result_text(result):
+    """Text of a tool result: its text contents, one per line, and other contents as JSON."""
+    return "\n".join(
+        content.text if content.type == "text" else content.model_dump_json() for content in result.content
+    )
+
+class _Server:
+    """Session of one downstream server and the calls using it."""
+
+    __slots__ = ("config", "slots", "ready", "closing", "active", "last_used", "task")
+
+    def __init__(self, config, slots):
+        self.config = config
+        self.slots = slots
+        self.ready = asyncio.get_running_loop().create_future()
+        # Retrieve a startup error even when no call is left waiting for it
+        self.ready.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self.closing = asyncio.Event()
+        self.active = 0
+        self.last_used = time.monotonic()
+        self.task = None
+
+class MCPClientPool:
+    """Long-lived MCP client sessions, one per downstream server config."""
+
+    def __init__(self, max_calls_per_server=DEFAULT_CALLS_PER_SERVER, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """Initialize the pool. No thread or session is started until the first call."""
+        if max_calls_per_server < 1:
+            raise ValueError(f"An MCP server needs at least one call slot, not {max_calls_per_server}")
+        if idle_timeout <= 0:
+            raise ValueError(f"The idle timeout must be positive, not {idle_timeout}")
+        self.max_calls_per_server = max_calls_per_server
+        self.idle_timeout = idle_timeout
+        self.sessions_opened = 0
+        # Only used on the pool's event loop
+        self._servers = {}
+        self._reaper = None
+        self._loop = None
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, server, tool, arguments=None, timeout=DEFAULT_CALL_TIMEOUT):
+        """Start calling a tool of a server. Returns a concurrent.futures.Future of the tool's result text."""
+        key = server_key(server)
+        if not tool:
+            raise ValueError(f"No tool given for the MCP server {key}")
+        call = self._call(key, server, tool, arguments or {}, timeout)
+        return asyncio.run_coroutine_threadsafe(call, self._event_loop())
+
+    def call_tool(self, server, tool, arguments=None, timeout=DEFAULT_CALL_TIMEOUT):
+        """Call a tool of a server and return its result text. Raises MCPToolError if the tool fails."""
+        return self.submit(server, tool, arguments, timeout).result()
+
+    def get_stats(self):
+        """Get the number of open sessions and of sessions opened since the pool started."""
+        return {"sessions": len(self._servers), "sessions_opened": self.sessions_opened}
+
+    def close(self):
+        """Close every session, stop their servers and the pool's thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            loop = self._loop
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_all(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+    def __enter__(self):
+        """Context manager enter method."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit method."""
+        self.close()
+
+    def _event_loop(self):
+        with self._lock:
+            if self._closed:
+                raise ValueError("The MCP client pool is closed")
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="gpmgmt-mcp-clients", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _call(self, key, config, tool, arguments, timeout):
+        server = self._servers.get(key)
+        if server is None:
+            server = self._servers[key] = _Server(config, asyncio.Semaphore(self.max_calls_per_server))
+            server.task = asyncio.create_task(self._serve(key, server))
+            if self._reaper is None or self._reaper.done():
+                self._reaper = asyncio.create_task(self._close_idle())
+        server.active += 1
+        try:
+            async with asyncio.timeout(timeout):
+                async with server.slots:
+                    # Shielded: a timed out call must not cancel the startup other calls wait for
+                    session = await asyncio.shield(server.ready)
+                    try:
+                        result = await session.call_tool(tool, arguments)
+                    except (McpError, TimeoutError):
+                        raise
+                    except Exception:
+                        # The connection broke: open a new session on the next call
+                        server.closing.set()
+                        raise
+        except TimeoutError:
+            raise TimeoutError(f"Tool '{tool}' did not return within {timeout} s") from None
+        finally:
+            server.active -= 1
+            server.last_used = time.monotonic()
+        if result.isError:
+            raise MCPToolError(f"Tool '{tool}' failed: {result_text(result)}")
+        return result_text(result)
+
+    async def _serve(self, key, server):
+        """Open the server's session and keep it until the server is closed. Runs as a task of its own."""
+        try:
+            async with self._transport(server.config) as streams:
+                async with ClientSession(streams[0], streams[1]) as session:
+                    await session.initialize()
+                    self.sessions_opened += 1
+                    server.ready.set_result(session)
+                    await server.closing.wait()
+        except Exception as e:
+            if not server.ready.done():
+                server.ready.set_exception(e)
+        finally:
+            if not server.ready.done():
+                server.ready.set_exception(ValueError(f"The MCP server {key} closed"))
+            if self._servers.get(key) is server:
+                del self._servers[key]
+
+    def _transport(self, config):
+        if config.get("url"):
+            return streamablehttp_client(config["url"], headers=config.get("headers"))
+        return stdio_client(StdioServerParameters(
+            command=config["command"],
+            args=config.get("args", []),
+            env=config.get("env"),
+            cwd=config.get("cwd")
+        ))
+
+    async def _close_idle(self):
+        """Close sessions without calls for `idle_timeout` seconds, until none is left."""
+        while self._servers:
+            await asyncio.sleep(self.idle_timeout / 2)
+            now = time.monotonic()
+            for server in list(self._servers.values()):
+                if not server.active and now - server.last_used >= self.idle_timeout:
+                    server.closing.set()
+
+    async def _close_all(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+        tasks = [server.task for server in self._servers.values()]
+        for server in self._servers.values():
+            server.closing.set()
+        if tasks:
+            # Servers still starting don't see `closing` until they are ready
+            _, pending = await asyncio.wait(tasks, timeout=CLOSE_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
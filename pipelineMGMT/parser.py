@@ -4,11 +4,55 @@ Parser for workflow configuration files.
 import os
 import pickle
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-import json
+from typing import Any, Dict, List, Optional
+
+from db.stepGraph import step_dependencies, topological_order
+from pipelineMGMT.conditions import completion_condition
+
+try:
+    import yaml
+    # Prefer the libyaml-backed loader when PyYAML was built with it
+    YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+except ImportError:  # YAML support is optional
+    yaml = None
+    YamlLoader = None
+
+JSON_EXTENSIONS = (".json",)
+YAML_EXTENSIONS = (".yaml", ".yml")
+CONFIG_EXTENSIONS = JSON_EXTENSIONS + YAML_EXTENSIONS
+
+@dataclass
+class FileLoadResult:
+    """Outcome of loading a single workflow configuration file."""
+    path: str
+    config: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+@dataclass
+class LoadReport:
+    """Outcome of loading a set of workflow configuration files."""
+    files: List[FileLoadResult] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def configs(self):
+        return [result.config for result in self.files if result.ok]
+
+    @property
+    def errors(self):
+        return {result.path: result.error for result in self.files if not result.ok}
 
 class WorkflowParser:
-    """Parser for workflow JSON configuration files."""
+    """Parser for workflow JSON and YAML configuration files."""
 
     @staticmethod
     def parse_json_file(file_path):
@@ -19,11 +63,39 @@ class WorkflowParser:
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
-                print(config)
             return config
         except Exception as e:
             raise ValueError(f"Error parsing workflow JSON file: {e}")
 
+    @staticmethod
+    def parse_yaml_file(file_path):
+        """Parse a .yaml/.yml workflow configuration file."""
+        if yaml is None:
+            raise ValueError("YAML workflow files require PyYAML to be installed")
+
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Workflow file not found: {file_path}")
+
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return yaml.load(f, Loader=YamlLoader)
+        except Exception as e:
+            raise ValueError(f"Error parsing workflow YAML file: {e}")
+
+    @staticmethod
+    def parse_file(file_path):
+        """Parse a workflow configuration file based on its extension."""
+        if file_path.endswith(YAML_EXTENSIONS):
+            return WorkflowParser.parse_yaml_file(file_path)
+        return WorkflowParser.parse_json_file(file_path)
+
+    @staticmethod
+    def load_workflow_config(file_path):
+        """Parse and validate a workflow configuration file."""
+        config = WorkflowParser.parse_file(file_path)
+        WorkflowParser.validate_workflow_config(config)
+        return config
+
     @staticmethod
     def save_to_json_file(config, file_path):
         """Save a workflow configuration to a .json file."""
@@ -36,7 +108,7 @@ class WorkflowParser:
 
     @staticmethod
     def validate_workflow_config(config):
-        """Validate a workflow configuration."""
+        """Validate a workflow configuration. The configuration is not modified: it is shared once cached."""
 
         if not isinstance(config, dict):
             raise ValueError("Workflow configuration must be a dictionary")
@@ -71,24 +143,82 @@ class WorkflowParser:
                 raise ValueError(f"Duplicate step id: {step['id']}")
             step_ids.add(step["id"])
 
+            depends_on = step.get("depends_on")
+            if depends_on is not None and (
+                not isinstance(depends_on, list) or not all(isinstance(step_id, str) for step_id in depends_on)
+            ):
+                raise ValueError(f"Step '{step['id']}' depends_on must be a list of step ids")
+
+            try:
+                completion_condition(step.get("completion"))
+            except ValueError as e:
+                raise ValueError(f"Step '{step['id']}' has an invalid completion condition: {e}")
+
+        # Checks for unknown steps and cycles
+        topological_order(step_dependencies(config["steps"]))
+
         return True
 
     @staticmethod
-    def load_all_workflow_configs(directory):
-        """Load all workflow configurations from a directory."""
-        configs = []
-        if not os.path.exists(directory):
-            return configs
-
-        for filename in os.listdir(directory):
-            if filename.endswith(".json"):
-                file_path = os.path.join(directory, filename)
-                try:
-                    config = WorkflowParser.parse_json_file(file_path)
-
-                    if WorkflowParser.validate_workflow_config(config):
-                        configs.append(config)
-                except Exception as e:
-                    print(f"Error loading workflow config {filename}: {e}")
-        
-        return configs
+    def find_workflow_files(directory, recursive=True):
+        """List workflow configuration files in a directory, sorted by path. Hidden entries are skipped."""
+        file_paths = []
+        if not os.path.isdir(directory):
+            return file_paths
+
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            for entry in os.scandir(current):
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    if recursive:
+                        pending.append(entry.path)
+                elif entry.name.endswith(CONFIG_EXTENSIONS) and entry.is_file():
+                    file_paths.append(entry.path)
+
+        file_paths.sort()
+        return file_paths
+
+    @staticmethod
+    def load_file_result(file_path, loader=None):
+        """Load a single file into a FileLoadResult, capturing errors and parse time."""
+        loader = loader or WorkflowParser.load_workflow_config
+        started = time.perf_counter()
+        try:
+            return FileLoadResult(file_path, config=loader(file_path), duration=time.perf_counter() - started)
+        except Exception as e:
+            return FileLoadResult(file_path, error=str(e), duration=time.perf_counter() - started)
+
+    @staticmethod
+    def load_files(file_paths, max_workers=None, loader=None):
+        """Load files concurrently with a bounded thread pool. A failing file never affects the others."""
+        started = time.perf_counter()
+        file_paths = list(file_paths)
+
+        def load_batch(batch):
+            return [WorkflowParser.load_file_result(path, loader) for path in batch]
+
+        if max_workers == 1 or len(file_paths) < 2:
+            files = load_batch(file_paths)
+        else:
+            max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+            # Hand out files in batches so the per-task overhead doesn't dominate small files
+            batch_size = max(1, min(64, len(file_paths) // (max_workers * 4)))
+            batches = [file_paths[i:i + batch_size] for i in range(0, len(file_paths), batch_size)]
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="config-loader") as pool:
+                files = [result for batch in pool.map(load_batch, batches) for result in batch]
+
+        return LoadReport(files=files, duration=time.perf_counter() - started)
+
+    @staticmethod
+    def load_workflow_configs_report(directory, max_workers=None, recursive=True):
+        """Load all workflow configurations under a directory and report per-file timings and errors."""
+        file_paths = WorkflowParser.find_workflow_files(directory, recursive)
+        return WorkflowParser.load_files(file_paths, max_workers)
+
+    @staticmethod
+    def load_all_workflow_configs(directory, max_workers=None, recursive=True):
+        """Load all valid workflow configurations from a directory. Use load_workflow_configs_report for errors."""
+        return WorkflowParser.load_workflow_configs_report(directory, max_workers, recursive).configs
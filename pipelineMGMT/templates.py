@@ -0,0 +1,107 @@
+"""
+Compiled instruction templates.
+
+A template such as "Deploy {context.ticket_number} to {target|staging}" is compiled once into a
+render plan of literal segments and placeholders, and then rendered in a single pass:
+
+- {name}                 value of a context key
+- {context.a.b}          nested lookup; the leading "context." refers to the context itself
+- {items.0.name}         list items are addressed by index
+- {name|default}         default used when the key is missing
+
+Placeholders that can't be resolved and have no default are left in the text and reported as missing.
+"""
+import re
+from functools import lru_cache
+
+PLACEHOLDER_PATTERN = re.compile(r"\{([A-Za-z_][\w\-]*(?:\.[\w\-]+)*)(?:\|([^{}]*))?\}")
+CONTEXT_ROOT = "context"
+
+_MISSING = object()
+
+class Placeholder:
+    """A resolved path in a compiled template."""
+
+    __slots__ = ("source", "key", "path", "default")
+
+    def __init__(self, source, key, default=None):
+        """Initialize the placeholder from its source text, dotted key and optional default."""
+        self.source = source
+        self.key = key
+        parts = tuple(key.split("."))
+        if len(parts) > 1 and parts[0] == CONTEXT_ROOT:
+            parts = parts[1:]
+        self.path = parts
+        self.default = default
+
+    def resolve(self, context):
+        """Resolve the placeholder against a context, or return _MISSING."""
+        # A literal key (which may itself contain dots) wins over a nested lookup
+        if self.key in context:
+            return context[self.key]
+
+        value = context
+        for part in self.path:
+            if isinstance(value, dict):
+                value = value.get(part, _MISSING)
+            elif isinstance(value, (list, tuple)) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            else:
+                return _MISSING
+            if value is _MISSING:
+                return _MISSING
+        return value
+
+class CompiledTemplate:
+    """Render plan made of literal strings and placeholders."""
+
+    __slots__ = ("source", "segments", "placeholders")
+
+    def __init__(self, source, segments):
+        """Initialize the compiled template."""
+        self.source = source
+        self.segments = tuple(segments)
+        self.placeholders = tuple(segment for segment in self.segments if isinstance(segment, Placeholder))
+
+    def render(self, context, missing=None):
+        """Render the template against a context. Missing keys are appended to the `missing` list if given."""
+        if not self.placeholders:
+            return self.source
+
+        parts = []
+        for segment in self.segments:
+            if segment.__class__ is str:
+                parts.append(segment)
+                continue
+
+            value = segment.resolve(context)
+            if value is _MISSING:
+                if segment.default is not None:
+                    parts.append(segment.default)
+                    continue
+                if missing is not None:
+                    missing.append(segment.key)
+                parts.append(segment.source)
+            else:
+                parts.append(value if isinstance(value, str) else str(value))
+        return "".join(parts)
+
+@lru_cache(maxsize=4096)
+def compile_template(text):
+    """Compile a template string into a cached render plan."""
+    segments = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        if match.start() > position:
+            segments.append(text[position:match.start()])
+        segments.append(Placeholder(match.group(0), match.group(1), match.group(2)))
+        position = match.end()
+    if position < len(text):
+        segments.append(text[position:])
+    return CompiledTemplate(text, segments)
+
+def render_template(text, context, missing=None):
+    """Render a template string using the compiled plan cache."""
+    if not text:
+        return text
+    return compile_template(text).render(context, missing)
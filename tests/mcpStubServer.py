@@ -0,0 +1,38 @@
+"""
+Stub downstream MCP server for the client pool tests, run over stdio.
+"""
+import asyncio
+import os
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("stub", log_level="WARNING")
+running = 0
+peak = 0
+
+@mcp.tool()
+def echo(text: str) -> str:
+    """Return the text."""
+    return text
+
+@mcp.tool()
+def pid() -> str:
+    """Return the server's process ID."""
+    return str(os.getpid())
+
+@mcp.tool()
+async def slow(seconds: float) -> str:
+    """Wait, then return the most calls seen running at once."""
+    global running, peak
+    running += 1
+    peak = max(peak, running)
+    await asyncio.sleep(seconds)
+    running -= 1
+    return str(peak)
+
+@mcp.tool()
+def fail(message: str) -> str:
+    """Fail with the message."""
+    raise ValueError(message)
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,117 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import threading
+import time
+import pytest
+from pipelineMGMT.asyncManager import AsyncWorkflowManager
+from pipelineMGMT.manager import WorkflowManager
+
+CONFIG = {
+    "name": "test-config",
+    "description": "Test config",
+    "context": {"ticket_number": ""},
+    "steps": [{"id": f"step-{i}", "instructions": f"Do {i}"} for i in range(3)]
+}
+
+
+@pytest.fixture
+def async_manager(tmp_path):
+    manager = AsyncWorkflowManager(WorkflowManager(str(tmp_path / "workflows.db")), max_workers=2, max_writers=1)
+    yield manager
+    manager.close()
+
+
+def test_operations_await_the_workflow_manager(async_manager):
+    entity = async_manager.workflow_manager.db_manager.create_workflow_entity(CONFIG, name="pipeline")
+
+    async def calls():
+        await async_manager.update_workflow(entity.id, {"ticket_number": "T-1"})
+        return await async_manager.get_workflow("pipeline"), await async_manager.get_workflow_logs(entity.id)
+
+    pipeline, logs = asyncio.run(calls())
+    assert pipeline["context"] == {"ticket_number": "T-1"}
+    assert [log["message"] for log in logs][-1] == "context updated: {'ticket_number': 'T-1'}"
+    assert asyncio.run(async_manager.get_workflow_logs("missing")) is None
+
+
+def test_blocking_calls_leave_the_event_loop_free(async_manager):
+    threads = []
+
+    def slow_update(identifier, context):
+        threads.append(threading.get_ident())
+        time.sleep(0.2)
+
+    async_manager.workflow_manager.update_workflow = slow_update
+
+    async def calls():
+        ticks = 0
+        update = asyncio.create_task(async_manager.update_workflow("pipeline", {}))
+        while not update.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return ticks
+
+    assert asyncio.run(calls()) > 5
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_reads_do_not_wait_for_busy_writers(async_manager):
+    entity = async_manager.workflow_manager.db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    release = threading.Event()
+
+    def blocked_update(identifier, context):
+        release.wait(5)
+
+    async_manager.workflow_manager.update_workflow = blocked_update
+
+    async def calls():
+        # The only write thread is busy, so a second update waits for it
+        updates = [asyncio.create_task(async_manager.update_workflow(entity.id, {})) for _ in range(2)]
+        pipeline = await asyncio.wait_for(async_manager.get_workflow(entity.id), 2)
+        release.set()
+        await asyncio.gather(*updates)
+        return pipeline
+
+    assert asyncio.run(calls())["id"] == entity.id
+
+
+def test_reads_do_not_wait_for_a_pipeline_being_changed(async_manager):
+    db_manager = async_manager.workflow_manager.db_manager
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    loaded = threading.Event()
+    release = threading.Event()
+
+    def change_slowly():
+        # Holds the pipeline's write lock until the unit of work ends
+        with db_manager.unit_of_work():
+            db_manager.get_workflow_entity(entity.id).update_context({"ticket_number": "T-2"}).save()
+            loaded.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=change_slowly)
+    writer.start()
+    loaded.wait(5)
+
+    async def calls():
+        return await asyncio.wait_for(async_manager.get_workflow(entity.id), 1), await async_manager.get_workflow_logs(entity.id)
+
+    try:
+        pipeline, logs = asyncio.run(calls())
+    finally:
+        release.set()
+        writer.join()
+    assert pipeline["context"] == {"ticket_number": ""}
+    assert len(logs) == 1
+    assert async_manager.workflow_manager.get_workflow(entity.id)["context"] == {"ticket_number": "T-2"}
+
+
+def test_pool_sizes_are_validated(tmp_path):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"))
+    with pytest.raises(ValueError):
+        AsyncWorkflowManager(manager, max_writers=0)
+    manager.close()
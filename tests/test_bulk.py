@@ -0,0 +1,113 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from db.manager import STORAGE_BACKENDS
+from db.models import WorkflowEntity, WorkflowStatus
+from db.shardedDatabase import ShardedDatabase
+from db.storage import ConcurrentUpdateError
+from db.workflowStep import StepStatus
+from pipelineMGMT.manager import WorkflowManager
+
+WORKFLOWS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'workflows'))
+CONFIG_NAME = "01 Test workflow config"
+
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+def manager(tmp_path, request):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), workflows_dir=WORKFLOWS_DIR, storage=request.param)
+    yield manager
+    manager.close()
+
+
+def transactions(db, ids):
+    """Commits expected for one unit of work saving the pipelines: one per shard on sharded storage."""
+    if isinstance(db, ShardedDatabase):
+        return len({db.shard_index(pipeline_id) for pipeline_id in ids})
+    return 1
+
+
+def launch_all(manager, ids):
+    with manager.unit_of_work():
+        for entity in manager.db_manager.get_workflow_entities(ids).values():
+            entity.start_step(entity.get_first_step())
+
+
+def test_bulk_creation_commits_once(manager, capsys):
+    db = manager.db_manager.db
+    commits = db.commit_count
+
+    result = manager.create_workflows_bulk(CONFIG_NAME, [
+        "plain", {"name": "with-context", "context": {"ticket_number": "T-1"}}
+    ])
+
+    ids = [pipeline["id"] for pipeline in result["pipelines"]]
+    assert db.commit_count - commits == transactions(db, ids)
+    assert capsys.readouterr().out == ""
+    plain, with_context = (WorkflowEntity.get_by_id(db, pipeline_id) for pipeline_id in ids)
+    assert (plain.name, with_context.name) == ("plain", "with-context")
+    assert plain.context["ticket_number"] == "" and with_context.context["ticket_number"] == "T-1"
+    assert [step.status for step in with_context.steps] == [StepStatus.PENDING] * 3
+    assert len(with_context.logs) == 1
+
+
+def test_bulk_creation_rejects_duplicate_names(manager):
+    result = manager.create_workflows_bulk(CONFIG_NAME, ["same", "other", "same"])
+
+    assert "same" in result["error"]
+    assert manager.list_workflows() == []
+
+
+def test_bulk_step_completion_advances_every_pipeline(manager):
+    ids = [pipeline["id"] for pipeline in manager.create_workflows_bulk(CONFIG_NAME, ["a", "b"])["pipelines"]]
+    launch_all(manager, ids)
+    db = manager.db_manager.db
+
+    commits = db.commit_count
+    result = manager.complete_workflow_steps_bulk(ids + ["missing"])
+    assert db.commit_count - commits == transactions(db, ids)
+    assert [pipeline.get("next_step") for pipeline in result["pipelines"][:2]] == ["second-step"] * 2
+    assert "not found" in result["pipelines"][2]["error"]
+
+    manager.complete_workflow_steps_bulk(ids)
+    result = manager.complete_workflow_steps_bulk(["a", "b"])
+    assert [pipeline["next_step"] for pipeline in result["pipelines"]] == [None, None]
+
+    for pipeline_id in ids:
+        stored = WorkflowEntity.get_by_id(db, pipeline_id)
+        assert stored.status == WorkflowStatus.COMPLETED
+        assert [step.status for step in stored.steps] == [StepStatus.COMPLETED] * 3
+
+
+def test_bulk_cancel(manager):
+    ids = [pipeline["id"] for pipeline in manager.create_workflows_bulk(CONFIG_NAME, ["a", "b"])["pipelines"]]
+    db = manager.db_manager.db
+
+    commits = db.commit_count
+    result = manager.cancel_workflows_bulk(ids, "incident closed")
+
+    assert db.commit_count - commits == transactions(db, ids)
+    assert all(pipeline["is_cancelled"] for pipeline in result["pipelines"])
+    stored = WorkflowEntity.get_by_id(db, ids[0])
+    assert stored.is_cancelled and stored.logs[-1]["message"] == "Workflow cancelled. Reason: incident closed"
+    assert "cancelled workflow" in manager.complete_workflow_steps_bulk(ids)["pipelines"][0]["error"]
+
+
+def test_batched_updates_report_the_stale_pipeline(tmp_path):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), workflows_dir=WORKFLOWS_DIR)
+    ids = [pipeline["id"] for pipeline in manager.create_workflows_bulk(CONFIG_NAME, ["a", "b", "c"])["pipelines"]]
+    db = manager.db_manager.db
+    entities = [WorkflowEntity.get_by_id(db, pipeline_id) for pipeline_id in ids]
+    WorkflowEntity.get_by_id(db, ids[1]).update_context({"other": True}).save()
+
+    with pytest.raises(ConcurrentUpdateError) as error:
+        with db.unit_of_work():
+            for entity in entities:
+                entity.cancel("stale").save()
+
+    assert error.value.entity_id == ids[1]
+    assert not WorkflowEntity.get_by_id(db, ids[0]).is_cancelled
+    manager.close()
@@ -0,0 +1,46 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import zlib
+import pytest
+from db import codec
+from db.codec import BlobCodec, decode
+
+
+def test_small_values_stay_text():
+    assert BlobCodec(threshold=100).encode("short") == "short"
+    assert decode("short") == "short"
+    assert decode(None) is None
+
+
+def test_large_values_are_compressed_with_a_header():
+    text = "manifest line\n" * 1000
+    stored = BlobCodec(threshold=100, algorithm="zlib").encode(text)
+
+    assert isinstance(stored, bytes) and stored[0] == codec.ZLIB
+    assert len(stored) < len(text) / 10
+    assert decode(stored) == text
+
+
+def test_raw_and_unknown_headers():
+    assert decode(bytes([codec.RAW]) + "plain".encode()) == "plain"
+    with pytest.raises(ValueError):
+        decode(bytes([9]) + zlib.compress(b"x"))
+
+
+@pytest.mark.skipif(codec.zstandard is None, reason="zstandard is not installed")
+def test_zstd_round_trip():
+    text = "artifact " * 1000
+    stored = BlobCodec(threshold=100, algorithm="zstd").encode(text)
+    assert stored[0] == codec.ZSTD
+    assert decode(stored) == text
+
+
+def test_zstd_requires_the_package(monkeypatch):
+    monkeypatch.setattr(codec, "zstandard", None)
+    assert BlobCodec().algorithm == "zlib"
+    with pytest.raises(ValueError):
+        BlobCodec(algorithm="zstd")
@@ -0,0 +1,107 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+from conditionsEvaluator import ConditionEvaluator
+from db.workflowStep import StepStatus
+from pipelineMGMT.conditions import compile_condition, compile_expression, completion_condition
+from pipelineMGMT.configRegistry import ConfigRegistry
+from pipelineMGMT.manager import WorkflowManager
+from pipelineMGMT.parser import WorkflowParser
+
+BUILD_CONFIG = {
+    "name": "build-config",
+    "description": "Build",
+    "context": {"built-assets-location": {"type": "string", "required": True}, "ticket_number": ""},
+    "steps": [
+        {"id": "build", "instructions": "Build", "completion": "built-assets-location != null"},
+        {"id": "notify", "instructions": "Notify", "completion": "User has to confirm that they notified the customer."},
+        {"id": "approve", "instructions": "Approve", "completion": "Approved"}
+    ]
+}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    workflows_dir = tmp_path / "workflows"
+    workflows_dir.mkdir()
+    (workflows_dir / "build.json").write_text(json.dumps(BUILD_CONFIG))
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), workflows_dir=str(workflows_dir))
+    yield manager
+    manager.close()
+
+
+def test_expressions():
+    context = {"built-assets-location": {"type": "string", "required": True}, "retries": 2, "owner": {"team": "core"}, "env": "prod"}
+
+    assert not compile_expression("built-assets-location != null")(context)
+    assert compile_expression("missing == null and env == 'prod'")(context)
+    assert compile_expression("retries < 3 && owner.team == \"core\"")(context)
+    assert compile_expression("env in ['prod', 'stage'] and not (retries >= 2 or env not in ['prod'])")(context) is False
+    # Values that can't be compared don't match
+    assert not compile_expression("env > 1")(context)
+    assert compile_expression("a != null") is compile_expression("a != null")
+
+
+def test_completion_descriptions_and_invalid_conditions():
+    assert completion_condition("User has to confirm that they copied the assets.") is None
+    assert completion_condition("Task details should be provided under 'task_details'.") is None
+    # Plain text that would parse as an expression is still a description
+    for text in ("Deployed in production", "Approved", "done", "Assets not in repo", "not started", "Wait for > 5 approvals"):
+        assert completion_condition(text) is None, text
+    assert completion_condition("retries > 1").source == "retries > 1"
+    assert completion_condition("ticket_number && approved") is not None
+    with pytest.raises(ValueError, match="ends unexpectedly"):
+        completion_condition("built-assets-location !=")
+    with pytest.raises(ValueError, match="invalid completion condition"):
+        WorkflowParser.validate_workflow_config(dict(BUILD_CONFIG, steps=[{"id": "a", "completion": "x == (y"}]))
+
+
+def test_dict_conditions_match_the_evaluator():
+    condition = {"all": [
+        {"parameter": "ticket_number", "operator": "!=", "value": ""},
+        {"any": [{"step_completed": "build"}, {"output_available": "build.url"}]},
+        {"not": {"parameter": "retries", "operator": ">", "value": 3}}
+    ]}
+    evaluator = ConditionEvaluator({"ticket_number": "T-1", "retries": 1}, {"build": "completed"}, {})
+
+    assert evaluator.evaluate(condition)
+    assert evaluator.evaluate(compile_condition(condition))
+    assert not evaluator.evaluate({"parameter": "retries", "operator": "~", "value": 1})
+    assert not compile_condition(condition)({"ticket_number": "T-1", "retries": 1}, {"build": "running"}, {})
+
+
+def test_conditions_are_compiled_once_per_config(tmp_path):
+    (tmp_path / "build.json").write_text(json.dumps(BUILD_CONFIG))
+    registry = ConfigRegistry(str(tmp_path))
+
+    conditions = registry.get_step_conditions("build-config")
+    assert list(conditions) == ["build"]
+    assert conditions["build"].source == "built-assets-location != null"
+
+    (tmp_path / "other.json").write_text(json.dumps(dict(BUILD_CONFIG, name="other")))
+    registry.refresh()
+    assert registry.get_step_conditions("build-config") is conditions
+
+
+def test_completion_waits_for_the_condition(manager):
+    pipeline_id = manager.create_workflow("build-config", "release")["id"]
+    manager.execute_workflow_step(pipeline_id)
+
+    result = manager.complete_workflow_step(pipeline_id, "build")
+    assert "built-assets-location != null" in result["error"]
+    assert manager.db_manager.get_workflow_entity(pipeline_id).get_step("build").status == StepStatus.RUNNING
+
+    # A result that sets the value completes the step
+    manager.complete_workflow_step(pipeline_id, "build", {"built-assets-location": "s3://assets/1"})
+    entity = manager.db_manager.get_workflow_entity(pipeline_id)
+    assert entity.get_step("build").status == StepStatus.COMPLETED
+    assert entity.get_step("notify").status == StepStatus.RUNNING
+
+    # Steps with a descriptive completion complete on request
+    manager.complete_workflow_step(pipeline_id, "notify")
+    assert manager.complete_workflow_step(pipeline_id, "approve") == {"message": "Workflow completed successfully."}
@@ -0,0 +1,191 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+import pytest
+from pipelineMGMT.configRegistry import ConfigRegistry
+from pipelineMGMT.parser import WorkflowParser
+from pipelineMGMT import configCompiler
+from pipelineMGMT.configCompiler import compile_workflow_configs, load_compiled_configs
+
+
+def write_config(directory, filename, name, steps=None):
+    config = {
+        "name": name,
+        "description": f"{name} description",
+        "context": {},
+        "steps": steps if steps is not None else [{"id": "first-step", "instructions": "Do it"}]
+    }
+    path = directory / filename
+    path.write_text(json.dumps(config))
+    return path
+
+
+def test_lookup_by_name(tmp_path):
+    write_config(tmp_path, "a.json", "alpha")
+    write_config(tmp_path, "b.json", "beta")
+
+    registry = ConfigRegistry(str(tmp_path))
+
+    assert registry.get("beta")["description"] == "beta description"
+    assert registry.get("missing") is None
+    assert [config["name"] for config in registry.get_all()] == ["alpha", "beta"]
+
+
+def test_unchanged_files_are_parsed_once(tmp_path, monkeypatch):
+    write_config(tmp_path, "a.json", "alpha")
+    write_config(tmp_path, "b.json", "beta")
+
+    parsed = []
+    original = WorkflowParser.parse_json_file
+
+    def counting_parse(file_path):
+        parsed.append(os.path.basename(file_path))
+        return original(file_path)
+
+    monkeypatch.setattr(WorkflowParser, "parse_json_file", staticmethod(counting_parse))
+
+    registry = ConfigRegistry(str(tmp_path))
+    registry.get_all()
+    registry.get("alpha")
+    registry.get_all()
+
+    assert sorted(parsed) == ["a.json", "b.json"]
+
+
+def test_changed_added_and_removed_files(tmp_path):
+    path = write_config(tmp_path, "a.json", "alpha")
+    registry = ConfigRegistry(str(tmp_path))
+    assert registry.get("alpha")
+
+    write_config(tmp_path, "a.json", "alpha-renamed", steps=[{"id": "x"}, {"id": "y"}])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    write_config(tmp_path, "b.json", "beta")
+
+    assert registry.get("alpha") is None
+    assert len(registry.get("alpha-renamed")["steps"]) == 2
+    assert registry.get("beta")
+
+    (tmp_path / "b.json").unlink()
+    assert registry.get("beta") is None
+
+
+def test_invalid_file_is_reported_and_skipped(tmp_path):
+    write_config(tmp_path, "a.json", "alpha")
+    (tmp_path / "broken.json").write_text("{not json")
+
+    registry = ConfigRegistry(str(tmp_path))
+
+    assert [config["name"] for config in registry.get_all()] == ["alpha"]
+    assert str(tmp_path / "broken.json") in registry.get_errors()
+
+
+def test_registry_is_shared_per_directory(tmp_path):
+    assert ConfigRegistry.for_directory(str(tmp_path)) is ConfigRegistry.for_directory(str(tmp_path) + os.sep)
+
+
+def test_broken_file_keeps_last_good_version(tmp_path):
+    path = write_config(tmp_path, "a.json", "alpha")
+    registry = ConfigRegistry(str(tmp_path))
+    good = registry.get("alpha")
+
+    path.write_text("{broken")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert registry.get("alpha") is good
+    assert str(path) in registry.get_errors()
+
+    write_config(tmp_path, "a.json", "alpha")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+    assert registry.get("alpha") is not good
+    assert registry.get_errors() == {}
+
+
+def test_snapshots_are_immutable_and_swapped(tmp_path):
+    write_config(tmp_path, "a.json", "alpha")
+    registry = ConfigRegistry(str(tmp_path))
+    first = registry.current()
+
+    write_config(tmp_path, "b.json", "beta")
+    second = registry.current()
+
+    assert second is not first
+    assert second.generation == first.generation + 1
+    assert "beta" not in first.by_name
+    with pytest.raises(TypeError):
+        second.by_name["gamma"] = {}
+
+
+def test_watcher_publishes_new_snapshot(tmp_path):
+    write_config(tmp_path, "a.json", "alpha")
+    registry = ConfigRegistry(str(tmp_path))
+    registry.start_watching(interval=0.05)
+    try:
+        assert registry.is_watching
+        write_config(tmp_path, "b.json", "beta")
+
+        deadline = time.monotonic() + 5
+        while registry.snapshot.by_name.get("beta") is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        assert registry.get("beta")
+    finally:
+        registry.stop_watching()
+    assert not registry.is_watching
+
+
+def test_compiled_snapshot_skips_parsing_unchanged_files(tmp_path, monkeypatch):
+    write_config(tmp_path, "a.json", "alpha")
+    write_config(tmp_path, "b.json", "beta")
+    assert compile_workflow_configs(str(tmp_path)) == (2, {})
+
+    write_config(tmp_path, "b.json", "beta-changed")
+
+    parsed = []
+    original = WorkflowParser.parse_json_file
+
+    def counting_parse(file_path):
+        parsed.append(os.path.basename(file_path))
+        return original(file_path)
+
+    monkeypatch.setattr(WorkflowParser, "parse_json_file", staticmethod(counting_parse))
+
+    registry = ConfigRegistry(str(tmp_path))
+
+    assert [config["name"] for config in registry.get_all()] == ["alpha", "beta-changed"]
+    assert parsed == ["b.json"]
+
+
+def test_compiler_cli_reports_invalid_configs(tmp_path, capsys):
+    write_config(tmp_path, "a.json", "alpha")
+    (tmp_path / "broken.json").write_text("{broken")
+    output = tmp_path / "out.bin"
+
+    assert configCompiler.main([str(tmp_path), "-o", str(output)]) == 1
+    assert "broken.json" in capsys.readouterr().err
+    assert [config["name"] for config in load_compiled_configs(str(output)).configs.values()] == ["alpha"]
+
+
+def test_incompatible_snapshot_is_ignored(tmp_path):
+    snapshot = tmp_path / "bad.bin"
+    snapshot.write_bytes(b"not a snapshot")
+    assert load_compiled_configs(str(snapshot)).configs == {}
+    assert load_compiled_configs(str(tmp_path / "missing.bin")).configs == {}
+
+
+def test_compiled_snapshot_matches_hash_when_mtime_changed(tmp_path, monkeypatch):
+    path = write_config(tmp_path, "a.json", "alpha")
+    compile_workflow_configs(str(tmp_path))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    monkeypatch.setattr(WorkflowParser, "parse_json_file", staticmethod(lambda file_path: pytest.fail("parsed")))
+
+    assert ConfigRegistry(str(tmp_path)).get("alpha")["name"] == "alpha"
@@ -5,8 +5,12 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import asyncio
-from pipelineMGMT.manager import WorkflowManager
-from gpmgmt import get_available_workflows, get_details_for_workflow, launch_pipeline, create_pipeline, execute_pipeline_step, complete_pipeline_current_step, update_pipeline_context
+import tempfile
+
+# Keep the pipelines created here out of the repository's workflows.db: gpmgmt opens its database on import
+os.environ.setdefault("GPMGMT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="gpmgmt-tools-"), "workflows.db"))
+
+from gpmgmt import workflowManager, get_available_workflows, get_details_for_workflow, launch_pipeline, create_pipeline, execute_pipeline_step, complete_pipeline_current_step, update_pipeline_context
 
 
 async def main():
@@ -47,7 +51,7 @@ async def main():
 
     # List all active pipelines
     print("List all active pipelines...")
-    workflows_str = WorkflowManager().list_workflows()
+    workflows_str = workflowManager.list_workflows()
     print("Active workflows:")
     print(workflows_str)
 
@@ -0,0 +1,127 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+import pytest
+from db.workflowStep import StepStatus
+from db.models import WorkflowStatus
+from pipelineMGMT.asyncManager import AsyncWorkflowManager
+from pipelineMGMT.manager import WorkflowManager
+from pipelineMGMT.mcpClientPool import MCPClientPool, MCPToolError
+
+STUB_SERVER = {"command": sys.executable, "args": [os.path.join(os.path.dirname(__file__), "mcpStubServer.py")]}
+
+CONFIG = {
+    "name": "automated-config",
+    "description": "Automated steps",
+    "context": {"ticket_number": ""},
+    "steps": [
+        {"id": "echo-ticket", "action": {"server": STUB_SERVER, "tool": "echo", "arguments": {"text": "closed {ticket_number}"}}},
+        {"id": "review", "instructions": "Review {ticket_number}"}
+    ]
+}
+
+
+@pytest.fixture
+def pool():
+    pool = MCPClientPool(max_calls_per_server=2)
+    yield pool
+    pool.close()
+
+
+def test_calls_share_one_session_per_server(pool):
+    assert pool.call_tool(STUB_SERVER, "pid") == pool.call_tool(STUB_SERVER, "pid")
+    assert pool.call_tool(STUB_SERVER, "echo", {"text": "hello"}) == "hello"
+    assert pool.get_stats() == {"sessions": 1, "sessions_opened": 1}
+
+
+def test_calls_per_server_are_limited(pool):
+    futures = [pool.submit(STUB_SERVER, "slow", {"seconds": 0.2}) for _ in range(5)]
+
+    # The stub reports the most calls it saw running at once
+    assert max(int(future.result()) for future in futures) == 2
+
+
+def test_tool_errors_are_raised(pool):
+    with pytest.raises(MCPToolError, match="boom"):
+        pool.call_tool(STUB_SERVER, "fail", {"message": "boom"})
+    with pytest.raises(TimeoutError):
+        pool.call_tool(STUB_SERVER, "slow", {"seconds": 5}, timeout=0.5)
+    with pytest.raises(ValueError):
+        pool.submit({"args": []}, "echo")
+
+
+def test_idle_sessions_are_closed():
+    with MCPClientPool(idle_timeout=0.2) as pool:
+        first = pool.call_tool(STUB_SERVER, "pid")
+        deadline = time.monotonic() + 5
+        while pool.get_stats()["sessions"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        assert pool.get_stats()["sessions"] == 0
+        assert pool.call_tool(STUB_SERVER, "pid") != first
+        assert pool.get_stats()["sessions_opened"] == 2
+
+
+def test_automated_step_runs_its_tool(tmp_path, pool):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), mcp_clients=pool)
+    entity = manager.db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    manager.update_workflow(entity.id, {"ticket_number": "T-1"})
+
+    execution = manager.execute_workflow_step(entity.id)
+
+    assert (execution["result"], execution["next_step"]) == ("closed T-1", "review")
+    step = manager.db_manager.get_workflow_entity(entity.id).get_step("echo-ticket")
+    assert (step.status, step.result) == (StepStatus.COMPLETED, "closed T-1")
+    manager.db_manager.close()
+
+
+def test_failed_tool_fails_the_step(tmp_path, pool):
+    config = dict(CONFIG, steps=[{"id": "fail", "action": {"server": STUB_SERVER, "tool": "fail", "arguments": {"message": "down"}}}])
+    async_manager = AsyncWorkflowManager(WorkflowManager(str(tmp_path / "workflows.db"), mcp_clients=pool))
+    entity = async_manager.workflow_manager.db_manager.create_workflow_entity(config, name="pipeline")
+
+    result = asyncio.run(async_manager.launch_workflow(entity.id))
+
+    assert "down" in result["step_execution"]["error"]
+    stored = async_manager.workflow_manager.db_manager.get_workflow_entity(entity.id)
+    assert stored.status == WorkflowStatus.RUNNING
+    assert stored.get_step("fail").status == StepStatus.FAILED
+    async_manager.close()
+
+
+def test_missing_context_does_not_run_the_action(tmp_path, pool):
+    config = dict(CONFIG, steps=[{"id": "echo", "action": {"server": STUB_SERVER, "tool": "echo", "arguments": {"text": "{customer_id}"}}}])
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), mcp_clients=pool)
+    entity = manager.db_manager.create_workflow_entity(config, name="pipeline")
+
+    assert "customer_id" in manager.execute_workflow_step(entity.id)["error"]
+    assert pool.get_stats()["sessions_opened"] == 0
+    manager.db_manager.close()
+
+
+def test_missing_context_still_runs_the_steps_started_alongside(tmp_path, pool):
+    config = dict(CONFIG, steps=[
+        {"id": "needs-customer", "action": {"server": STUB_SERVER, "tool": "echo", "arguments": {"text": "{customer_id}"}}},
+        {"id": "echo-ticket", "action": {"server": STUB_SERVER, "tool": "echo", "arguments": {"text": "closed"}}, "depends_on": []}
+    ])
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), mcp_clients=pool)
+    entity = manager.db_manager.create_workflow_entity(config, name="pipeline")
+
+    response = manager.launch_workflow(entity.id)
+
+    assert "customer_id" in response["step_execution"]["error"]
+    assert response["step_execution"]["automated_steps"] == [{"step": "echo-ticket", "result": "closed"}]
+    stored = manager.db_manager.get_workflow_entity(entity.id)
+    assert stored.get_step("needs-customer").status == StepStatus.RUNNING
+    assert stored.get_step("echo-ticket").status == StepStatus.COMPLETED
+
+    async_manager = AsyncWorkflowManager(manager)
+    other = manager.db_manager.create_workflow_entity(config, name="other")
+    response = asyncio.run(async_manager.launch_workflow(other.id))
+    assert response["step_execution"]["automated_steps"] == [{"step": "echo-ticket", "result": "closed"}]
+    async_manager.close()
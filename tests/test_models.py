@@ -0,0 +1,667 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import sqlite3
+import threading
+import pytest
+from db.manager import DatabaseManager, STORAGE_BACKENDS
+from db.models import AmbiguousIdentifierError, WorkflowEntity, WorkflowStatus
+from db.workflowStep import StepStatus
+from pipelineMGMT.manager import WorkflowManager
+
+CONFIG = {
+    "name": "test-config",
+    "description": "Test config",
+    "context": {"ticket_number": ""},
+    "steps": [{"id": f"step-{i}", "instructions": f"Do {i}"} for i in range(5)]
+}
+
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+def storage(request):
+    return request.param
+
+
+@pytest.fixture
+def db_manager(tmp_path, storage):
+    manager = DatabaseManager(str(tmp_path / "workflows.db"), storage=storage)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def sqlite_manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "workflows.db"))
+    yield manager
+    manager.close()
+
+
+def record_statements(db):
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    return statements
+
+
+def test_entity_round_trip(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    entity.start_step("step-0")
+    entity.update_context({"ticket_number": "T-1"})
+    entity.save()
+
+    loaded = db_manager.get_workflow_entity(entity.id)
+
+    assert loaded.name == "pipeline"
+    assert loaded.status == WorkflowStatus.RUNNING
+    assert loaded.context == {"ticket_number": "T-1"}
+    assert [step.name for step in loaded.steps] == [f"step-{i}" for i in range(5)]
+    assert loaded.get_step("step-0").status == StepStatus.RUNNING
+    assert [log["message"] for log in loaded.logs] == [log["message"] for log in entity.logs]
+
+
+def test_step_transition_writes_one_step_row_and_appends_logs(sqlite_manager):
+    entity = sqlite_manager.create_workflow_entity(CONFIG, name="pipeline")
+    entity = sqlite_manager.get_workflow_entity(entity.id)
+
+    statements = record_statements(sqlite_manager.db)
+    entity.start_step("step-2")
+
+    step_writes = [sql for sql in statements if "workflow_steps" in sql]
+    log_writes = [sql for sql in statements if "workflow_logs" in sql]
+    assert len(step_writes) == 1 and "'step-2'" in step_writes[0]
+    assert len(log_writes) == 1 and "Step started: step-2" in log_writes[0]
+    assert sqlite_manager.db.conn.execute("SELECT COUNT(*) FROM workflow_logs").fetchone()[0] == 2
+
+
+def test_new_pipeline_replaces_pipeline_with_same_name(db_manager):
+    first = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    second = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+
+    assert db_manager.get_workflow_entity(first.id) is None
+    assert db_manager.get_workflow_entity("pipeline").id == second.id
+    assert db_manager.db.load_steps([first.id]) == {first.id: []}
+
+
+def test_legacy_rows_are_migrated(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+    CREATE TABLE workflow_entities (
+        id TEXT PRIMARY KEY, name TEXT UNIQUE, config_name TEXT NOT NULL, description TEXT,
+        created_at TEXT NOT NULL, updated_at TEXT NOT NULL, context TEXT NOT NULL, steps TEXT NOT NULL,
+        is_cancelled INTEGER NOT NULL DEFAULT 0, cancelled_at TEXT, logs TEXT NOT NULL, status TEXT DEFAULT 'created'
+    )''')
+    steps = [
+        {"name": "a", "instructions": "A", "status": "completed", "step_type": "manual"},
+        {"name": "b", "instructions": "B", "mcp_server_config": {"tool": "x"}, "status": "running"}
+    ]
+    logs = [{"timestamp": "2025-01-01T00:00:00", "level": "INFO", "message": f"log {i}"} for i in range(3)]
+    conn.execute(
+        "INSERT INTO workflow_entities VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        ("legacy-id", "legacy", "cfg", "desc", "2025-01-01", "2025-01-01", '{"k": 1}',
+         json.dumps(steps), 0, None, json.dumps(logs), "running")
+    )
+    conn.commit()
+    conn.close()
+
+    manager = DatabaseManager(db_path)
+    entity = manager.get_workflow_entity("legacy-id")
+
+    assert "steps" not in [row[1] for row in manager.db.conn.execute("PRAGMA table_info(workflow_entities)")]
+    assert [(step.name, step.status) for step in entity.steps] == [("a", StepStatus.COMPLETED), ("b", StepStatus.RUNNING)]
+    assert entity.get_step("b").mcp_server_config == {"tool": "x"}
+    assert entity.logs == logs
+    assert entity.context == {"k": 1}
+    assert entity.version == 0
+    assert WorkflowEntity.resolve(manager.db, "des").id == "legacy-id"
+    summary = WorkflowEntity.list_summaries(manager.db)[0]
+    assert (summary["current_step"], summary["steps_total"], summary["steps_completed"]) == ("b", 2, 1)
+
+    entity.complete_step("b")
+    assert WorkflowEntity.get_by_id(manager.db, "legacy-id").get_step("b").status == StepStatus.COMPLETED
+    manager.close()
+
+
+def test_reads_do_not_wait_for_the_writer_lock(sqlite_manager):
+    entity = sqlite_manager.create_workflow_entity(CONFIG, name="pipeline")
+    assert sqlite_manager.db.wal_enabled
+
+    result = {}
+
+    def read():
+        result["entity"] = sqlite_manager.get_workflow_entity(entity.id)
+
+    with sqlite_manager.db.lock:
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+
+    assert result["entity"].name == "pipeline"
+
+
+def test_reads_see_committed_writes(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    assert db_manager.get_workflow_entity(entity.id).context == {"ticket_number": ""}
+
+    entity.update_context({"ticket_number": "T-2"})
+    entity.save()
+
+    assert db_manager.get_workflow_entity(entity.id).context == {"ticket_number": "T-2"}
+
+
+def test_in_memory_database_reads_through_writer(tmp_path):
+    manager = DatabaseManager(":memory:")
+    entity = manager.create_workflow_entity(CONFIG, name="pipeline")
+
+    assert not manager.db.wal_enabled
+    assert manager.get_workflow_entity("pipeline").id == entity.id
+    manager.close()
+
+
+def test_complete_current_step_decodes_pipeline_once(tmp_path, monkeypatch, storage):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), storage=storage)
+    entity = manager.db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    manager.launch_workflow(entity.id)
+    manager.db_manager.clear_cache()
+
+    loads = []
+    original = WorkflowEntity.from_row.__func__
+
+    def counting_from_row(cls, db, row, *args):
+        loads.append(row["id"])
+        return original(cls, db, row, *args)
+
+    monkeypatch.setattr(WorkflowEntity, "from_row", classmethod(counting_from_row))
+
+    with manager.unit_of_work() as stats:
+        manager.complete_workflow_current_step(entity.id)
+
+    assert loads == [entity.id]
+    assert stats.misses == 1 and stats.hits == 3
+    assert manager.get_cache_stats()["last_request"]["misses"] == 1
+    manager.close()
+
+
+def test_request_stats_are_kept_per_thread(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    other_started = threading.Event()
+    other_done = threading.Event()
+    seen = {}
+
+    def other_request():
+        with db_manager.request_scope():
+            for _ in range(3):
+                db_manager.get_workflow_entity("missing")
+            other_started.set()
+            other_done.wait(5)
+        seen["other"] = db_manager.get_cache_stats()["last_request"]
+
+    thread = threading.Thread(target=other_request)
+    thread.start()
+    other_started.wait(5)
+    totals = db_manager.cache.totals.hits
+    with db_manager.request_scope():
+        db_manager.get_workflow_entity(entity.id)
+    other_done.set()
+    thread.join()
+
+    # A request finishing on another thread doesn't replace this one's stats
+    assert db_manager.get_cache_stats()["last_request"] == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+    assert seen["other"] == {"hits": 0, "misses": 3, "hit_rate": 0.0}
+    assert db_manager.cache.totals.hits == totals + 1
+
+
+def test_cached_entity_is_revalidated_against_database(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    hits = db_manager.cache.totals.hits
+    cached = db_manager.get_workflow_entity(entity.id)
+    assert db_manager.cache.totals.hits == hits + 1
+    # Each request gets its own copy of the cached pipeline
+    assert cached is not entity
+    assert (cached.id, cached.version) == (entity.id, entity.version)
+
+    # Another writer changes the pipeline behind the cache's back
+    other = WorkflowEntity.get_by_id(db_manager.db, entity.id)
+    other.update_context({"ticket_number": "T-3"})
+    other.save()
+
+    reloaded = db_manager.get_workflow_entity("pipeline")
+    assert reloaded is not entity
+    assert reloaded.context == {"ticket_number": "T-3"}
+
+
+def test_failed_request_evicts_touched_entities(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+
+    with pytest.raises(RuntimeError):
+        with db_manager.request_scope():
+            db_manager.get_workflow_entity(entity.id).update_context({"ticket_number": "unsaved"})
+            raise RuntimeError("tool failed")
+
+    assert db_manager.get_workflow_entity(entity.id).context == {"ticket_number": ""}
+
+
+def test_cache_is_bounded(tmp_path, storage):
+    manager = DatabaseManager(str(tmp_path / "workflows.db"), cache_size=3, storage=storage)
+    for i in range(5):
+        manager.create_workflow_entity(CONFIG, name=f"pipeline-{i}")
+
+    assert len(manager.cache) == 3
+    assert manager.cache.peek("pipeline-0") is None
+    assert manager.cache.peek("pipeline-4") is not None
+    manager.close()
+
+
+def test_tool_calls_commit_once(tmp_path, storage):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), storage=storage)
+    db = manager.db_manager.db
+    entity = manager.db_manager.create_workflow_entity(CONFIG, name="pipeline")
+
+    for call in (
+        lambda: manager.launch_workflow(entity.id),
+        lambda: manager.update_workflow(entity.id, {"ticket_number": "T-4"}),
+        lambda: manager.complete_workflow_current_step(entity.id),
+    ):
+        before = db.commit_count
+        call()
+        assert db.commit_count - before == 1
+
+    stored = WorkflowEntity.get_by_id(db, entity.id)
+    assert stored.context == {"ticket_number": "T-4"}
+    assert [step.status for step in stored.steps[:2]] == [StepStatus.COMPLETED, StepStatus.RUNNING]
+    manager.close()
+
+
+def test_conflicting_tool_call_is_run_again(tmp_path, storage):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), storage=storage)
+    entity = manager.db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    manager.db_manager.clear_cache()
+
+    def save_from_another_request():
+        other = WorkflowEntity.get_by_id(manager.db_manager.db, entity.id)
+        other.update_context({"other": "request"})
+        other.save()
+
+    attempts = []
+    original = manager.db_manager.get_workflow_entity
+
+    def get_workflow_entity(identifier):
+        loaded = original(identifier)
+        attempts.append(loaded.version)
+        if len(attempts) == 1:
+            # Saved in between this request's load and its commit
+            writer = threading.Thread(target=save_from_another_request)
+            writer.start()
+            writer.join()
+        return loaded
+
+    manager.db_manager.get_workflow_entity = get_workflow_entity
+    manager.update_workflow(entity.id, {"ticket_number": "T-5"})
+
+    assert attempts == [1, 2]
+    stored = WorkflowEntity.get_by_id(manager.db_manager.db, entity.id)
+    assert stored.context == {"ticket_number": "T-5", "other": "request"}
+    assert stored.version == 3
+    manager.close()
+
+
+def test_concurrent_tool_calls_on_one_pipeline(tmp_path, storage, capsys):
+    config = dict(CONFIG, steps=[{"id": f"step-{i}", "instructions": f"Do {i}"} for i in range(200)])
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), storage=storage)
+    entity = manager.db_manager.create_workflow_entity(config, name="pipeline")
+    manager.launch_workflow(entity.id)
+    errors = []
+
+    def caller():
+        for _ in range(25):
+            try:
+                manager.complete_workflow_current_step(entity.id)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stored = WorkflowEntity.get_by_id(manager.db_manager.db, entity.id)
+    statuses = [step.status for step in stored.steps]
+    # Every call completed one step and started the next
+    assert statuses[:101] == [StepStatus.COMPLETED] * 100 + [StepStatus.RUNNING]
+    assert statuses.count(StepStatus.PENDING) == 99
+    messages = [log["message"] for log in stored.logs]
+    assert sum(message.startswith("Step completed:") for message in messages) == 100
+    assert sum(message.startswith("Step started:") for message in messages) == 101
+    manager.close()
+
+
+def test_unit_of_work_is_atomic(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    commits = db_manager.db.commit_count
+
+    with pytest.raises(RuntimeError):
+        with db_manager.unit_of_work():
+            loaded = db_manager.get_workflow_entity(entity.id)
+            loaded.complete_step("step-0")
+            loaded.start_step("step-1")
+            raise RuntimeError("tool failed")
+
+    assert db_manager.db.commit_count == commits
+    stored = WorkflowEntity.get_by_id(db_manager.db, entity.id)
+    assert [step.status for step in stored.steps[:2]] == [StepStatus.PENDING, StepStatus.PENDING]
+    assert db_manager.get_workflow_entity(entity.id).get_step("step-0").status == StepStatus.PENDING
+
+
+def with_description(config, description):
+    return {**config, "description": description}
+
+
+def test_lookup_queries_use_indexes(sqlite_manager):
+    def plan(query, params=()):
+        return " ".join(row[3] for row in sqlite_manager.db.conn.execute("EXPLAIN QUERY PLAN " + query, params))
+
+    assert "idx_workflow_entities_config_name" in plan(
+        "SELECT * FROM workflow_entities WHERE config_name = ? AND is_cancelled = 0", ("cfg",))
+    assert "idx_workflow_entities_status" in plan("SELECT * FROM workflow_entities WHERE status = ?", ("running",))
+
+    condition, params = sqlite_manager.db.search_condition("description", "deploy")
+    description_plan = plan(f"SELECT * FROM workflow_entities WHERE {condition}", params)
+    assert sqlite_manager.db.search_enabled
+    assert "workflow_entities_fts VIRTUAL TABLE" in description_plan
+    assert "SEARCH workflow_entities USING INTEGER PRIMARY KEY" in description_plan
+
+
+def test_search_index_follows_inserts_updates_and_deletes(sqlite_manager):
+    db = sqlite_manager.db
+    entity = sqlite_manager.create_workflow_entity(with_description(CONFIG, "Deploy the billing service"), name="billing")
+
+    assert WorkflowEntity.get_by_description(db, "billing serv").id == entity.id
+
+    with db.lock:
+        db.conn.execute("UPDATE workflow_entities SET description = 'Rotate credentials' WHERE id = ?", (entity.id,))
+        db.commit()
+    assert WorkflowEntity.get_by_description(db, "billing serv") is None
+    assert WorkflowEntity.get_by_description(db, "ROTATE").id == entity.id
+
+    sqlite_manager.create_workflow_entity(with_description(CONFIG, "Something else"), name="billing")
+    assert WorkflowEntity.get_by_description(db, "rotate") is None
+
+
+def test_resolve_prefers_id_then_name_then_description(db_manager):
+    first = db_manager.create_workflow_entity(with_description(CONFIG, "Release second"), name="first")
+    second = db_manager.create_workflow_entity(with_description(CONFIG, "Release first"), name="second")
+
+    assert WorkflowEntity.resolve(db_manager.db, first.id).id == first.id
+    assert WorkflowEntity.resolve(db_manager.db, "second").id == second.id
+    assert WorkflowEntity.resolve(db_manager.db, "release fir").id == second.id
+    assert WorkflowEntity.resolve(db_manager.db, "no such pipeline") is None
+
+
+def test_ambiguous_description_is_reported(db_manager):
+    for name in ("a", "b"):
+        db_manager.create_workflow_entity(with_description(CONFIG, "Nightly backup"), name=name)
+
+    with pytest.raises(AmbiguousIdentifierError) as error:
+        db_manager.get_workflow_entity("nightly")
+    assert error.value.names == ["a", "b"]
+
+    # Short identifiers can't use the trigram index and fall back to LIKE
+    with pytest.raises(AmbiguousIdentifierError):
+        db_manager.get_workflow_entity("ba")
+
+
+def test_save_updates_only_changed_columns(sqlite_manager):
+    entity = sqlite_manager.create_workflow_entity(CONFIG, name="pipeline")
+    entity = sqlite_manager.get_workflow_entity(entity.id)
+    assert not entity.has_changes()
+
+    statements = record_statements(sqlite_manager.db)
+    entity.update_context({"ticket_number": "T-1"})
+    entity.save()
+
+    entity_writes = [sql for sql in statements if sql.startswith("UPDATE workflow_entities")]
+    assert len(entity_writes) == 1
+    assert "context = " in entity_writes[0] and "status" not in entity_writes[0]
+    assert not [sql for sql in statements if "workflow_steps" in sql]
+    assert entity.last_save_bytes < 200
+
+    statements.clear()
+    entity.start_step("step-1")
+    step_writes = [sql for sql in statements if "workflow_steps" in sql]
+    assert len(step_writes) == 1
+    assert step_writes[0].startswith("UPDATE workflow_steps SET started_at = ")
+    assert "instructions" not in step_writes[0]
+
+    loaded = WorkflowEntity.get_by_id(sqlite_manager.db, entity.id)
+    assert loaded.context == {"ticket_number": "T-1"}
+    assert loaded.get_step("step-1").status == StepStatus.RUNNING
+    assert loaded.get_step("step-1").started_at == entity.get_step("step-1").started_at
+
+
+def test_save_without_changes_writes_nothing(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    entity.start_step("step-0")
+    commits, written = db_manager.db.commit_count, db_manager.db.bytes_written
+
+    entity.status = WorkflowStatus.RUNNING
+    entity.save()
+
+    assert db_manager.db.commit_count == commits
+    assert db_manager.db.bytes_written == written
+    assert db_manager.db.skipped_saves == 1
+
+
+def test_summary_columns_follow_step_transitions(db_manager):
+    entity = db_manager.create_workflow_entity(CONFIG, name="pipeline")
+    summary = WorkflowEntity.list_summaries(db_manager.db)[0]
+    assert (summary["current_step"], summary["steps_total"], summary["steps_completed"]) == (None, 5, 0)
+    assert summary["last_activity_at"] == entity.created_at
+
+    entity.start_step("step-0")
+    entity.complete_step("step-0")
+    entity.start_step("step-1")
+
+    summary = WorkflowEntity.list_summaries(db_manager.db, {"status": WorkflowStatus.RUNNING})[0]
+    assert summary["current_step"] == "step-1"
+    assert summary["steps_completed"] == 1
+    assert summary["status"] == "running"
+    assert summary["last_activity_at"] == entity.updated_at >= entity.get_step("step-1").started_at
+    assert "context" not in summary
+
+
+def test_list_workflows_does_not_load_steps(tmp_path):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"))
+    manager.db_manager.create_workflow_entity(CONFIG, name="pipeline").start_step("step-3")
+
+    statements = record_statements(manager.db_manager.db)
+    manager.db_manager.db.read_pool = False  # run the reads on the traced writer connection
+    pipelines = manager.list_workflows()
+
+    assert [(p["name"], p["current_step"], p["status"]) for p in pipelines] == [
+        ("pipeline", "step-3", str(WorkflowStatus.RUNNING))
+    ]
+    assert not [sql for sql in statements if "workflow_steps" in sql or "context" in sql]
+    manager.db_manager.close()
+
+
+def test_summary_pages_walk_every_pipeline_once(db_manager):
+    entities = [db_manager.create_workflow_entity(CONFIG, name=f"pipeline-{i}") for i in range(7)]
+    entities[2].start_step("step-0")
+    entities[5].cancel().save()
+
+    seen, cursor = [], None
+    while True:
+        page = db_manager.workflow_summary_page(limit=3, cursor=cursor)
+        seen.append([summary["name"] for summary in page])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert [len(names) for names in seen] == [3, 3, 1]
+    expected = sorted(entities, key=lambda entity: (entity.updated_at, entity.id), reverse=True)
+    assert sum(seen, []) == [entity.name for entity in expected]
+
+    active = list(db_manager.workflow_summary_page({"status": ["created", "running"]}, limit=10))
+    assert len(active) == 6 and "pipeline-5" not in [summary["name"] for summary in active]
+    assert [s["name"] for s in db_manager.workflow_summary_page({"updated_after": entities[5].updated_at})] == ["pipeline-5"]
+
+    with pytest.raises(ValueError):
+        db_manager.workflow_summary_page(cursor="not-a-cursor")
+
+
+def test_web_server_streams_pages(tmp_path, monkeypatch):
+    import importlib.util
+    from fastapi.testclient import TestClient
+
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager("workflows.db")
+    for i in range(3):
+        manager.create_workflow_entity(CONFIG, name=f"pipeline-{i}")
+    manager.close()
+
+    path = os.path.join(os.path.dirname(__file__), "..", "db-web-server.py")
+    spec = importlib.util.spec_from_file_location("db_web_server", path)
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    client = TestClient(server.app)
+
+    first = client.get("/workflows", params={"limit": 2}).json()
+    second = client.get("/workflows", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    assert [w["name"] for w in first["items"] + second["items"]] == ["pipeline-2", "pipeline-1", "pipeline-0"]
+    assert second["next_cursor"] is None
+    assert [step["name"] for step in json.loads(first["items"][0]["steps"])] == [f"step-{i}" for i in range(5)]
+    assert client.get("/workflows", params={"status": "bogus"}).status_code == 400
+    server.db.close()
+
+
+def test_finished_pipelines_are_archived_and_still_found(tmp_path, storage):
+    # In-memory storage only archives when given an archive
+    db_manager = DatabaseManager(
+        str(tmp_path / "workflows.db"), archive_path=str(tmp_path / "workflows.archive.db"), storage=storage
+    )
+    done = db_manager.create_workflow_entity(with_description(CONFIG, "Quarterly report"), name="done")
+    done.start_step("step-0")
+    done.complete_step("step-0")
+    done.complete()
+    running = db_manager.create_workflow_entity(CONFIG, name="running")
+    running.start_step("step-0")
+
+    assert db_manager.archive_finished_pipelines(older_than_days=1) == 0
+    assert db_manager.archive_finished_pipelines(older_than_days=-1) == 1
+
+    assert [row["name"] for row in db_manager.db.select_rows()] == ["running"]
+    assert db_manager.db.load_logs([done.id]) == {done.id: []}
+
+    for identifier in (done.id, "done", "quarterly"):
+        archived = db_manager.get_workflow_entity(identifier)
+        assert archived.id == done.id and archived.archived
+    assert archived.status == WorkflowStatus.COMPLETED
+    assert archived.get_step("step-0").status == StepStatus.COMPLETED
+    assert archived.logs == done.logs
+    assert archived.context == done.context
+    with pytest.raises(ValueError):
+        archived.add_log("late").save()
+
+    assert db_manager.get_workflow_entity("running").id == running.id
+    assert db_manager.get_workflow_entity("missing") is None
+    db_manager.close()
+
+
+def test_pipelines_updated_while_archiving_stay_live(tmp_path, storage, monkeypatch):
+    db_manager = DatabaseManager(
+        str(tmp_path / "workflows.db"), archive_path=str(tmp_path / "workflows.archive.db"), storage=storage
+    )
+    kept = db_manager.create_workflow_entity(CONFIG, name="kept").cancel().save()
+    moved = db_manager.create_workflow_entity(CONFIG, name="moved").cancel().save()
+    store = db_manager.archive.store
+
+    def store_then_update(entities):
+        store(entities)
+        # Another request changes a pipeline after the archival read it
+        other = WorkflowEntity.get_by_id(db_manager.db, kept.id)
+        other.add_log("reopened").save()
+    monkeypatch.setattr(db_manager.archive, "store", store_then_update)
+
+    assert db_manager.archive_finished_pipelines(older_than_days=-1) == 1
+    assert db_manager.archive.count() == 1
+    assert db_manager.archive.find(db_manager.db, "kept") is None
+    assert db_manager.archive.find(db_manager.db, "moved").id == moved.id
+    # Only the archived pipeline is evicted
+    assert db_manager.cache.peek("kept") is not None and db_manager.cache.peek("moved") is None
+    live = db_manager.get_workflow_entity("kept")
+    assert not live.archived and live.logs[-1]["message"] == "reopened"
+    db_manager.close()
+
+
+def test_archive_cli(tmp_path, capsys):
+    from db.archive import main, PipelineArchive
+
+    db_path = str(tmp_path / "workflows.db")
+    manager = DatabaseManager(db_path)
+    manager.create_workflow_entity(CONFIG, name="cancelled").cancel().save()
+    manager.close()
+
+    assert main(["--days", "-1", "--db", db_path]) == 0
+    assert "Archived 1 pipelines" in capsys.readouterr().out
+    archive = PipelineArchive(str(tmp_path / "workflows.archive.db"))
+    assert archive.count() == 1
+    archive.close()
+
+
+def test_large_context_and_logs_are_compressed(tmp_path):
+    from db.codec import BlobCodec
+
+    db_path = str(tmp_path / "workflows.db")
+    manager = DatabaseManager(db_path, codec=BlobCodec(threshold=256, algorithm="zlib"))
+    manifest = {"artifacts": [f"build/output/module-{i}.tar.gz" for i in range(500)]}
+    entity = manager.create_workflow_entity(CONFIG, name="pipeline")
+    entity.update_context({"manifest": manifest})
+    entity.add_log("build output\n" * 200)
+    entity.save()
+
+    with manager.db.reading() as conn:
+        stored = conn.execute("SELECT context FROM workflow_entities").fetchone()[0]
+        messages = [row[0] for row in conn.execute("SELECT message FROM workflow_logs ORDER BY id")]
+    assert isinstance(stored, bytes) and len(stored) < len(json.dumps(manifest)) / 5
+    assert isinstance(messages[-1], bytes) and isinstance(messages[0], str)
+    manager.close()
+
+    # Reading doesn't need the codec to be enabled
+    plain = DatabaseManager(db_path)
+    loaded = plain.get_workflow_entity("pipeline")
+    assert loaded.context["manifest"] == manifest
+    assert loaded.logs[-1]["message"] == "build output\n" * 200
+    plain.close()
+
+
+def test_context_steps_and_logs_are_loaded_on_first_access(sqlite_manager):
+    entity = sqlite_manager.create_workflow_entity(CONFIG, name="pipeline")
+    entity.start_step("step-0")
+
+    loaded = WorkflowEntity.get_by_id(sqlite_manager.db, entity.id)
+    assert loaded.loaded_fields == frozenset()
+    assert loaded.steps_total == 5 and loaded.current_step == "step-0"
+
+    statements = record_statements(sqlite_manager.db)
+    sqlite_manager.db.read_pool = False  # run the reads on the traced writer connection
+    loaded.cancel("no longer needed").save()
+
+    assert not [sql for sql in statements if "workflow_steps" in sql or "FROM workflow_logs" in sql]
+    assert not [sql for sql in statements if "context = " in sql]
+    assert loaded.loaded_fields == frozenset()
+
+    # Logs added before loading follow the stored ones
+    assert [log["message"] for log in loaded.logs][-2:] == ["Step started: step-0", "Workflow cancelled. Reason: no longer needed"]
+    assert loaded.get_step("step-0").status == StepStatus.RUNNING
+    assert loaded.loaded_fields == {"steps", "logs"}
+
+    reloaded = WorkflowEntity.get_by_id(sqlite_manager.db, entity.id)
+    assert reloaded.logs == loaded.logs
+    assert reloaded.is_cancelled and reloaded.context == entity.context
@@ -0,0 +1,59 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+from pipelineMGMT.parser import WorkflowParser
+
+
+def write_config(path, name):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"name": name, "context": {}, "steps": [{"id": "first-step"}]}))
+
+
+def test_report_covers_nested_directories_and_errors(tmp_path):
+    write_config(tmp_path / "a.json", "alpha")
+    write_config(tmp_path / "team" / "nested" / "b.json", "beta")
+    (tmp_path / "team" / "broken.json").write_text("{broken")
+    (tmp_path / "team" / "invalid.json").write_text(json.dumps({"name": "no steps", "context": {}}))
+    write_config(tmp_path / ".hidden" / "c.json", "hidden")
+    (tmp_path / "notes.txt").write_text("not a config")
+
+    report = WorkflowParser.load_workflow_configs_report(str(tmp_path), max_workers=4)
+
+    assert sorted(config["name"] for config in report.configs) == ["alpha", "beta"]
+    assert sorted(os.path.basename(path) for path in report.errors) == ["broken.json", "invalid.json"]
+    assert "steps" in report.errors[str(tmp_path / "team" / "invalid.json")]
+    assert all(result.duration >= 0 for result in report.files)
+    assert len(report.files) == 4
+
+
+def test_non_recursive_loading(tmp_path):
+    write_config(tmp_path / "a.json", "alpha")
+    write_config(tmp_path / "team" / "b.json", "beta")
+
+    configs = WorkflowParser.load_all_workflow_configs(str(tmp_path), recursive=False)
+
+    assert [config["name"] for config in configs] == ["alpha"]
+
+
+def test_yaml_templates_are_loaded(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "deploy.yaml").write_text(
+        "name: yaml-workflow\n"
+        "description: Workflow defined in YAML\n"
+        "context:\n"
+        "  ticket_number: ''\n"
+        "steps:\n"
+        "  - id: first-step\n"
+        "    instructions: Work on {ticket_number}\n"
+    )
+
+    report = WorkflowParser.load_workflow_configs_report(str(tmp_path))
+
+    assert report.errors == {}
+    assert report.configs[0]["name"] == "yaml-workflow"
+    assert report.configs[0]["steps"][0]["instructions"] == "Work on {ticket_number}"
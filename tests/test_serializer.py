@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+from db import serializer
+from db.workflowStep import WorkflowStep, StepStatus, STEP_COLUMNS
+
+VALUE = {"ticket": "T-1", "nested": {"items": [1, 2.5, None, True]}, "text": "naïve ✓"}
+INSTALLED = [name for name, (available, _) in serializer.BACKENDS.items() if available()]
+
+
+@pytest.mark.parametrize("name", INSTALLED)
+def test_backends_write_compact_json_any_backend_reads(name):
+    encoded = serializer.get_serializer(name).dumps(VALUE)
+
+    assert isinstance(encoded, str)
+    assert ", " not in encoded and "✓" in encoded
+    for other in INSTALLED:
+        assert serializer.get_serializer(other).loads(encoded) == VALUE
+    assert json.loads(encoded) == VALUE
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        serializer.get_serializer("pickle")
+
+
+def test_step_row_round_trip():
+    step = WorkflowStep(name="deploy", instructions="Deploy {ticket}", mcp_server_config={"tool": "ci", "args": [1]},
+                        status=StepStatus.RUNNING, started_at="2025-01-01T00:00:00")
+    row = dict(zip(STEP_COLUMNS, step.to_row()))
+
+    assert isinstance(row["mcp_server_config"], str)
+    assert row["status"] == "running"
+    assert WorkflowStep.from_row(row) == step
+    assert step.to_dict()["mcp_server_config"] == {"tool": "ci", "args": [1]}
@@ -0,0 +1,164 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import sqlite3
+import pytest
+import db.manager
+from db.database import Database
+from db.models import WorkflowEntity, WorkflowStatus
+from db.stepGraph import step_dependencies, step_plan, topological_order
+from db.workflowStep import StepStatus
+from pipelineMGMT.manager import WorkflowManager
+from pipelineMGMT.mcpClientPool import MCPClientPool
+from pipelineMGMT.parser import WorkflowParser
+
+STUB_SERVER = {"command": sys.executable, "args": [os.path.join(os.path.dirname(__file__), "mcpStubServer.py")]}
+
+
+def dag_config(steps):
+    return {"name": "dag-config", "description": "DAG", "context": {}, "steps": steps}
+
+
+RELEASE_CONFIG = dag_config([
+    {"id": "deploy", "instructions": "Deploy", "depends_on": ["build", "lint"]},
+    {"id": "build", "instructions": "Build", "depends_on": []},
+    {"id": "lint", "instructions": "Lint", "depends_on": []},
+    {"id": "announce", "instructions": "Announce"}
+])
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = WorkflowManager(str(tmp_path / "workflows.db"))
+    yield manager
+    manager.close()
+
+
+def step_statuses(entity):
+    return {step.name: step.status for step in entity.steps}
+
+
+def test_validation_orders_steps_after_their_dependencies():
+    config = dag_config([dict(step) for step in RELEASE_CONFIG["steps"]])
+
+    WorkflowParser.validate_workflow_config(config)
+
+    # A step without depends_on waits for the step before it in the file
+    assert step_dependencies(config["steps"])["announce"] == ("lint",)
+    assert step_dependencies([{"id": "a"}, {"id": "b"}]) == {"a": (), "b": ("a",)}
+    assert topological_order(step_dependencies(config["steps"])) == ["build", "lint", "deploy", "announce"]
+    # Cached configs are shared, so validation leaves them as they are
+    assert config == RELEASE_CONFIG
+
+
+def test_step_plan_is_worked_out_once_per_config(tmp_path, monkeypatch):
+    workflows_dir = tmp_path / "workflows"
+    workflows_dir.mkdir()
+    (workflows_dir / "release.json").write_text(json.dumps(RELEASE_CONFIG))
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), workflows_dir=str(workflows_dir))
+    config = manager.config_manager.get_workflow_config("dag-config")
+
+    plan = manager.config_manager.get_step_plan(config)
+    assert plan == step_plan(RELEASE_CONFIG["steps"])
+    assert [(step["id"], depends_on) for step, depends_on in plan] == [
+        ("build", None), ("lint", ()), ("deploy", ("build", "lint")), ("announce", ("lint",))
+    ]
+    assert manager.config_manager.get_step_plan(dict(config)) is None
+
+    # Pipelines are built from the registry's plan
+    monkeypatch.setattr(db.manager, "step_plan", lambda steps: pytest.fail("step plan worked out again"))
+    manager.create_workflow("dag-config", "release")
+    manager.create_workflows_bulk("dag-config", ["release-2", "release-3"])
+    assert manager.config_manager.get_step_plan(config) is plan
+    assert [step.name for step in manager.db_manager.get_workflow_entity("release-3").steps] == ["build", "lint", "deploy", "announce"]
+    manager.close()
+
+
+def test_validation_rejects_cycles_and_unknown_steps():
+    with pytest.raises(ValueError, match="form a cycle: a -> c -> b -> a"):
+        topological_order({"a": ("c",), "b": ("a",), "c": ("b",)})
+    with pytest.raises(ValueError, match="unknown step 'missing'"):
+        WorkflowParser.validate_workflow_config(dag_config([{"id": "a", "depends_on": ["missing"]}]))
+    with pytest.raises(ValueError, match="list of step ids"):
+        WorkflowParser.validate_workflow_config(dag_config([{"id": "a", "depends_on": "b"}]))
+
+
+def test_independent_steps_run_at_the_same_time(manager):
+    entity = manager.db_manager.create_workflow_entity(RELEASE_CONFIG, name="release")
+    assert [step.name for step in entity.steps] == ["build", "lint", "deploy", "announce"]
+    # Each call changes its own copy of the pipeline
+    current = lambda: manager.db_manager.get_workflow_entity(entity.id)
+
+    manager.launch_workflow(entity.id)
+    assert [step.name for step in current().get_running_steps()] == ["build", "lint"]
+    with pytest.raises(ValueError, match="waiting for steps: build, lint"):
+        manager.executor.execute_workflow_step(entity.id, "deploy")
+
+    manager.complete_workflow_step(entity.id, "build")
+    assert step_statuses(current())["deploy"] == StepStatus.PENDING
+    manager.complete_workflow_step(entity.id, "lint")
+    assert [step.name for step in current().get_running_steps()] == ["deploy", "announce"]
+
+    manager.complete_workflow_step(entity.id, "deploy")
+    manager.complete_workflow_step(entity.id, "announce")
+    stored = WorkflowEntity.get_by_id(manager.db_manager.db, entity.id)
+    assert stored.status == WorkflowStatus.COMPLETED
+    # Waiting for the step just before is stored as None
+    assert [step.depends_on for step in stored.steps] == [None, (), ("build", "lint"), ("lint",)]
+
+
+def test_ready_steps_are_updated_as_steps_complete(manager):
+    entity = manager.db_manager.create_workflow_entity(RELEASE_CONFIG, name="release")
+    assert [step.name for step in entity.get_ready_steps()] == ["build", "lint"]
+
+    entity.start_step("build")
+    entity.complete_step("build")
+    assert [step.name for step in entity.get_ready_steps()] == ["lint"]
+    assert entity.get_unmet_dependencies(entity.get_step("deploy")) == ["lint"]
+    entity.complete_step("lint")
+    assert [step.name for step in entity.get_ready_steps()] == ["deploy", "announce"]
+
+    # Running a completed step again rebuilds the counts
+    entity.start_step("lint")
+    assert entity.get_ready_steps() == []
+
+
+def test_independent_automated_steps_call_their_tools_concurrently(tmp_path):
+    slow = {"server": STUB_SERVER, "tool": "slow", "arguments": {"seconds": 0.5}}
+    config = dag_config([
+        {"id": "first", "action": slow, "depends_on": []},
+        {"id": "second", "action": slow, "depends_on": []},
+        {"id": "report", "action": {"server": STUB_SERVER, "tool": "echo", "arguments": {"text": "done"}},
+         "depends_on": ["first", "second"]}
+    ])
+    manager = WorkflowManager(str(tmp_path / "workflows.db"), mcp_clients=MCPClientPool())
+    entity = manager.db_manager.create_workflow_entity(config, name="parallel")
+
+    response = manager.launch_workflow(entity.id)
+
+    assert [step["step"] for step in response["step_execution"]["automated_steps"]] == ["second", "report"]
+    stored = WorkflowEntity.get_by_id(manager.db_manager.db, entity.id)
+    assert stored.status == WorkflowStatus.COMPLETED
+    # The stub reports the most calls it saw running at once
+    assert stored.get_step("first").result == "2" or stored.get_step("second").result == "2"
+    assert stored.get_step("report").result == "done"
+    manager.close()
+
+
+def test_step_dependencies_column_is_added(tmp_path):
+    db_path = str(tmp_path / "workflows.db")
+    db = Database(db_path)
+    db.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE workflow_steps DROP COLUMN depends_on")
+    conn.close()
+
+    manager = WorkflowManager(db_path)
+    entity = manager.db_manager.create_workflow_entity(RELEASE_CONFIG, name="release")
+
+    assert WorkflowEntity.get_by_id(manager.db_manager.db, entity.id).get_step("deploy").depends_on == ("build", "lint")
+    manager.close()
@@ -0,0 +1,155 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from db.manager import DatabaseManager, STORAGE_BACKENDS, open_storage
+from db.memoryStorage import MemoryStorage
+from db.models import WorkflowEntity, WorkflowStatus
+from db.shardedDatabase import ShardedDatabase, shard_paths
+from db.storage import ConcurrentUpdateError
+
+CONFIG = {
+    "name": "test-config",
+    "description": "Test config",
+    "context": {},
+    "steps": [{"id": f"step-{i}", "instructions": f"Do {i}"} for i in range(3)]
+}
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_storage(str(tmp_path / "workflows.db"), "postgres")
+
+
+@pytest.mark.parametrize("storage", STORAGE_BACKENDS)
+def test_invalid_page_cursor_is_rejected(tmp_path, storage):
+    manager = DatabaseManager(str(tmp_path / "workflows.db"), storage=storage)
+    with pytest.raises(ValueError):
+        manager.workflow_summary_page(cursor="not a cursor")
+    manager.close()
+
+
+@pytest.mark.parametrize("storage", STORAGE_BACKENDS)
+def test_stale_save_is_rejected(tmp_path, storage):
+    db = open_storage(str(tmp_path / "workflows.db"), storage)
+    entity = WorkflowEntity(db=db, name="pipeline", config_name="cfg").save()
+    first = WorkflowEntity.get_by_id(db, entity.id)
+    second = WorkflowEntity.get_by_id(db, entity.id)
+
+    first.update_context({"first": True}).save()
+    with pytest.raises(ConcurrentUpdateError):
+        second.update_context({"second": True}).save()
+
+    stored = WorkflowEntity.get_by_id(db, entity.id)
+    assert stored.version == first.version == 2
+    assert stored.context == {"first": True}
+    assert len(stored.logs) == 1
+
+    stored.update_context({"second": True}).save()
+    assert WorkflowEntity.get_by_id(db, entity.id).context == {"first": True, "second": True}
+    db.close()
+
+
+def test_memory_storage_writes_no_files(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "workflows.db"), storage="memory")
+    entity = manager.create_workflow_entity(CONFIG, name="pipeline")
+    entity.start_step("step-0")
+
+    assert isinstance(manager.db, MemoryStorage) and manager.archive is None
+    assert WorkflowEntity.get_by_name(manager.db, "pipeline").get_step("step-0").started_at is not None
+    assert os.listdir(tmp_path) == []
+    manager.close()
+
+
+def test_memory_storage_rejects_duplicate_names_without_writing():
+    db = MemoryStorage()
+    first = WorkflowEntity(db=db, name="first", config_name="cfg").save()
+    second = WorkflowEntity(db=db, name="second", config_name="cfg").save()
+
+    with pytest.raises(ValueError):
+        with db.unit_of_work():
+            first.update_context({"changed": True}).save()
+            second.name = "first"
+            second.save()
+
+    assert WorkflowEntity.get_by_id(db, first.id).context == {}
+    assert WorkflowEntity.get_by_name(db, "first").id == first.id
+
+
+def test_sharded_database_spreads_pipelines_over_files(tmp_path):
+    db_path = str(tmp_path / "workflows.db")
+    manager = DatabaseManager(db_path, storage="sharded", shards=3)
+    entities = [
+        manager.create_workflow_entity({**CONFIG, "description": f"Release {i}"}, name=f"pipeline-{i}")
+        for i in range(30)
+    ]
+    entities[7].start_step("step-0")
+
+    db = manager.db
+    assert isinstance(db, ShardedDatabase)
+    assert all(os.path.exists(path) for path in shard_paths(db_path, 3))
+    assert not os.path.exists(db_path)
+    assert all(shard.select_rows() for shard in db.shards)
+    for entity in entities:
+        assert [row["id"] for row in db.shard_for(entity.id).select_rows({"id": entity.id})] == [entity.id]
+
+    assert WorkflowEntity.get_by_name(db, "pipeline-7").get_step("step-0").status.value == "running"
+    assert WorkflowEntity.resolve(db, "release 12").id == entities[12].id
+    assert len(manager.list_workflow_summaries({"status": WorkflowStatus.CREATED})) == 29
+    manager.close()
+
+
+def test_sharded_pages_merge_shards_in_order(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "workflows.db"), storage="sharded", shards=4)
+    entities = [manager.create_workflow_entity(CONFIG, name=f"pipeline-{i}") for i in range(11)]
+
+    seen, cursor = [], None
+    while True:
+        page = manager.workflow_summary_page(limit=4, cursor=cursor)
+        seen.extend(summary["id"] for summary in page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    expected = sorted(entities, key=lambda entity: (entity.updated_at, entity.id), reverse=True)
+    assert seen == [entity.id for entity in expected]
+    manager.close()
+
+
+def test_new_pipeline_replaces_same_name_on_another_shard(tmp_path):
+    db = ShardedDatabase(str(tmp_path / "workflows.db"), shards=2)
+    first = WorkflowEntity(db=db, name="pipeline", config_name="cfg").save()
+    while True:
+        second = WorkflowEntity(db=db, name="pipeline", config_name="cfg")
+        if db.shard_index(second.id) != db.shard_index(first.id):
+            break
+    second.save()
+
+    assert WorkflowEntity.get_by_id(db, first.id) is None
+    assert WorkflowEntity.get_by_name(db, "pipeline").id == second.id
+    db.close()
+
+
+def test_sharded_conflict_writes_no_shard(tmp_path):
+    db = ShardedDatabase(str(tmp_path / "workflows.db"), shards=2)
+    first = WorkflowEntity(db=db, name="first", config_name="cfg").save()
+    while True:
+        second = WorkflowEntity(db=db, name="second", config_name="cfg")
+        if db.shard_index(second.id) != db.shard_index(first.id):
+            break
+    second.save()
+    WorkflowEntity.get_by_id(db, second.id).update_context({"other": True}).save()
+
+    commits = db.commit_count
+    with pytest.raises(ConcurrentUpdateError):
+        with db.unit_of_work():
+            first.update_context({"changed": True}).save()
+            second.update_context({"changed": True}).save()
+
+    assert db.commit_count == commits
+    assert WorkflowEntity.get_by_id(db, first.id).context == {}
+    assert WorkflowEntity.get_by_id(db, second.id).context == {"other": True}
+    db.close()
@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pipelineMGMT.templates import compile_template, render_template
+from pipelineMGMT.executor import WorkflowExecutor
+
+
+def test_flat_and_dotted_context_paths():
+    context = {"ticket_number": "T-1", "owner": {"team": {"name": "core"}}, "hosts": ["a", "b"]}
+
+    assert render_template("Ticket {ticket_number}", context) == "Ticket T-1"
+    assert render_template("Ticket {context.ticket_number}", context) == "Ticket T-1"
+    assert render_template("Team {owner.team.name} on {hosts.1}", context) == "Team core on b"
+
+
+def test_defaults_and_missing_keys():
+    missing = []
+
+    text = render_template("{present} {absent|n/a} {context.unknown} {owner.none}", {"present": 1, "owner": {}}, missing)
+
+    assert text == "1 n/a {context.unknown} {owner.none}"
+    assert missing == ["context.unknown", "owner.none"]
+
+
+def test_literal_braces_and_dotted_keys_are_preserved():
+    context = {"a.b": "flat", "ext-app-id": 42}
+
+    assert render_template('Payload {"key": 1} {a.b} {ext-app-id}', context) == 'Payload {"key": 1} flat 42'
+
+
+def test_plans_are_cached():
+    assert compile_template("Hello {name}") is compile_template("Hello {name}")
+    assert compile_template("No placeholders").render({"x": 1}) == "No placeholders"
+
+
+def test_executor_formats_nested_dicts_with_same_plans():
+    executor = WorkflowExecutor(db_manager=None)
+    missing = []
+
+    formatted = executor._format_dict_with_params(
+        {"tool": "notify", "arguments": {"to": "{context.owner}", "cc": ["{cc|nobody}", 3]}, "retries": 2},
+        {"owner": "ops"},
+        missing
+    )
+
+    assert formatted == {"tool": "notify", "arguments": {"to": "ops", "cc": ["nobody", 3]}, "retries": 2}
+    assert missing == []
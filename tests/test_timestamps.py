@@ -0,0 +1,78 @@
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime
+import pytest
+from db.models import WorkflowEntity, WorkflowStatus
+from db.timestamps import pack, unpack
+from db.workflowLogs import WorkflowLogs
+from db.workflowStep import WorkflowStep, StepStatus
+
+
+@pytest.mark.parametrize("value", [
+    "2025-03-04T05:06:07.123456", "2025-03-04T05:06:07", "1969-12-31T23:59:59.999999", "9999-12-31T23:59:59.999999"
+])
+def test_isoformat_timestamps_are_packed(value):
+    assert isinstance(pack(value), int)
+    assert unpack(pack(value)) == value
+
+
+@pytest.mark.parametrize("value", [
+    None, "", "2025-03-04", "2025-03-04 05:06:07", "2025-03-04T05:06:07.000000",
+    "2025-03-04T05:06:07+00:00", "2025-03-04T05:06:07,123456", "2025-13-04T05:06:07"
+])
+def test_other_values_are_kept(value):
+    assert pack(value) == value
+    assert unpack(pack(value)) == value
+
+
+def test_logs_read_as_dicts():
+    now = datetime.utcnow().isoformat()
+    entries = [
+        {"timestamp": now, "level": "INFO", "message": "started"},
+        {"timestamp": "yesterday", "level": "WARNING", "message": "late"},
+    ]
+    logs = WorkflowLogs(entries[:1])
+    logs.append(entries[1])
+
+    assert len(logs) == 2 and logs == entries
+    assert logs[-1] == entries[1] and logs[:1] == entries[:1]
+    assert [log["message"] for log in logs] == ["started", "late"]
+    with pytest.raises(IndexError):
+        logs[2]
+
+
+def test_models_have_no_instance_dict():
+    step = WorkflowStep(name="build", instructions="Build it", started_at="2025-03-04T05:06:07.123456")
+    entity = WorkflowEntity(db=None, name="pipeline", config_name="config", steps=[step])
+
+    for model in (step, entity):
+        assert not hasattr(model, "__dict__")
+        with pytest.raises(AttributeError):
+            model.unknown = 1
+
+    assert step.started_at == "2025-03-04T05:06:07.123456" and step.completed_at is None
+    assert step == WorkflowStep.from_row(step.to_dict())
+    assert entity.updated_at == entity.created_at == entity.last_activity_at
+
+
+def test_timestamp_changes_are_tracked():
+    step = WorkflowStep(name="build", instructions="Build it", started_at="2025-03-04T05:06:07")
+    step.started_at = "2025-03-04T05:06:07"
+    assert not step.dirty_fields
+
+    step.completed_at = "2025-03-04T05:07:00"
+    step.status = StepStatus.COMPLETED
+    assert step.dirty_fields == {"completed_at", "status"}
+    step.mark_clean(["status"])
+    assert step.dirty_fields == {"completed_at"}
+    step.mark_clean()
+    assert not step.dirty_fields
+
+    entity = WorkflowEntity(db=None, status=WorkflowStatus.RUNNING)
+    entity._dirty.clear()
+    entity.cancelled_at = "2025-03-04T05:08:00"
+    assert entity.dirty_fields == {"cancelled_at"}